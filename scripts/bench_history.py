@@ -0,0 +1,116 @@
+"""
+History write benchmark
+Times 1000 mark_watched calls (a long binge or a batch download) with the
+old JSON store that rewrote and fsynced history.json on every call, with a
+SQLite commit per call, and with the write-behind journal that batches
+commits in the background (and also appends every call to the watch log).
+The write-behind time includes the final flush.
+
+Usage: python scripts/bench_history.py [calls]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Keep the benchmark's databases out of the real ~/.ani-cli-arabic.
+os.environ['HOME'] = tempfile.mkdtemp(prefix="bench-history-")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.history import HistoryManager  # noqa: E402
+from src.storage import atomic_write_json  # noqa: E402
+from src.userdb import UserDatabase  # noqa: E402
+from src.writebehind import WriteBehind  # noqa: E402
+
+ANIME_IN_ROTATION = 150
+
+
+class LegacyHistory:
+    """HistoryManager as it was: the whole file sorted, rewritten and fsynced per call."""
+    MAX_HISTORY_SIZE = 100
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.history = {}
+
+    def mark_watched(self, anime_id, episode_num, anime_title):
+        self.history[str(anime_id)] = {
+            'episode': str(episode_num),
+            'title': anime_title,
+            'last_updated': datetime.now().isoformat()
+        }
+        if len(self.history) > self.MAX_HISTORY_SIZE:
+            sorted_items = sorted(self.history.items(), key=lambda x: x[1].get('last_updated', ''), reverse=True)
+            self.history = dict(sorted_items[:self.MAX_HISTORY_SIZE])
+        atomic_write_json(self.path, self.history, indent=4, ensure_ascii=False)
+
+
+class CommitPerCallHistory:
+    """Row-level SQLite writes with one transaction per call."""
+    MAX_HISTORY_SIZE = 100
+
+    def __init__(self, db: UserDatabase):
+        self.db = db
+
+    def mark_watched(self, anime_id, episode_num, anime_title):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO history (anime_id, title, episode, last_updated) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(anime_id) DO UPDATE SET title=excluded.title, episode=excluded.episode,"
+                " last_updated=excluded.last_updated",
+                (str(anime_id), anime_title, str(episode_num), datetime.now().isoformat()),
+            )
+            conn.execute(
+                "DELETE FROM history WHERE anime_id NOT IN"
+                " (SELECT anime_id FROM history ORDER BY last_updated DESC LIMIT ?)",
+                (self.MAX_HISTORY_SIZE,),
+            )
+
+
+def run(manager, calls):
+    started = time.perf_counter()
+    for i in range(calls):
+        anime = i % ANIME_IN_ROTATION
+        manager.mark_watched(anime, i // ANIME_IN_ROTATION + 1, f"Anime {anime}")
+    return time.perf_counter() - started
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print(f"{calls} mark_watched calls over {ANIME_IN_ROTATION} anime\n")
+    print(f"{'store':<28} {'total ms':>10} {'us/call':>10} {'commits':>8}")
+
+    base = Path(os.environ['HOME'])
+
+    elapsed = run(LegacyHistory(base / "legacy" / "history.json"), calls)
+    print(f"{'JSON rewrite + fsync':<28} {elapsed * 1000:>10.1f} {elapsed / calls * 1e6:>10.1f} {calls:>8}")
+
+    db = UserDatabase(base / "per-call" / "user.db")
+    elapsed = run(CommitPerCallHistory(db), calls)
+    print(f"{'SQLite commit per call':<28} {elapsed * 1000:>10.1f} {elapsed / calls * 1e6:>10.1f} {calls:>8}")
+
+    db = UserDatabase(base / "write-behind" / "user.db")
+    writer = WriteBehind(db)
+    history = HistoryManager(db=db, writer=writer)
+    elapsed = run(history, calls)
+    started = time.perf_counter()
+    writer.close()
+    flush_time = time.perf_counter() - started
+    total = elapsed + flush_time
+    commits = writer.stats['flushes']
+    print(f"{'write-behind journal':<28} {total * 1000:>10.1f} {total / calls * 1e6:>10.1f} {commits:>8}")
+    print(f"  ({elapsed * 1000:.1f} ms in mark_watched, {flush_time * 1000:.1f} ms in the final flush)")
+
+    stored = list(HistoryManager(db=db, writer=writer).get_history())
+    assert len(stored) == ANIME_IN_ROTATION, len(stored)
+    assert stored == list(history.get_history())
+    logged = db.query_one("SELECT COUNT(*) FROM watch_log")[0]
+    assert logged == calls, logged
+    print(f"\nwrite-behind database holds {len(stored)} anime and {logged} watch log entries, matching the in-memory view")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Result model memory benchmark
+Builds 10k and 100k catalog results shaped like real API rows and measures,
+with tracemalloc, what they cost as the old dataclass, as the slotted
+AnimeResult, and as a columnar AnimeBatch.
+
+Usage: python scripts/bench_models.py [count ...]
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models import ANIME_FIELDS, AnimeBatch, AnimeResult  # noqa: E402
+
+THUMBNAILS_BASE = "https://example.invalid/thumbnails/"
+TYPES = ("TV", "Movie", "OVA", "ONA", "Special")
+STATUSES = ("Finished Airing", "Currently Airing", "Not yet aired")
+GENRES = ("Action, Fantasy", "Comedy, Slice of Life", "Drama, Romance", "Action, Adventure, Shounen", "Mystery, Thriller")
+RATINGS = ("PG-13 - Teens 13 or older", "R - 17+ (violence & profanity)", "G - All Ages")
+
+
+@dataclass
+class LegacyAnimeResult:
+    """AnimeResult as it was before the slotted rewrite."""
+    id: str
+    title_en: str
+    title_jp: str
+    type: str
+    episodes: str
+    status: str
+    genres: str
+    mal_id: str
+    relation_id: str
+    score: str
+    rank: str
+    popularity: str
+    rating: str
+    premiered: str
+    creators: str
+    duration: str
+    thumbnail: str
+    title_romaji: str = ""
+    trailer: str = ""
+    yt_trailer: str = ""
+
+
+def make_item(idx):
+    """One row as the API sends it: every value a freshly decoded string."""
+    return {
+        'AnimeId': str(idx),
+        'EN_Title': f"Anime Title Number {idx}",
+        'JP_Title': f"アニメ {idx}",
+        'Type': TYPES[idx % len(TYPES)],
+        'Episodes': str(12 + idx % 3 * 12),
+        'Status': STATUSES[idx % len(STATUSES)],
+        'Genres': GENRES[idx % len(GENRES)],
+        'MalId': str(30000 + idx),
+        'RelationId': str(idx // 3),
+        'Score': f"{6 + idx % 40 / 10}",
+        'Rank': str(idx + 1),
+        'Popularity': str((idx * 7919) % 20000 + 1),
+        'Rating': RATINGS[idx % len(RATINGS)],
+        'Season': f"{('Winter', 'Spring', 'Summer', 'Fall')[idx % 4]} {2000 + idx % 25}",
+        'Creators': f"Studio {idx % 60}",
+        'Duration': "24 min per ep",
+        'Thumbnail': f"{idx}.jpg",
+    }
+
+
+def fresh(text):
+    # JSON decoding hands every row its own string objects; copy to model that.
+    return (text + ".")[:-1]
+
+
+def legacy_result(item):
+    values = {key: fresh(value) for key, value in item.items()}
+    return LegacyAnimeResult(
+        values['AnimeId'], values['EN_Title'], values['JP_Title'], values['Type'], values['Episodes'],
+        values['Status'], values['Genres'], values['MalId'], values['RelationId'], values['Score'],
+        values['Rank'], values['Popularity'], values['Rating'], values['Season'], values['Creators'],
+        values['Duration'], THUMBNAILS_BASE + values['Thumbnail'], values['EN_Title'],
+    )
+
+
+def slotted_result(item):
+    values = {key: fresh(value) for key, value in item.items()}
+    return AnimeResult(
+        values['AnimeId'], values['EN_Title'], values['JP_Title'], values['Type'], values['Episodes'],
+        values['Status'], values['Genres'], values['MalId'], values['RelationId'], values['Score'],
+        values['Rank'], values['Popularity'], values['Rating'], values['Season'], values['Creators'],
+        values['Duration'], values['Thumbnail'], values['EN_Title'], thumbnail_base=THUMBNAILS_BASE,
+    )
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current, elapsed
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'results':>8} {'representation':<20} {'MiB':>8} {'bytes/row':>10} {'build s':>8}")
+    for count in counts:
+        items = [make_item(i) for i in range(count)]
+        legacy, legacy_bytes, legacy_time = measure(lambda: [legacy_result(item) for item in items])
+        slotted, slotted_bytes, slotted_time = measure(lambda: [slotted_result(item) for item in items])
+        # The batch is measured on its own; the slotted rows it is built from already exist.
+        batch, batch_bytes, batch_time = measure(lambda: AnimeBatch(slotted))
+
+        for name, size, elapsed in (("dataclass (old)", legacy_bytes, legacy_time),
+                                    ("slotted", slotted_bytes, slotted_time),
+                                    ("AnimeBatch", batch_bytes, batch_time)):
+            print(f"{count:>8} {name:<20} {size / 2**20:>8.1f} {size / count:>10.0f} {elapsed:>8.2f}")
+
+        # Every representation must read back exactly what the old model held.
+        for old, new, row in zip(legacy, slotted, batch):
+            expected = tuple(getattr(old, name) for name in ANIME_FIELDS)
+            assert new.as_tuple() == expected, (expected, new.as_tuple())
+            assert row.as_tuple() == expected, (expected, row.as_tuple())
+        print()
+        del legacy, slotted, batch
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Poster renderer benchmark
+Compares the original per-block loop against the vectorized renderer in
+src/poster.py and checks that both produce byte-identical output.
+
+Usage: python scripts/bench_poster.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.poster import QUADRANTS, render_ansi
+
+# (label, text rows) - 27 rows is what the episode screen asks for on a
+# 35-line terminal; the others cover small and very tall terminals.
+SIZES = [("small", 15), ("episode screen", 27), ("tall", 45), ("huge", 80)]
+POSTER_ASPECT = 225 / 318  # Typical MAL poster width / height
+RUNS = 5
+
+
+def render_ansi_loop(arr):
+    """The renderer as it was before vectorization, kept as the reference."""
+    new_height, new_width = arr.shape[0], arr.shape[1]
+    output_lines = []
+
+    for y in range(0, new_height, 2):
+        line_parts = []
+        for x in range(0, new_width, 2):
+            p0 = arr[y, x]
+            p1 = arr[y, x+1] if x+1 < new_width else p0
+            p2 = arr[y+1, x] if y+1 < new_height else p0
+            p3 = arr[y+1, x+1] if (y+1 < new_height and x+1 < new_width) else p0
+
+            def calculate_luminance(p):
+                return 0.299*p[0] + 0.587*p[1] + 0.114*p[2]
+            lums = [calculate_luminance(p0), calculate_luminance(p1), calculate_luminance(p2), calculate_luminance(p3)]
+            avg_lum = sum(lums) / 4
+
+            mask = [lum_val > avg_lum for lum_val in lums]
+
+            bright = [p for i, p in enumerate([p0, p1, p2, p3]) if mask[i]]
+            dark = [p for i, p in enumerate([p0, p1, p2, p3]) if not mask[i]]
+
+            if bright:
+                fg = np.mean(bright, axis=0).astype(int)
+            else:
+                fg = np.mean([p0, p1, p2, p3], axis=0).astype(int)
+
+            if dark:
+                bg = np.mean(dark, axis=0).astype(int)
+            else:
+                bg = fg
+
+            if all(mask) or not any(mask):
+                char_idx = 15
+            else:
+                char_idx = mask[0] * 1 + mask[1] * 2 + mask[2] * 4 + mask[3] * 8
+
+            char = QUADRANTS[char_idx]
+            line_parts.append(f"\033[38;2;{fg[0]};{fg[1]};{fg[2]}m\033[48;2;{bg[0]};{bg[1]};{bg[2]}m{char}")
+
+        line_parts.append("\033[0m")
+        output_lines.append("".join(line_parts))
+
+    return "\n".join(output_lines)
+
+
+def make_poster(rows, rng):
+    height = rows * 2
+    width = int(POSTER_ASPECT * height * 2.0) & ~1
+    # Smooth gradients with noise and a few flat areas, closer to real artwork than pure noise.
+    yy, xx = np.mgrid[0:height, 0:width]
+    base = np.stack(((xx * 255) // max(1, width - 1), (yy * 255) // max(1, height - 1), (xx + yy) % 256), axis=-1)
+    noise = rng.integers(-40, 40, size=base.shape)
+    arr = np.clip(base + noise, 0, 255).astype(np.uint8)
+    arr[: height // 4, : width // 4] = (20, 20, 20)
+    return arr
+
+
+def best_of(func, arr):
+    best = float("inf")
+    output = None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        output = func(arr)
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main():
+    rng = np.random.default_rng(1234)
+    print(f"{'size':<16}{'cells':>8}{'loop (ms)':>12}{'vector (ms)':>14}{'speedup':>10}  identical")
+    for label, rows in SIZES:
+        arr = make_poster(rows, rng)
+        cells = (arr.shape[0] // 2) * (arr.shape[1] // 2)
+        old_time, old_out = best_of(render_ansi_loop, arr)
+        new_time, new_out = best_of(render_ansi, arr)
+        identical = old_out.encode("utf-8") == new_out.encode("utf-8")
+        print(f"{label:<16}{cells:>8}{old_time * 1000:>12.2f}{new_time * 1000:>14.2f}{old_time / new_time:>9.1f}x  {identical}")
+        if not identical:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
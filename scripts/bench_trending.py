@@ -0,0 +1,142 @@
+"""
+Trending list benchmark
+Scrolls the Trending list 15 rows at a time (like the TUI's lazy loading)
+against a local fake catalog API and counts the requests and bytes it costs,
+comparing the old refetch-and-sort approach with the incremental TrendingIndex.
+
+Usage: python scripts/bench_trending.py [rows]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs
+
+# Keep the benchmark's caches and credentials out of the real ~/.ani-cli-arabic.
+os.environ['HOME'] = tempfile.mkdtemp(prefix="bench-trending-")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CATALOG_SIZE = 2000
+PAGE_SIZE = 20
+PAGE_ROWS = 15
+
+
+class Counters:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes = 0
+
+    def add(self, size):
+        with self.lock:
+            self.requests += 1
+            self.bytes += size
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.bytes = 0
+
+
+counters = Counters()
+
+
+def make_item(idx):
+    return {
+        'AnimeId': str(idx),
+        'EN_Title': f"Anime {idx}",
+        'Type': 'TV',
+        'Episodes': 12,
+        'Status': 'Finished Airing',
+        'Genres': 'Action, Fantasy',
+        'Score': '7.5',
+        'Rank': str(idx),
+        # Scrambled so the latest order and the popularity order differ.
+        'Popularity': str((idx * 7919) % 5000 + 1),
+        'Thumbnail': f"{idx}.jpg",
+    }
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload):
+        body = json.dumps(payload).encode('utf-8')
+        counters.add(len(body))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        host, port = self.server.server_address
+        self._send({'ANI_CLI_AR_API_BASE': f"http://{host}:{port}/", 'ANI_CLI_AR_TOKEN': 'bench'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        start = int(form.get('From', ['0'])[0])
+        self._send([make_item(i) for i in range(start, min(start + PAGE_SIZE, CATALOG_SIZE))])
+
+
+def legacy_trending(api, from_index, limit):
+    """get_trending_anime as it was: refetch the whole prefix and sort it on every page."""
+    results = api.get_latest_anime(limit=limit + from_index + 20)
+    results_with_pop = [r for r in results if r.popularity and r.popularity.isdigit()]
+    results_with_pop.sort(key=lambda x: int(x.popularity))
+    return results_with_pop[from_index:from_index + limit]
+
+
+def scroll(get_page, rows):
+    shown = []
+    while len(shown) < rows:
+        page = get_page(len(shown), PAGE_ROWS)
+        if not page:
+            break
+        shown.extend(page)
+    return shown[:rows]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['ANI_CLI_AR_ENDPOINT'] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    from src.api import AnimeAPI, get_api_base
+    from src.cache import ResponseCache
+
+    get_api_base()  # Fetch credentials before counting
+
+    print(f"Scrolling {rows} trending rows, {PAGE_ROWS} per page, {PAGE_SIZE}-row API pages\n")
+    print(f"{'approach':<28} {'response cache':<16} {'requests':>9} {'KiB':>9}")
+
+    outputs = {}
+    for use_cache in (False, True):
+        for name in ("refetch and sort", "incremental index"):
+            cache = ResponseCache(Path(tempfile.mkdtemp(prefix="bench-cache-")))
+            cache.enabled = use_cache
+            api = AnimeAPI(cache=cache)
+            get_page = (lambda f, n, api=api: legacy_trending(api, f, n)) if name == "refetch and sort" else api.get_trending_anime
+
+            counters.reset()
+            shown = scroll(get_page, rows)
+            outputs[(name, use_cache)] = [r.id for r in shown]
+            print(f"{name:<28} {'on' if use_cache else 'off':<16} {counters.requests:>9} {counters.bytes / 1024:>9.1f}")
+
+    print()
+    for name in ("refetch and sort", "incremental index"):
+        shown = outputs[(name, False)]
+        print(f"{name}: {len(shown)} rows shown, {len(shown) - len(set(shown))} duplicates across pages")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
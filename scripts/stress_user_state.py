@@ -0,0 +1,175 @@
+"""
+Cross-process stress test for history and favorites
+Starts several processes that share one user database and hammer
+mark_watched, favorites add and remove on overlapping anime, then checks
+that nothing was lost:
+
+- every mark_watched call is in the watch log;
+- each anime's history row is the most recent watch any process made;
+- favorites only one process touched are exactly as it left them, and each
+  contested favorite ends as its most recent add or removal decided;
+- a manager opened before the run sees all of it once it next reads.
+
+One worker exits without flushing, leaving its journal behind; its changes
+must be recovered by the next process that opens the database.
+
+Usage: python scripts/stress_user_state.py [workers] [calls per worker]
+"""
+
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHARED_ANIME = 25
+SHARED_FAVORITES = 10
+
+
+def worker(index, calls, crash):
+    sys.path.insert(0, ROOT)
+    from src.favorites import FavoritesManager
+    from src.history import HistoryManager
+    from src.writebehind import get_write_behind
+
+    rng = random.Random(index)
+    history = HistoryManager()
+    favorites = FavoritesManager()
+    watched, own_favorites, shared_adds = [], {}, []
+
+    for seq in range(calls):
+        anime_id = str(rng.randrange(SHARED_ANIME))
+        history.mark_watched(anime_id, f"{index}-{seq}", f"Anime {anime_id}")
+        watched.append([anime_id, f"{index}-{seq}", history.history[anime_id]['last_updated']])
+
+        if seq % 3 == 0:
+            own_id = f"w{index}-{rng.randrange(calls // 10 + 1)}"
+            if rng.random() < 0.7:
+                favorites.add(own_id, own_id, None)
+                own_favorites[own_id] = True
+            else:
+                favorites.remove(own_id)
+                own_favorites[own_id] = False
+        else:
+            shared_id = f"s{rng.randrange(SHARED_FAVORITES)}"
+            if rng.random() < 0.6:
+                favorites.add(shared_id, shared_id, None)
+                shared_adds.append([shared_id, favorites.favorites[shared_id]['added_at']])
+            else:
+                favorites.remove(shared_id)
+
+        if seq % 25 == 0:
+            # Reads pick up what the other processes have flushed meanwhile.
+            history.get_history()
+            favorites.get_all()
+        time.sleep(rng.random() * 0.002)
+
+    results = Path.home() / "results"
+    results.mkdir(exist_ok=True)
+    with open(results / f"worker-{index}.json", 'w', encoding='utf-8') as handle:
+        json.dump({'watched': watched, 'own_favorites': own_favorites, 'shared_adds': shared_adds}, handle)
+
+    if crash:
+        # Leave the journal behind, as a killed process would.
+        os._exit(0)
+    get_write_behind().close()
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    os.environ['HOME'] = tempfile.mkdtemp(prefix="stress-user-state-")
+    sys.path.insert(0, ROOT)
+    from src.favorites import FavoritesManager
+    from src.history import HistoryManager
+    from src.userdb import UserDatabase
+    from src.writebehind import WriteBehind
+
+    # Opened before the workers start; it has to notice their changes on its own.
+    early_db = UserDatabase()
+    early_writer = WriteBehind(early_db)
+    early_history = HistoryManager(db=early_db, writer=early_writer)
+    early_favorites = FavoritesManager(db=early_db, writer=early_writer)
+    assert len(early_history.get_history()) == 0
+
+    started = time.perf_counter()
+    ctx = multiprocessing.get_context('spawn')
+    procs = [ctx.Process(target=worker, args=(i, calls, i == workers - 1)) for i in range(workers)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+        assert proc.exitcode == 0, proc.exitcode
+    elapsed = time.perf_counter() - started
+    print(f"{workers} processes x {calls} calls in {elapsed:.1f}s (worker {workers - 1} exited without flushing)")
+
+    # A fresh process would recover the abandoned journal on start.
+    db = UserDatabase()
+    writer = WriteBehind(db)
+    print(f"recovered {writer.stats['recovered']} unflushed changes")
+
+    results = [
+        json.loads((Path.home() / "results" / f"worker-{i}.json").read_text(encoding='utf-8'))
+        for i in range(workers)
+    ]
+    failures = []
+
+    logged = {row[0] for row in db.query("SELECT episode FROM watch_log")}
+    expected = {episode for result in results for _, episode, _ in result['watched']}
+    if logged != expected or len(expected) != workers * calls:
+        failures.append(f"watch log: {len(expected - logged)} missing, {len(logged - expected)} unexpected")
+
+    latest = {}
+    for result in results:
+        for anime_id, episode, stamp in result['watched']:
+            if anime_id not in latest or stamp > latest[anime_id][1]:
+                latest[anime_id] = (episode, stamp)
+    stored = {row[0]: (row[1], row[2]) for row in db.query("SELECT anime_id, episode, last_updated FROM history")}
+    for anime_id, newest in latest.items():
+        if stored.get(anime_id) != newest:
+            failures.append(f"history {anime_id}: stored {stored.get(anime_id)}, newest watch was {newest}")
+
+    favorite_rows = {
+        row[0]: (row[1], row[2])
+        for row in db.query("SELECT anime_id, added_at, removed_at FROM favorites")
+    }
+    for result in results:
+        for anime_id, present in result['own_favorites'].items():
+            row = favorite_rows.get(anime_id)
+            if bool(row and row[1] is None) != present:
+                failures.append(f"favorite {anime_id}: expected present={present}, stored {row}")
+    newest_add = {}
+    for result in results:
+        for anime_id, stamp in result['shared_adds']:
+            newest_add[anime_id] = max(newest_add.get(anime_id, ''), stamp)
+    for anime_id, stamp in newest_add.items():
+        added_at, removed_at = favorite_rows.get(anime_id, (None, None))
+        if removed_at is None and added_at != stamp:
+            failures.append(f"favorite {anime_id}: kept add from {added_at}, newest add was {stamp}")
+        if removed_at is not None and removed_at <= stamp:
+            failures.append(f"favorite {anime_id}: removal at {removed_at} overrode a newer add at {stamp}")
+
+    fresh_history = {item['anime_id']: item['episode'] for item in HistoryManager(db=db, writer=writer).get_history()}
+    early_view = {item['anime_id']: item['episode'] for item in early_history.get_history()}
+    if early_view != fresh_history:
+        failures.append("history view opened before the run did not converge")
+    fresh_favorites = [item['anime_id'] for item in FavoritesManager(db=db, writer=writer).get_all()]
+    if [item['anime_id'] for item in early_favorites.get_all()] != fresh_favorites:
+        failures.append("favorites view opened before the run did not converge")
+
+    print(f"{len(logged)} watch log entries, {len(stored)} history rows, {len(fresh_favorites)} favorites")
+    if failures:
+        print(f"\n{len(failures)} problems:")
+        for failure in failures[:20]:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("no lost or reordered updates")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,18 @@
-import json
 import re
+import sqlite3
 import threading
-from pathlib import Path
-from typing import Dict, List, Optional
+import time
+from collections import deque
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional
 
 import requests
-from .models import AnimeResult, Episode
-from .storage import atomic_write_json
+from . import jsonstream, network
+from .cache import FRESH, STALE, get_response_cache, make_cache_key
+from .models import AnimeResult, Episode, EpisodeIndex, SearchResults
+from .trending import TrendingIndex
+from .userdb import UserDatabase, get_user_db
 
 # Default credentials - can be overridden with environment variables
 # This is for analytics and also api credentials fetching.
@@ -21,14 +27,23 @@ def _get_endpoint_config() -> tuple[str, str]:
     return endpoint_url, auth_secret
 
 
+# Cached credentials are used straight away; once older than this they are
+# still used but refreshed in the background.
+CREDENTIALS_TTL = 24 * 3600
+CREDENTIALS_TIMEOUT = 10
+
+# Catalog API answers that mean the token was rotated.
+AUTH_FAILURE_STATUSES = (401, 403)
+
+
 class APICache:
-    CACHE_FILENAME = "api_credentials.json"
+    """API credentials, cached in the user database and refreshed from the credentials endpoint."""
 
-    def __init__(self):
-        home_dir = Path.home()
-        db_dir = home_dir / ".ani-cli-arabic" / "database"
-        db_dir.mkdir(parents=True, exist_ok=True)
-        self.cache_file = db_dir / self.CACHE_FILENAME
+    def __init__(self, ttl: int = CREDENTIALS_TTL, db: Optional[UserDatabase] = None):
+        self.db = db or get_user_db()
+        self.ttl = ttl
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
 
     @staticmethod
     def _default_keys() -> dict:
@@ -46,84 +61,165 @@ class APICache:
             return defaults
         return {key: str(data.get(key, defaults[key]) or '') for key in defaults}
 
-    def _load_cached_keys(self) -> Optional[dict]:
-        if not self.cache_file.exists():
-            return None
+    @staticmethod
+    def _is_usable(keys: Optional[dict]) -> bool:
+        return bool(keys and keys['ANI_CLI_AR_API_BASE'] and keys['ANI_CLI_AR_TOKEN'])
 
+    def _load_cached_keys(self) -> Optional[dict]:
         try:
-            with open(self.cache_file, 'r', encoding='utf-8') as cache_handle:
-                cached = json.load(cache_handle)
-
-            normalized = self._normalize_keys(cached)
-            if normalized['ANI_CLI_AR_API_BASE'] and normalized['ANI_CLI_AR_TOKEN']:
-                return normalized
-        except (json.JSONDecodeError, OSError, IOError, ValueError, TypeError):
+            cached, _ = self.db.get_credentials()
+        except sqlite3.Error:
             return None
 
+        normalized = self._normalize_keys(cached)
+        if self._is_usable(normalized):
+            return normalized
         return None
 
     def _save_cached_keys(self, keys: dict) -> None:
         normalized = self._normalize_keys(keys)
-        if not normalized['ANI_CLI_AR_API_BASE'] or not normalized['ANI_CLI_AR_TOKEN']:
+        if not self._is_usable(normalized):
             return
 
         try:
-            atomic_write_json(self.cache_file, normalized, indent=2, ensure_ascii=False)
-        except OSError:
+            self.db.set_credentials(normalized)
+        except sqlite3.Error:
             pass
 
-    def _fetch_from_remote(self) -> dict:
+    def cache_age(self) -> Optional[float]:
+        """Seconds since the cached keys were written, or None when nothing is cached."""
+        try:
+            _, updated_at = self.db.get_credentials()
+        except sqlite3.Error:
+            return None
+        if updated_at is None:
+            return None
+        return max(0.0, time.time() - updated_at)
+
+    def is_expired(self) -> bool:
+        age = self.cache_age()
+        return age is None or age > self.ttl
+
+    def _fetch_from_remote(self) -> Optional[dict]:
         endpoint_url, auth_secret = _get_endpoint_config()
-        cached = self._load_cached_keys()
         
         try:
-            response = requests.get(
+            response = network.get(
                 f"{endpoint_url}/credentials",
                 headers={
                     'X-Auth-Key': auth_secret,
                     'User-Agent': 'AniCliAr/2.0'
                 },
-                timeout=10
+                timeout=CREDENTIALS_TIMEOUT
             )
             
             response.raise_for_status()
             remote_keys = self._normalize_keys(response.json())
-            if remote_keys['ANI_CLI_AR_API_BASE'] and remote_keys['ANI_CLI_AR_TOKEN']:
+            if self._is_usable(remote_keys):
                 self._save_cached_keys(remote_keys)
                 return remote_keys
         except (requests.RequestException, ValueError, TypeError):
             pass
 
-        if cached:
-            return cached
-        return self._default_keys()
+        return None
+
+    def refresh(self) -> Optional[dict]:
+        """Fetch fresh keys from the credentials endpoint; None if it can't be reached."""
+        return self._fetch_from_remote()
+
+    def refresh_async(self, on_done=None) -> bool:
+        """Refresh in a background thread; concurrent refreshes are collapsed into one."""
+        with self._refresh_lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+
+        def worker():
+            try:
+                keys = self.refresh()
+                if keys and on_done is not None:
+                    on_done(keys)
+            finally:
+                with self._refresh_lock:
+                    self._refreshing = False
+
+        threading.Thread(target=worker, name="credentials-refresh", daemon=True).start()
+        return True
     
     def get_keys(self) -> dict:
-        return self._fetch_from_remote()
+        """Cached keys when there are any, refreshing expired ones in the background.
 
+        Only a first run (or an unreadable cache) waits on the credentials endpoint.
+        """
+        cached = self._load_cached_keys()
+        if cached:
+            if self.is_expired():
+                self.refresh_async(_set_creds)
+            return cached
+        return self.refresh() or self._default_keys()
 
-def get_credentials():
+
+def _get_credential_manager() -> APICache:
     global _credential_manager
     if _credential_manager is None:
-        _credential_manager = APICache()
-    return _credential_manager.get_keys()
+        with _creds_lock:
+            if _credential_manager is None:
+                _credential_manager = APICache()
+    return _credential_manager
+
+
+def get_credentials():
+    return _get_credential_manager().get_keys()
 
 
 _credential_manager = None
 _creds = None
 _creds_lock = threading.Lock()
+_auth_refresh_lock = threading.Lock()
+
+def _set_creds(keys: dict) -> None:
+    global _creds
+    _creds = keys
 
 def _ensure_creds():
-    global _creds, _credential_manager
+    global _creds
     if _creds is not None:
         return
 
+    manager = _get_credential_manager()
     with _creds_lock:
         if _creds is not None:
             return
-        if _credential_manager is None:
-            _credential_manager = APICache()
-        _creds = _credential_manager.get_keys()
+        _creds = manager.get_keys()
+
+def warm_credentials() -> None:
+    """Load cached credentials now and refresh them in the background.
+
+    Called at startup so the first API call never waits on the credentials
+    endpoint when a usable cache exists.
+    """
+    manager = _get_credential_manager()
+    _ensure_creds()
+    if APICache._is_usable(_creds):
+        manager.refresh_async(_set_creds)
+
+def refresh_credentials(rejected_token: Optional[str] = None) -> bool:
+    """Fetch new credentials after the API rejected ``rejected_token``.
+
+    Returns True when different credentials are now in use, i.e. retrying the
+    request is worthwhile. Concurrent callers share one refresh.
+    """
+    with _auth_refresh_lock:
+        if rejected_token is not None and _creds is not None and _creds.get('ANI_CLI_AR_TOKEN') != rejected_token:
+            # Another thread already replaced the rejected token.
+            return True
+        previous = _creds
+        keys = _get_credential_manager().refresh()
+        if keys:
+            _set_creds(keys)
+        if rejected_token is not None:
+            return _creds is not None and _creds.get('ANI_CLI_AR_TOKEN') != rejected_token
+        return bool(keys) and keys != previous
 
 def get_api_base():
     _ensure_creds()
@@ -141,12 +237,280 @@ def get_trailers_base():
     _ensure_creds()
     return _creds.get('TRAILERS_BASE_URL', '')
 
+LATEST_ANIME_PATH = "anime/load_latest_anime.php"
+ANIME_LIST_PATH = "anime/load_anime_list_v2.php"
+EPISODES_PATH = "episodes/load_episodes.php"
+SERVERS_PATH = "anime/load_servers.php"
+
+# A page shorter than this means the server has nothing more to give.
+MIN_FULL_PAGE = 10
+MAX_PAGE_WORKERS = 4
+
+# Anime types searched in parallel; add e.g. "OVA", "ONA", "SPECIAL" to widen a search.
+SEARCH_TYPES = ("SERIES", "MOVIE")
+SEARCH_LIMIT = 20
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _normalize_title(text: str) -> str:
+    return " ".join(_WORD_RE.findall((text or "").lower()))
+
+
+def relevance_score(query: str, result: AnimeResult) -> int:
+    """Rough match quality of a result against a search query (higher is better)."""
+    q = _normalize_title(query)
+    if not q:
+        return 0
+    q_words = set(q.split())
+
+    best = 0
+    for title in (result.title_en, result.title_jp, result.title_romaji):
+        t = _normalize_title(title)
+        if not t:
+            continue
+        if t == q:
+            score = 100
+        elif t.startswith(q):
+            score = 80
+        elif f" {q}" in f" {t}":
+            score = 60
+        elif q in t:
+            score = 40
+        else:
+            overlap = len(q_words & set(t.split()))
+            score = 30 * overlap // len(q_words)
+        best = max(best, score)
+    return best
+
+
+def rank_search_results(query: str, results) -> list:
+    """``results`` by relevance to ``query``, best first; equally relevant hits keep their order."""
+    return sorted(results, key=lambda r: relevance_score(query, r), reverse=True)
+
+
+def merge_search_results(query: str, types, by_type: Dict[str, List[AnimeResult]], timings: Dict[str, float]) -> SearchResults:
+    """Combine per-type search results into one de-duplicated, relevance-ranked list."""
+    merged = SearchResults(timings=timings)
+    # Lay branches out in `types` order so equally relevant hits don't depend on
+    # which request finished first, then rank (the sort is stable).
+    seen_ids = set()
+    for anime_type in types:
+        for result in by_type.get(anime_type, []):
+            if result.id:
+                if result.id in seen_ids:
+                    continue
+                seen_ids.add(result.id)
+            merged.append(result)
+    merged[:] = rank_search_results(query, merged)
+    return merged
+
+
+class PageBatcher:
+    """Turns raw list pages into parsed batches, de-duplicated by id and capped at ``limit``."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.produced = 0
+        self._seen_ids = set()
+
+    def take(self, data) -> List[AnimeResult]:
+        batch = []
+        for item in data:
+            if isinstance(item, AnimeResult):
+                result = item
+            elif isinstance(item, dict):
+                result = AnimeAPI._parse_anime_result(item)
+            else:
+                continue
+            if result.id:
+                if result.id in self._seen_ids:
+                    continue
+                self._seen_ids.add(result.id)
+            batch.append(result)
+            if self.produced + len(batch) >= self.limit:
+                break
+        self.produced += len(batch)
+        return batch
+
+
+def store_in_catalog(catalog, path: str, payload: dict, data: list) -> None:
+    """Mirror a fetched list page into the CatalogStore."""
+    results = [AnimeAPI._parse_anime_result(item) for item in data if isinstance(item, dict)]
+    if payload.get('FilterType') == 'SEARCH':
+        # Search hits still feed anime details, but a search is not a list worth mirroring.
+        catalog.upsert_anime(results)
+        return
+    try:
+        from_index = int(payload.get('From', 0))
+    except (TypeError, ValueError):
+        return
+    catalog.store_page(path, payload, from_index, results)
+
+
+class SingleFlight:
+    """Collapses identical concurrent calls into one.
+
+    The first caller for a key runs the function; callers arriving while it is
+    still running wait for it and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, "_Call"] = {}
+        self._counters = {'calls': 0, 'executed': 0, 'collapsed': 0}
+
+    def do(self, key: str, func, *args):
+        with self._lock:
+            self._counters['calls'] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self._counters['collapsed'] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._counters['executed'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            result = dict(self._counters)
+            result['in_flight'] = len(self._calls)
+        return result
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# Shared by every AnimeAPI instance so the UI, the prefetcher and the
+# download resolver all collapse onto the same in-flight requests.
+_inflight = SingleFlight()
+# Other groups whose counters are reported along with it (the asyncio client's).
+_flight_groups = [_inflight]
+
+
+def register_flight_group(group) -> None:
+    _flight_groups.append(group)
+
+
+def get_coalescing_stats() -> Dict[str, int]:
+    """Calls made, round trips actually executed and calls collapsed onto an in-flight one."""
+    result = {}
+    for group in _flight_groups:
+        for name, value in group.stats().items():
+            result[name] = result.get(name, 0) + value
+    return result
+
+
 class AnimeAPI:
-    
-    def _parse_anime_result(self, item: dict) -> AnimeResult:
-        thumbnail_filename = item.get('Thumbnail', '')
-        thumbnail_url = get_thumbnails_base() + thumbnail_filename if thumbnail_filename else ''
-        
+
+    def __init__(self, cache=None, inflight: Optional[SingleFlight] = None, catalog=None, search_index=None):
+        self.cache = cache if cache is not None else get_response_cache()
+        self.inflight = inflight if inflight is not None else _inflight
+        # Optional CatalogStore: list pages are served from it when fresh and written to it when fetched.
+        self.catalog = catalog
+        # Optional TitleIndex over the catalog: confident local hits skip the remote search.
+        self.search_index = search_index
+        self.trending = TrendingIndex(self._latest_page)
+
+    def _fetch_json(self, path: str, payload: dict):
+        token = get_api_token()
+        with closing(self._open(path, payload, token)) as response:
+            # Arrays are parsed element by element as the body arrives.
+            return jsonstream.load_chunks(response.iter_content(jsonstream.STREAM_CHUNK_SIZE))
+
+    def _stream_json_array(self, path: str, payload: dict) -> Iterator:
+        """Elements of an endpoint's array response as they arrive, bypassing the response cache."""
+        with closing(self._open(path, payload, get_api_token())) as response:
+            yield from jsonstream.iter_array(response.iter_content(jsonstream.STREAM_CHUNK_SIZE))
+
+    def _open(self, path: str, payload: dict, token: str):
+        """Send the request (retrying once with refreshed credentials) and return the unread response."""
+        response = self._send(path, payload, token)
+        if response.status_code in AUTH_FAILURE_STATUSES and refresh_credentials(token):
+            response.close()
+            response = self._send(path, payload, get_api_token())
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+        return response
+
+    @staticmethod
+    def _send(path: str, payload: dict, token: str):
+        request_payload = dict(payload)
+        request_payload['Token'] = token
+        return network.post(
+            get_api_base() + path, data=request_payload, timeout=10, stream=True,
+            adaptive_timeout=True, retry_post=True
+        )
+
+    def _post_json(self, path: str, payload: dict):
+        """POST to a catalog endpoint, serving from the response cache when possible.
+
+        Stale entries are returned immediately while a background refresh updates
+        the cache for the next call. Concurrent misses for the same request share
+        one round trip. While the API host is marked down, expired entries are
+        served too.
+        """
+        # While the API host's circuit is open, anything cached beats failing.
+        host_down = network.is_host_down(get_api_base())
+        data, state = self.cache.get(path, payload, allow_expired=host_down)
+        if state == FRESH:
+            return data
+        if state == STALE:
+            if not host_down:
+                self.cache.refresh_async(path, payload, lambda: self._fetch_valid_list(path, payload))
+            return data
+
+        return self.inflight.do(make_cache_key(path, payload), self._fetch_and_store, path, payload)
+
+    def fetch_list_page(self, path: str, payload: dict):
+        """Fetch one list page from the network (never the response cache), updating the cache."""
+        return self.inflight.do(make_cache_key(path, payload), self._fetch_and_store, path, payload)
+
+    def _fetch_and_store(self, path: str, payload: dict):
+        data = self._fetch_json(path, payload)
+        if isinstance(data, list):
+            self.cache.put(path, payload, data)
+            if self.catalog is not None and path in (ANIME_LIST_PATH, LATEST_ANIME_PATH):
+                store_in_catalog(self.catalog, path, payload, data)
+        return data
+
+    def _fetch_valid_list(self, path: str, payload: dict):
+        data = self._fetch_json(path, payload)
+        return data if isinstance(data, list) else None
+
+    @staticmethod
+    def _parse_anime_result(item: dict) -> AnimeResult:
         return AnimeResult(
             id=item.get('AnimeId', ''),
             title_en=item.get('EN_Title', 'Unknown'),
@@ -164,144 +528,329 @@ class AnimeAPI:
             premiered=item.get('Season', 'N/A'),
             creators=item.get('Creators', 'N/A'),
             duration=str(item.get('Duration', 'N/A')),
-            thumbnail=thumbnail_url,
+            thumbnail=item.get('Thumbnail', ''),
             title_romaji=item.get('EN_Title', ''),
             trailer=item.get('Trailer', ''),
-            yt_trailer=item.get('YTTrailer', '')
+            yt_trailer=item.get('YTTrailer', ''),
+            thumbnail_base=get_thumbnails_base(),
         )
 
-    def _paginate_requests(self, endpoint: str, limit: int, from_index: int, base_payload: dict) -> List[AnimeResult]:
-        all_results = []
-        current_from = from_index
-        
-        while len(all_results) < limit:
-            payload = base_payload.copy()
-            payload['From'] = str(current_from)
-            payload['Token'] = get_api_token()
-            
-            try:
-                response = requests.post(endpoint, data=payload, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-                
+    def _fetch_page(self, path: str, base_payload: dict, from_index: int):
+        payload = base_payload.copy()
+        payload['From'] = str(from_index)
+        return self._post_json(path, payload)
+
+    def _iter_pages(self, path: str, limit: int, from_index: int, base_payload: dict) -> Iterator[List[AnimeResult]]:
+        """Yield parsed, de-duplicated batches of results in page order.
+
+        A range the local catalog already holds (fresh) is served from it in one
+        batch. Otherwise the first page is fetched on its own to learn the page
+        size, and after that up to ``MAX_PAGE_WORKERS`` pages are requested
+        concurrently ahead of the consumer. Iteration stops at the first short,
+        empty or failed page.
+        """
+        batcher = PageBatcher(limit)
+
+        if limit <= 0:
+            return
+
+        if self.catalog is not None and base_payload.get('FilterType') != 'SEARCH':
+            local = self.catalog.get_list(path, base_payload, from_index, limit)
+            if local:
+                batch = batcher.take(local)
+                if batch:
+                    yield batch
+                return
+
+        try:
+            first_page = self._fetch_page(path, base_payload, from_index)
+        except Exception:
+            return
+        if not isinstance(first_page, list) or not first_page:
+            return
+
+        page_size = len(first_page)
+        batch = batcher.take(first_page)
+        if batch:
+            yield batch
+        if page_size < MIN_FULL_PAGE or batcher.produced >= limit:
+            return
+
+        workers = max(1, min(MAX_PAGE_WORKERS, -(-(limit - batcher.produced) // page_size)))
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="anime-pages")
+        pending = deque()
+        next_from = from_index + page_size
+
+        def submit_ahead():
+            nonlocal next_from
+            while len(pending) < workers and batcher.produced + len(pending) * page_size < limit:
+                pending.append(pool.submit(self._fetch_page, path, base_payload, next_from))
+                next_from += page_size
+
+        try:
+            submit_ahead()
+            while pending and batcher.produced < limit:
+                future = pending.popleft()
+                try:
+                    data = future.result()
+                except Exception:
+                    break
                 if not isinstance(data, list) or not data:
                     break
-                    
-                batch = [self._parse_anime_result(item) for item in data if isinstance(item, dict)]
-                all_results.extend(batch)
-                
-                if len(batch) < 10: 
+
+                batch = batcher.take(data)
+                if batch:
+                    yield batch
+                if len(data) < page_size:
                     break
-                    
-                current_from += len(batch)
-                
-            except Exception:
-                break
-                
+                submit_ahead()
+        finally:
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+    def _paginate_requests(self, path: str, limit: int, from_index: int, base_payload: dict) -> List[AnimeResult]:
+        all_results = []
+        for batch in self._iter_pages(path, limit, from_index, base_payload):
+            all_results.extend(batch)
         return all_results[:limit]
 
-    def get_anime_list(self, filter_type: str = "", filter_data: str = "", anime_type: str = "SERIES", from_index: int = 0, limit: int = 30) -> List[AnimeResult]:
-        endpoint = get_api_base() + "anime/load_anime_list_v2.php"
-        payload = {
+    @staticmethod
+    def anime_list_payload(filter_type: str, filter_data: str, anime_type: str) -> dict:
+        return {
             'UserId': '0',
             'Language': 'English',
             'FilterType': filter_type,
             'FilterData': filter_data,
             'Type': anime_type,
         }
-        return self._paginate_requests(endpoint, limit, from_index, payload)
 
-    def get_latest_anime(self, from_index: int = 0, limit: int = 30) -> List[AnimeResult]:
-        endpoint = get_api_base() + "anime/load_latest_anime.php"
-        payload = {
+    def iter_anime_list(self, filter_type: str = "", filter_data: str = "", anime_type: str = "SERIES", from_index: int = 0, limit: int = 30) -> Iterator[List[AnimeResult]]:
+        """Streaming form of get_anime_list: yields batches as pages arrive."""
+        payload = self.anime_list_payload(filter_type, filter_data, anime_type)
+        return self._iter_pages(ANIME_LIST_PATH, limit, from_index, payload)
+
+    def get_anime_list(self, filter_type: str = "", filter_data: str = "", anime_type: str = "SERIES", from_index: int = 0, limit: int = 30) -> List[AnimeResult]:
+        payload = self.anime_list_payload(filter_type, filter_data, anime_type)
+        return self._paginate_requests(ANIME_LIST_PATH, limit, from_index, payload)
+
+    @staticmethod
+    def latest_payload() -> dict:
+        return {
             'UserId': '0',
             'Language': 'English',
         }
-        return self._paginate_requests(endpoint, limit, from_index, payload)
 
-    def search_anime(self, query: str) -> List[AnimeResult]:
-        series_results = self.get_anime_list(filter_type="SEARCH", filter_data=query, anime_type="SERIES", limit=20)
-        movie_results = self.get_anime_list(filter_type="SEARCH", filter_data=query, anime_type="MOVIE", limit=20)
-        return series_results + movie_results
+    def get_latest_anime(self, from_index: int = 0, limit: int = 30) -> List[AnimeResult]:
+        return self._paginate_requests(LATEST_ANIME_PATH, limit, from_index, self.latest_payload())
+
+    def _latest_page(self, from_index: int) -> List[AnimeResult]:
+        """One whole page of the latest-anime list, as the server paginates it."""
+        data = self._fetch_page(LATEST_ANIME_PATH, self.latest_payload(), from_index)
+        if not isinstance(data, list):
+            return []
+        return [self._parse_anime_result(item) for item in data if isinstance(item, dict)]
+
+    def _search_branch(self, query: str, anime_type: str, limit: int):
+        start = time.perf_counter()
+        try:
+            results = self.get_anime_list(filter_type="SEARCH", filter_data=query, anime_type=anime_type, limit=limit)
+        except Exception:
+            results = []
+        return results, time.perf_counter() - start
+
+    def _iter_search_branches(self, query: str, types, limit: int):
+        """Run one search per anime type concurrently; yield (type, results, seconds) as each finishes."""
+        pool = ThreadPoolExecutor(max_workers=max(1, len(types)), thread_name_prefix="anime-search")
+        futures = {pool.submit(self._search_branch, query, anime_type, limit): anime_type for anime_type in types}
+        try:
+            for future in as_completed(futures):
+                results, elapsed = future.result()
+                yield futures[future], results, elapsed
+        finally:
+            for future in futures:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+    def iter_search(self, query: str, types=SEARCH_TYPES, limit: int = SEARCH_LIMIT) -> Iterator[SearchResults]:
+        """Search every anime type concurrently, yielding each branch as it finishes.
+
+        Confident hits from the local title index are yielded as the only batch
+        without touching the network. Otherwise every batch is ranked by
+        relevance to the query and holds only ids not seen in earlier batches.
+        Branches that found nothing are not yielded on their own; their timings
+        ride along with the next batch (or a final empty one), so every
+        branch's timing shows up exactly once.
+
+        The order across batches is provisional: a branch that finishes later
+        can hold a better match than everything already yielded. Once the
+        stream is exhausted, callers re-rank the whole list with
+        ``rank_search_results``, which is how search_anime ranks.
+        """
+        local = self._search_local(query, limit)
+        if local is not None:
+            yield local
+            return
+
+        seen_ids = set()
+        pending_timings = {}
+        for anime_type, results, elapsed in self._iter_search_branches(query, types, limit):
+            pending_timings[anime_type] = elapsed
+            batch = []
+            for result in results:
+                if result.id:
+                    if result.id in seen_ids:
+                        continue
+                    seen_ids.add(result.id)
+                batch.append(result)
+            if not batch:
+                continue
+            batch = rank_search_results(query, batch)
+            timings, pending_timings = pending_timings, {}
+            yield SearchResults(batch, timings)
+        if pending_timings:
+            yield SearchResults((), pending_timings)
+
+    def _search_local(self, query: str, limit: int) -> Optional[SearchResults]:
+        """Results from the offline title index, or None when it has no confident hit."""
+        if self.search_index is None:
+            return None
+        start = time.perf_counter()
+        try:
+            results, best = self.search_index.search(query, limit)
+        except Exception:
+            return None
+        if not results or not self.search_index.is_confident(best):
+            return None
+        return SearchResults(results, {'local': time.perf_counter() - start})
+
+    def search_anime(self, query: str, types=SEARCH_TYPES, limit: int = SEARCH_LIMIT) -> SearchResults:
+        local = self._search_local(query, limit)
+        if local is not None:
+            return local
+
+        by_type = {}
+        timings = {}
+        for anime_type, results, elapsed in self._iter_search_branches(query, types, limit):
+            by_type[anime_type] = results
+            timings[anime_type] = elapsed
+        return merge_search_results(query, types, by_type, timings)
 
     def get_trending_anime(self, from_index: int = 0, limit: int = 15) -> List[AnimeResult]:
-        fetch_limit = limit + from_index + 20
-        results = self.get_latest_anime(limit=fetch_limit)
-        results_with_pop = [r for r in results if r.popularity and r.popularity.isdigit()]
-        results_with_pop.sort(key=lambda x: int(x.popularity))
-        return results_with_pop[from_index:from_index + limit]
+        return self.trending.get(from_index, limit)
 
     def get_top_rated_anime(self, from_index: int = 0, limit: int = 15) -> List[AnimeResult]:
         return self.get_anime_list(filter_type="SORT", filter_data="HIGHEST_RATE", anime_type="SERIES", from_index=from_index, limit=limit)
 
-    def get_episodes(self, anime_id: str) -> List[Episode]:
-        endpoint = get_api_base() + "episodes/load_episodes.php"
+    def get_episodes(self, anime_id: str) -> EpisodeIndex:
         payload = {
             'AnimeID': anime_id,
-            'Token': get_api_token()
         }
         
         try:
-            response = requests.post(endpoint, data=payload, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = self._post_json(EPISODES_PATH, payload)
+            return self._parse_episodes(data)
+        except (requests.RequestException, ValueError, TypeError):
+            return EpisodeIndex()
+
+    def iter_episodes(self, anime_id: str) -> Iterator[Episode]:
+        """Episodes one by one, as they are parsed off the wire.
+
+        For callers that can show progress before a long series has finished
+        downloading. The response cache is used and filled as in get_episodes,
+        but concurrent calls aren't collapsed. A failure before the first
+        episode ends the iteration quietly, as get_episodes returns an empty
+        list; one after episodes were yielded is re-raised, so a cut-off list
+        is never mistaken for the whole series.
+        """
+        payload = {'AnimeID': anime_id}
+        host_down = network.is_host_down(get_api_base())
+        data, state = self.cache.get(EPISODES_PATH, payload, allow_expired=host_down)
+        if state is not None:
+            if state == STALE and not host_down:
+                self.cache.refresh_async(EPISODES_PATH, payload, lambda: self._fetch_valid_list(EPISODES_PATH, payload))
+            if isinstance(data, list):
+                for idx, item in enumerate(data, 1):
+                    episode = self._parse_episode(idx, item)
+                    if episode is not None:
+                        yield episode
+            return
+
+        items = []
+        try:
+            for idx, item in enumerate(self._stream_json_array(EPISODES_PATH, payload), 1):
+                items.append(item)
+                episode = self._parse_episode(idx, item)
+                if episode is not None:
+                    yield episode
+        except (requests.RequestException, ValueError, TypeError):
+            if items:
+                raise
+            return
+        self.cache.put(EPISODES_PATH, payload, items)
+
+    @staticmethod
+    def _parse_episodes(data) -> EpisodeIndex:
+        if not isinstance(data, list):
+            return EpisodeIndex()
+        
+        episodes = []
+        for idx, ep in enumerate(data, 1):
+            episode = AnimeAPI._parse_episode(idx, ep)
+            if episode is not None:
+                episodes.append(episode)
+        return EpisodeIndex(episodes)
+
+    @staticmethod
+    def _parse_episode(idx: int, ep) -> Optional[Episode]:
+        if not isinstance(ep, dict):
+            return None
             
-            if not isinstance(data, list):
-                return []
+        ep_num = ep.get('Episode', str(idx))
+        ep_type = ep.get('Type', 'Episode')
+        
+        if not ep_type or ep_type.strip() == "":
+            ep_type = "Episode"
             
-            episodes = []
-            for idx, ep in enumerate(data, 1):
-                if not isinstance(ep, dict):
-                    continue
-                    
-                ep_num = ep.get('Episode', str(idx))
-                ep_type = ep.get('Type', 'Episode')
-                
-                if not ep_type or ep_type.strip() == "":
-                    ep_type = "Episode"
-                    
-                try:
-                    display_num_str = str(ep_num)
-                    if '.' in display_num_str:
-                        display_num = float(display_num_str)
-                    else:
-                        display_num = int(float(display_num_str))
-                except (ValueError, TypeError):
-                    display_num = idx
-                episodes.append(Episode(ep_num, ep_type, display_num))
-            return episodes
-        except (requests.RequestException, ValueError, TypeError):
-            return []
+        try:
+            display_num_str = str(ep_num)
+            if '.' in display_num_str:
+                display_num = float(display_num_str)
+            else:
+                display_num = int(float(display_num_str))
+        except (ValueError, TypeError):
+            display_num = idx
+        return Episode(ep_num, ep_type, display_num)
 
     def get_streaming_servers(self, anime_id: str, episode_num: str, anime_type: str = 'SERIES') -> Optional[Dict]:
-        endpoint = get_api_base() + "anime/load_servers.php"
         payload = {
             'UserId': '0',
             'AnimeId': anime_id,
             'Episode': str(episode_num),
             'AnimeType': anime_type,
-            'Token': get_api_token()
         }
         
         try:
-            response = requests.post(endpoint, data=payload, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            return self.inflight.do(make_cache_key(SERVERS_PATH, payload), self._fetch_json, SERVERS_PATH, payload)
         except (requests.RequestException, ValueError, TypeError):
             return None
 
     def extract_mediafire_direct(self, mf_url: str) -> Optional[str]:
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(mf_url, headers=headers, timeout=10)
-            response.raise_for_status()
-            match = re.search(r'(https://download[^"]+)', response.text)
-            return match.group(1) if match else None
+            return self.inflight.do(make_cache_key('GET', {'url': mf_url}), self._fetch_mediafire_direct, mf_url)
         except (requests.RequestException, AttributeError):
             return None
 
+    @staticmethod
+    def _fetch_mediafire_direct(mf_url: str) -> Optional[str]:
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }
+        response = network.get(mf_url, headers=headers, timeout=10)
+        response.raise_for_status()
+        match = re.search(r'(https://download[^"]+)', response.text)
+        return match.group(1) if match else None
+
     def build_mediafire_url(self, server_id: str) -> str:
         if server_id.startswith('http'):
             return server_id
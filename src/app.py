@@ -1,24 +1,31 @@
 import sys
+import asyncio
 import atexit
 import re
 from pathlib import Path
+from types import SimpleNamespace
 from rich.align import Align
 from rich.panel import Panel
 from rich.text import Text
 from rich.prompt import Prompt
 from rich.box import HEAVY
 
-from .config import COLOR_PROMPT, COLOR_BORDER
 from .ui import UIManager
-from .api import AnimeAPI, get_trailers_base
+from .api import ANIME_LIST_PATH, LATEST_ANIME_PATH, AnimeAPI, get_trailers_base, rank_search_results, warm_credentials
+from .async_api import SyncAnimeAPI, get_runner
 from .monitoring import monitor
 from .player import PlayerManager
+from .prefetch import EpisodePrefetcher
+from .catalog import CatalogStore, CatalogSync
+from .search_index import TitleIndex
 from .discord_rpc import DiscordRPCManager
-from .models import QualityOption
-from .utils import download_file, flush_stdin
+from .models import Episode, EpisodeIndex, QualityOption
+from .download_manager import DownloadManager
+from .utils import download_file, flush_stdin, format_position
 from .history import HistoryManager
-from .settings import SettingsManager
+from .settings import get_settings
 from .favorites import FavoritesManager
+from .writebehind import flush_pending
 from .updater import check_for_updates, get_version_status
 from .deps import ensure_dependencies
 from .cli import run_simple_cli
@@ -29,16 +36,26 @@ import argparse
 class AniCliArApp:
     def __init__(self):
         self.ui = UIManager()
-        self.api = AnimeAPI()
+        self.catalog = CatalogStore()
+        self.search_index = TitleIndex(self.catalog)
+        # One event loop carries the API traffic, posters, prefetching and background jobs.
+        self.runner = get_runner()
+        self.api = SyncAnimeAPI(catalog=self.catalog, search_index=self.search_index, runner=self.runner)
+        self.catalog_sync = CatalogSync(self.api, self.catalog)
         self.rpc = DiscordRPCManager()
-        self.settings = SettingsManager()
+        self.settings = get_settings()
         self.player = PlayerManager(rpc_manager=self.rpc, console=self.ui.console)
         self.history = HistoryManager()
         self.favorites = FavoritesManager()
+        self.prefetcher = EpisodePrefetcher(self.api)
         self.version_info = None
         self.current_mode = "tui"
         self.force_cli = False
         self._cleaned_up = False
+        self.rpc_status = {'status': None}
+        # Toggled from the settings menu (or another instance); applied without a restart.
+        self.settings.subscribe('discord_rpc', self._on_discord_rpc_changed)
+        self.settings.subscribe('catalog_sync', self._on_catalog_sync_changed)
 
     def run(self):
         parser = argparse.ArgumentParser(
@@ -47,6 +64,7 @@ class AniCliArApp:
         )
         parser.add_argument('-i', '--interactive', action='store_true', help="Force minimal interactive CLI mode")
         parser.add_argument('-v', '--version', action='store_true', help="Show version information")
+        parser.add_argument('--resume-downloads', action='store_true', help="Finish queued batch downloads, then exit")
         parser.add_argument('query', nargs='*', help="Anime name to search for")
         
         args = parser.parse_args()
@@ -65,32 +83,39 @@ class AniCliArApp:
             sys.exit(1)
         
         atexit.register(self.cleanup)
+
+        if args.resume_downloads:
+            try:
+                self.run_download_queue()
+            except KeyboardInterrupt:
+                pass
+            return
         
-        import threading
-        rpc_connected = {'status': None}
+        def warm_up_bg():
+            warm_credentials()
+            self.search_index.build()
+            if self.settings.get('catalog_sync'):
+                self._start_catalog_sync()
+        self.runner.submit_blocking(warm_up_bg)
         
         if self.settings.get('discord_rpc'):
-            def connect_rpc():
-                rpc_connected['status'] = self.rpc.connect()
-            threading.Thread(target=connect_rpc, daemon=True).start()
+            self._connect_rpc()
         
-        threading.Thread(target=lambda: monitor.track_app_start(), daemon=True).start()
+        self.runner.submit_blocking(monitor.track_app_start)
         
         def check_updates_bg():
             try:
                 check_for_updates(auto_update=True)
             except Exception:
                 pass
-        threading.Thread(target=check_updates_bg, daemon=True).start()
+        self.runner.submit_blocking(check_updates_bg)
         
         def check_version_bg():
             try:
                 self.version_info = get_version_status()
             except Exception:
                 pass
-        threading.Thread(target=check_version_bg, daemon=True).start()
-        
-        self.rpc_status = rpc_connected
+        self.runner.submit_blocking(check_version_bg)
 
         try:
             self.unified_loop(initial_query)
@@ -101,6 +126,31 @@ class AniCliArApp:
         finally:
             self.cleanup()
 
+    def _connect_rpc(self):
+        self.rpc_status['status'] = None
+
+        def connect_rpc():
+            self.rpc_status['status'] = self.rpc.connect()
+        self.runner.submit_blocking(connect_rpc)
+
+    def _on_discord_rpc_changed(self, enabled):
+        if enabled:
+            if not self.rpc.connected:
+                self._connect_rpc()
+        else:
+            self.rpc.disconnect()
+            self.rpc_status['status'] = None
+
+    def _on_catalog_sync_changed(self, enabled):
+        target = self._start_catalog_sync if enabled else self.catalog_sync.stop
+        self.runner.submit_blocking(target)
+
+    def _start_catalog_sync(self):
+        # Seed the lists every session opens with; browsed genres and studios join on their own.
+        self.catalog.register_list(LATEST_ANIME_PATH, AnimeAPI.latest_payload())
+        self.catalog.register_list(ANIME_LIST_PATH, AnimeAPI.anime_list_payload("SORT", "HIGHEST_RATE", "SERIES"))
+        self.catalog_sync.start()
+
     def unified_loop(self, query=None):
         while True:
             is_narrow = shutil.get_terminal_size().columns < 80
@@ -175,12 +225,12 @@ class AniCliArApp:
             keybinds_panel = Panel(
                 Text("T: Trending | P: Popular | G: Genres | S: Studios | D: 💖 Donate | L: History | F: Favorites | C: Settings | Q: Quit", style="info", justify="center"),
                 box=HEAVY,
-                border_style=COLOR_BORDER
+                border_style="panel.border"
             )
             self.ui.print(Align.center(keybinds_panel))
             self.ui.print()
             
-            prompt_string = f" {Text('›', style=COLOR_PROMPT)} "
+            prompt_string = f" {Text('›', style='prompt.prompt')} "
             pad_width = (self.ui.console.width - 30) // 2
             padding = " " * max(0, pad_width)
             
@@ -213,16 +263,12 @@ class AniCliArApp:
                     continue
             elif query == 'p':
                 self.rpc.update_popular()
-                results = self.ui.run_with_loading(
-                    "Fetching popular anime...",
-                    self.api.get_top_rated_anime,
-                    0,
-                    15
-                )
+                batches = self.api.iter_anime_list("SORT", "HIGHEST_RATE", "SERIES", 0, 15)
+                results = self._load_first_batch("Fetching popular anime...", batches)
                 if results:
                     def load_more_popular(current_count):
                         return self.api.get_top_rated_anime(current_count, 15)
-                    self.handle_anime_selection_with_lazy_load(results, load_more_popular)
+                    self.handle_anime_selection_with_lazy_load(results, load_more_popular, results_stream=batches)
                     continue
             elif query == 'g':
                 self.rpc.update_genres()
@@ -252,9 +298,19 @@ class AniCliArApp:
             elif query == 'a':
                 self.ui.show_credits()
                 continue
+            elif query == 'x':
+                self.ui.diagnostics_menu(catalog_status=self.catalog_sync.status)
+                continue
             elif query:
                 self.rpc.update_searching()
-                results = self.ui.run_with_loading("Searching...", self.api.search_anime, query)
+                batches = self.api.iter_search(query)
+                results = self._load_first_batch("Searching...", batches)
+                if results:
+                    self.handle_anime_selection_with_lazy_load(
+                        list(results), None, results_stream=batches,
+                        rerank=lambda items: rank_search_results(query, items)
+                    )
+                    continue
             else:
                 continue
             
@@ -268,9 +324,19 @@ class AniCliArApp:
             
             self.handle_anime_selection(results)
 
-    def handle_anime_selection_with_lazy_load(self, results, load_more_callback):
+    def _load_first_batch(self, message, batches):
+        """Wait only for the first page of a streamed list; the menu consumes the rest."""
+        return self.ui.run_with_loading(message, next, batches, [])
+
+    def handle_anime_selection_with_lazy_load(self, results, load_more_callback, results_stream=None, rerank=None):
         while True:
-            anime_idx = self.ui.anime_selection_menu(results, load_more_callback=load_more_callback)
+            anime_idx = self.ui.anime_selection_menu(
+                results,
+                load_more_callback=load_more_callback,
+                results_stream=results_stream,
+                rerank=rerank
+            )
+            results_stream = None
             
             if anime_idx == -1:
                 sys.exit(0)
@@ -306,19 +372,12 @@ class AniCliArApp:
         
         selected_genre = self.ui.selection_menu(genres, title="Select Genre")
         if selected_genre:
-            results = self.ui.run_with_loading(
-                f"Fetching {selected_genre} anime...",
-                self.api.get_anime_list,
-                "GENRE",
-                selected_genre,
-                "SERIES",
-                0,
-                15
-            )
+            batches = self.api.iter_anime_list("GENRE", selected_genre, "SERIES", 0, 15)
+            results = self._load_first_batch(f"Fetching {selected_genre} anime...", batches)
             if results:
                 def load_more_genre(current_count):
                     return self.api.get_anime_list("GENRE", selected_genre, "SERIES", current_count, 15)
-                self.handle_anime_selection_with_lazy_load(results, load_more_genre)
+                self.handle_anime_selection_with_lazy_load(results, load_more_genre, results_stream=batches)
             else:
                 self.ui.render_message("Info", f"No anime found for genre: {selected_genre}", "info")
 
@@ -334,19 +393,12 @@ class AniCliArApp:
         
         selected_studio = self.ui.selection_menu(studios, title="Select Studio")
         if selected_studio:
-            results = self.ui.run_with_loading(
-                f"Fetching {selected_studio} anime...",
-                self.api.get_anime_list,
-                "STUDIOS",
-                selected_studio,
-                "SERIES",
-                0,
-                15
-            )
+            batches = self.api.iter_anime_list("STUDIOS", selected_studio, "SERIES", 0, 15)
+            results = self._load_first_batch(f"Fetching {selected_studio} anime...", batches)
             if results:
                 def load_more_studio(current_count):
                     return self.api.get_anime_list("STUDIOS", selected_studio, "SERIES", current_count, 15)
-                self.handle_anime_selection_with_lazy_load(results, load_more_studio)
+                self.handle_anime_selection_with_lazy_load(results, load_more_studio, results_stream=batches)
             else:
                 self.ui.render_message("Info", f"No anime found for studio: {selected_studio}", "info")
 
@@ -368,45 +420,28 @@ class AniCliArApp:
             history_items = self.history.get_history()
 
     def _find_episode_index(self, episodes, episode_value):
-        if episode_value is None:
-            return 0
-
-        target_raw = str(episode_value).strip()
-        if not target_raw:
-            return 0
-
-        for idx, ep in enumerate(episodes):
-            if str(ep.display_num) == target_raw or str(ep.number) == target_raw:
-                return idx
-
-        try:
-            target_float = float(target_raw)
-            for idx, ep in enumerate(episodes):
-                try:
-                    if float(ep.display_num) == target_float:
-                        return idx
-                except (TypeError, ValueError):
-                    continue
-        except (TypeError, ValueError):
-            pass
-
-        return 0
+        if not isinstance(episodes, EpisodeIndex):
+            episodes = EpisodeIndex(episodes)
+        idx = episodes.find(episode_value)
+        return 0 if idx is None else idx
 
     def resume_anime(self, history_item):
-        results = self.ui.run_with_loading("Resuming...", self.api.search_anime, history_item['title'])
-        if not results:
-            self.ui.render_message("Error", "Could not find anime details.", "error")
-            return
-
         target_anime_id = str(history_item.get('anime_id') or history_item.get('id') or "")
-        selected_anime = None
-        for res in results:
-            if target_anime_id and str(res.id) == target_anime_id:
-                selected_anime = res
-                break
-        
+        selected_anime = self.catalog.get_anime(target_anime_id)
+
         if not selected_anime:
-            selected_anime = results[0] # Fallback
+            results = self.ui.run_with_loading("Resuming...", self.api.search_anime, history_item['title'])
+            if not results:
+                self.ui.render_message("Error", "Could not find anime details.", "error")
+                return
+
+            for res in results:
+                if target_anime_id and str(res.id) == target_anime_id:
+                    selected_anime = res
+                    break
+            
+            if not selected_anime:
+                selected_anime = results[0] # Fallback
 
         self.rpc.update_viewing_anime(selected_anime.title_en, selected_anime.thumbnail)
         episodes = self.api.get_episodes(selected_anime.id)
@@ -471,18 +506,38 @@ class AniCliArApp:
     
 
     def _fetch_episodes_and_poster(self, selected_anime):
-        eps = self.api.get_episodes(selected_anime.id)
+        poster_height = None
         if selected_anime.thumbnail:
             screen_height = self.ui.console.height
             target_height = min(screen_height, 35)
-            poster_height = target_height - 8
-            if poster_height > 0:
-                self.ui._generate_poster_ansi(selected_anime.thumbnail, poster_height)
+            if target_height - 8 > 0 and not self.ui.has_cached_poster(selected_anime.thumbnail, target_height - 8):
+                poster_height = target_height - 8
+        return self.runner.run(self._load_episodes_and_poster(selected_anime, poster_height))
+
+    async def _load_episodes_and_poster(self, selected_anime, poster_height):
+        # Fetch and render the poster while the episode list loads.
+        poster = None
+        if poster_height:
+            poster = asyncio.ensure_future(self._load_poster(selected_anime.thumbnail, poster_height))
+        eps = await self.api.aio.get_episodes(selected_anime.id)
+        if poster is not None:
+            await asyncio.wait([poster])
         return eps
 
+    async def _load_poster(self, url, max_height):
+        client = self.api.aio.client
+        cache = self.ui.poster_cache
+        if not cache.has_image(url) and not cache.recently_failed(url):
+            try:
+                await client.run_blocking(cache.add_image, url, await client.get_bytes(url, timeout=5))
+            except Exception:
+                cache.mark_failed(url)
+        # Decoding and ANSI rendering are CPU work; keep them off the loop.
+        await client.run_blocking(self.ui._generate_poster_ansi, url, max_height)
+
     def play_trailer(self, anime):
-        import requests
-        
+        from . import network
+
         trailer_url = None
         
         if anime.trailer and anime.trailer not in ["N/A", "None", None, ""]:
@@ -492,7 +547,7 @@ class AniCliArApp:
                 trailer_url = get_trailers_base() + anime.trailer
             
             try:
-                check = requests.head(trailer_url, timeout=5)
+                check = network.head(trailer_url, timeout=5)
                 if check.status_code == 404:
                     trailer_url = None
             except Exception:
@@ -506,7 +561,7 @@ class AniCliArApp:
         
         if not trailer_url and anime.mal_id and anime.mal_id not in ["0", "N/A", "None", None, ""]:
             try:
-                jikan_response = requests.get(
+                jikan_response = network.get(
                     f"https://api.jikan.moe/v4/anime/{anime.mal_id}",
                     timeout=10
                 )
@@ -539,7 +594,7 @@ class AniCliArApp:
             Align.center(message_text, vertical="middle"),
             title=Text("Trailer", style="title"),
             box=HEAVY,
-            border_style=COLOR_BORDER,
+            border_style="panel.border",
             padding=(2, 6),
             width=60
         )
@@ -548,11 +603,34 @@ class AniCliArApp:
         
         self.player.play(trailer_url, f"Trailer - {anime.title_en}")
 
+    def _load_servers(self, selected_anime, selected_ep):
+        # Prefetched server lists are served without a spinner.
+        if self.prefetcher.has_servers(selected_anime.id, selected_ep.number):
+            return self.prefetcher.get_servers(selected_anime.id, selected_ep.number, selected_anime.type)
+        return self.ui.run_with_loading(
+            "Loading servers...",
+            self.prefetcher.get_servers,
+            selected_anime.id,
+            selected_ep.number,
+            selected_anime.type
+        )
+
+    def _load_direct_link(self, mediafire_url):
+        if self.prefetcher.has_direct_link(mediafire_url):
+            return self.prefetcher.get_direct_link(mediafire_url)
+        return self.ui.run_with_loading(
+            "Extracting direct link...",
+            self.prefetcher.get_direct_link,
+            mediafire_url
+        )
+
     def handle_episode_selection(self, selected_anime, episodes, initial_idx=0):
         current_idx = max(0, min(int(initial_idx or 0), len(episodes) - 1))
+        self.prefetcher.focus(selected_anime.id)
         
         while True:
             last_watched = self.history.get_last_watched(selected_anime.id)
+            watched_episodes = self.history.get_watched_episodes(selected_anime.id)
             is_fav = self.favorites.is_favorite(selected_anime.id)
             default_download_quality = self._get_default_download_quality()
             download_mode = self._get_download_mode()
@@ -577,6 +655,7 @@ class AniCliArApp:
                 self.rpc, 
                 selected_anime.thumbnail,
                 last_watched_ep=last_watched,
+                watched_episodes=watched_episodes,
                 is_favorite=is_fav,
                 anime_details=anime_details,
                 default_download_quality=default_download_quality,
@@ -588,6 +667,7 @@ class AniCliArApp:
             if ep_idx == -1:
                 sys.exit(0)
             elif ep_idx is None:
+                self.prefetcher.cancel()
                 self.rpc.update_browsing()
                 return True
             elif isinstance(ep_idx, tuple) and ep_idx[0] == 'download_current':
@@ -613,13 +693,7 @@ class AniCliArApp:
             while True:
                 selected_ep = episodes[current_idx]
                 
-                server_data = self.ui.run_with_loading(
-                    "Loading servers...",
-                    self.api.get_streaming_servers,
-                    selected_anime.id, 
-                    selected_ep.number,
-                    selected_anime.type
-                )
+                server_data = self._load_servers(selected_anime, selected_ep)
                 
                 if not server_data:
                     self.ui.render_message(
@@ -629,7 +703,7 @@ class AniCliArApp:
                     )
                     break
                 
-                action_taken = self.handle_quality_selection(selected_anime, selected_ep, server_data)
+                action_taken = self.handle_quality_selection(selected_anime, selected_ep, server_data, episodes, current_idx)
                 
                 if action_taken == "watch":
                     auto_next = self.settings.get('auto_next')
@@ -701,15 +775,9 @@ class AniCliArApp:
 
     def resolve_default_download_target(self, selected_anime, selected_ep, show_loading=False):
         if show_loading:
-            server_data = self.ui.run_with_loading(
-                "Loading servers...",
-                self.api.get_streaming_servers,
-                selected_anime.id,
-                selected_ep.number,
-                selected_anime.type
-            )
+            server_data = self._load_servers(selected_anime, selected_ep)
         else:
-            server_data = self.api.get_streaming_servers(selected_anime.id, selected_ep.number, selected_anime.type)
+            server_data = self.prefetcher.get_servers(selected_anime.id, selected_ep.number, selected_anime.type)
 
         if not server_data:
             return None, None, "No servers found for this episode."
@@ -725,13 +793,9 @@ class AniCliArApp:
 
         mediafire_url = self.api.build_mediafire_url(server_id)
         if show_loading:
-            direct_url = self.ui.run_with_loading(
-                "Extracting direct link...",
-                self.api.extract_mediafire_direct,
-                mediafire_url
-            )
+            direct_url = self._load_direct_link(mediafire_url)
         else:
-            direct_url = self.api.extract_mediafire_direct(mediafire_url)
+            direct_url = self.prefetcher.get_direct_link(mediafire_url)
 
         if not direct_url:
             return None, None, "Failed to extract direct link from MediaFire."
@@ -752,7 +816,9 @@ class AniCliArApp:
             filename,
             self.ui.console,
             mode=self._get_download_mode(),
-            download_dir=self._get_download_directory()
+            download_dir=self._get_download_directory(),
+            connections=self.settings.get('download_connections'),
+            source_url=self.prefetcher.source_for(direct_url)
         )
 
         if success:
@@ -760,11 +826,74 @@ class AniCliArApp:
 
         return success
 
+    def _resolve_download_job(self, job):
+        # Queued jobs may come from an earlier session, so rebuild just what the resolver reads.
+        anime = SimpleNamespace(id=job.anime_id, type=job.anime_type, title_en=job.anime_title)
+        episode = Episode(number=job.episode_number, type="", display_num=job.display_num)
+        direct_url, filename, error = self.resolve_default_download_target(anime, episode, show_loading=False)
+        source_url = self.prefetcher.source_for(direct_url) if direct_url else None
+        return direct_url, filename, source_url, error
+
+    def _get_download_manager(self):
+        bandwidth_kib = self.settings.get('download_bandwidth_limit') or 0
+        return DownloadManager(
+            self._resolve_download_job,
+            self._get_download_directory(),
+            concurrency=self.settings.get('download_concurrency'),
+            connections=self.settings.get('download_connections'),
+            bandwidth_limit=float(bandwidth_kib) * 1024,
+            on_complete=lambda job: self.history.mark_watched(job.anime_id, job.display_num, job.anime_title)
+        )
+
+    def run_download_queue(self):
+        """Work through the persistent download queue, including jobs left from earlier runs."""
+        manager = self._get_download_manager()
+        pending = manager.pending_count()
+        if not pending:
+            return 0, 0
+
+        completed, failed = manager.run(self.ui.console)
+        remaining = manager.pending_count()
+
+        summary_style = "error" if completed == 0 else "info"
+        summary_message = f"Completed: {completed}"
+        if failed:
+            summary_message += f" | Failed: {failed}"
+        if remaining:
+            summary_message += f" | Paused: {remaining}"
+
+        self.ui.render_timed_message(
+            "Batch Download Finished",
+            summary_message,
+            summary_style,
+            duration=1.6
+        )
+        return completed, failed
+
     def handle_batch_download(self, selected_anime, episodes):
         selected_indices = self.ui.batch_selection_menu(episodes)
         if not selected_indices:
             return
 
+        if self._get_download_mode() != "internal":
+            # External tools (IDM, aria2c) keep their own queues; hand episodes over one by one.
+            self._batch_download_external(selected_anime, episodes, selected_indices)
+            return
+
+        manager = self._get_download_manager()
+        for idx in selected_indices:
+            ep = episodes[idx]
+            manager.enqueue(selected_anime.id, selected_anime.title_en, selected_anime.type, ep.number, ep.display_num)
+
+        self.ui.render_timed_message(
+            "Batch Download",
+            f"Preparing {manager.pending_count()} episode(s) for download...",
+            "info",
+            duration=1.0
+        )
+        self.run_download_queue()
+
+    def _batch_download_external(self, selected_anime, episodes, selected_indices):
         self.ui.render_timed_message(
             "Batch Download",
             f"Preparing {len(selected_indices)} episode(s) for download...",
@@ -789,7 +918,9 @@ class AniCliArApp:
                 filename,
                 self.ui.console,
                 mode=download_mode,
-                download_dir=download_directory
+                download_dir=download_directory,
+                connections=self.settings.get('download_connections'),
+                source_url=self.prefetcher.source_for(direct_url)
             )
             if success:
                 success_count += 1
@@ -809,7 +940,7 @@ class AniCliArApp:
             duration=1.6
         )
 
-    def handle_quality_selection(self, selected_anime, selected_ep, server_data):
+    def handle_quality_selection(self, selected_anime, selected_ep, server_data, episodes=None, current_idx=None):
         current_ep_data = server_data.get('CurrentEpisode', {})
         qualities = [
             QualityOption("SD • 480p (Low Quality)", 'FRLowQ', "info"),
@@ -844,11 +975,8 @@ class AniCliArApp:
         quality = available[idx]
         server_id = current_ep_data.get(quality.server_key)
         
-        direct_url = self.ui.run_with_loading(
-            "Extracting direct link...",
-            self.api.extract_mediafire_direct,
-            self.api.build_mediafire_url(server_id)
-        )
+        mediafire_url = self.api.build_mediafire_url(server_id)
+        direct_url = self._load_direct_link(mediafire_url)
         
         if direct_url:
             quality_match = re.search(r"\b(\d{3,4}p)\b", quality.name)
@@ -861,7 +989,9 @@ class AniCliArApp:
                     filename,
                     self.ui.console,
                     mode=self._get_download_mode(),
-                    download_dir=self._get_download_directory()
+                    download_dir=self._get_download_directory(),
+                    connections=self.settings.get('download_connections'),
+                    source_url=mediafire_url
                 )
                 if success:
                     self.history.mark_watched(selected_anime.id, selected_ep.display_num, selected_anime.title_en)
@@ -874,21 +1004,24 @@ class AniCliArApp:
                 from rich.panel import Panel
                 from rich.align import Align
                 from rich.box import HEAVY
-                from .config import COLOR_BORDER, COLOR_TITLE
+                from .config import theme_color
                 
                 watching_text = Text()
-                watching_text.append("▶ ", style=COLOR_TITLE + " blink")
+                watching_text.append("▶ ", style=theme_color("title") + " blink")
                 watching_text.append(selected_anime.title_en, style="bold")
                 watching_text.append("\nEpisode ", style="secondary")
-                watching_text.append(str(selected_ep.display_num), style=COLOR_TITLE + " bold")
-                watching_text.append(" ◀", style=COLOR_TITLE + " blink")
+                watching_text.append(str(selected_ep.display_num), style=theme_color("title") + " bold")
+                watching_text.append(" ◀", style=theme_color("title") + " blink")
                 watching_text.append(f"\n\n{quality.name}", style="dim")
+                resume_at = self.history.get_resume_position(selected_anime.id, selected_ep.display_num)
+                if resume_at:
+                    watching_text.append(f"\nResuming at {format_position(resume_at)}", style="dim")
                 
                 watching_panel = Panel(
                     Align.center(watching_text, vertical="middle"),
-                    title=Text("NOW PLAYING", style=COLOR_TITLE + " bold"),
+                    title=Text("NOW PLAYING", style=theme_color("title") + " bold"),
                     box=HEAVY,
-                    border_style=COLOR_BORDER,
+                    border_style="panel.border",
                     padding=(2, 4),
                     width=60
                 )
@@ -900,9 +1033,18 @@ class AniCliArApp:
                 
                 monitor.track_video_play(selected_anime.title_en, str(selected_ep.display_num))
                 
-                self.player.play(direct_url, f"{selected_anime.title_en} - Ep {selected_ep.display_num} ({quality.name})", player_type=player_type)
+                if episodes is not None and current_idx is not None:
+                    # Resolve the next episodes while this one plays.
+                    self.prefetcher.prefetch_after(selected_anime, episodes, current_idx, quality.server_key)
+                
+                progress = self.player.play(
+                    direct_url,
+                    f"{selected_anime.title_en} - Ep {selected_ep.display_num} ({quality.name})",
+                    player_type=player_type,
+                    start=resume_at
+                )
                 self.ui.clear()
-                self.history.mark_watched(selected_anime.id, selected_ep.display_num, selected_anime.title_en)
+                self._record_playback(selected_anime.id, selected_ep.display_num, selected_anime.title_en, progress)
                 self.rpc.update_selecting_episode(selected_anime.title_en, selected_anime.thumbnail)
                 return "watch"
         else:
@@ -913,6 +1055,15 @@ class AniCliArApp:
             )
             return None
 
+    def _record_playback(self, anime_id, episode_num, anime_title, progress):
+        if progress is None:
+            self.history.mark_watched(anime_id, episode_num, anime_title)
+        else:
+            self.history.mark_watched(
+                anime_id, episode_num, anime_title,
+                position=progress.position, duration=progress.duration, completed=progress.completed
+            )
+
     def handle_exit(self):
         self.ui.clear()
         
@@ -921,7 +1072,7 @@ class AniCliArApp:
             title=Text("EXIT", style="title"),
             box=HEAVY,
             padding=1,
-            border_style=COLOR_BORDER
+            border_style="panel.border"
         )
         
         self.ui.print(Align.center(panel, vertical="middle", height=self.ui.console.height))
@@ -935,7 +1086,7 @@ class AniCliArApp:
             title=Text("CRITICAL ERROR", style="title"),
             box=HEAVY,
             padding=1,
-            border_style=COLOR_BORDER
+            border_style="panel.border"
         )
         
         self.ui.print(Align.center(panel, vertical="middle", height=self.ui.console.height))
@@ -955,14 +1106,33 @@ class AniCliArApp:
             self.player.cleanup_temp_mpv()
         except Exception:
             pass
+
+        try:
+            self.prefetcher.shutdown()
+        except Exception:
+            pass
+
+        try:
+            self.api.close()
+        except Exception:
+            pass
+
+        try:
+            self.catalog_sync.stop()
+        except Exception:
+            pass
+
+        try:
+            # Write out history/favorites changes still held by the write-behind buffer.
+            flush_pending()
+        except Exception:
+            pass
         
         # Only show TUI goodbye if we are NOT in CLI mode
         if self.current_mode != "cli":
             self.ui.clear()
-            from .config import COLOR_ASCII
-            
             self.ui.print("\n" * 2)
-            self.ui.print(Align.center(Text(GOODBYE_ART, style=COLOR_ASCII)))
+            self.ui.print(Align.center(Text(GOODBYE_ART, style="ascii")))
             self.ui.print("\n")
 
 
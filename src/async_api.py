@@ -0,0 +1,546 @@
+import asyncio
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+from . import jsonstream, network
+from .api import (ANIME_LIST_PATH, AUTH_FAILURE_STATUSES, EPISODES_PATH, LATEST_ANIME_PATH, MAX_PAGE_WORKERS,
+                  MIN_FULL_PAGE, SEARCH_LIMIT, SEARCH_TYPES, SERVERS_PATH, AnimeAPI, PageBatcher, get_api_base,
+                  get_api_token, merge_search_results, refresh_credentials, register_flight_group, store_in_catalog)
+from .cache import FRESH, STALE, get_response_cache, make_cache_key
+from .health import health
+from .models import AnimeResult, EpisodeIndex, SearchResults
+
+# asyncio counterpart of AnimeAPI, and the event loop the app runs it on.
+# With httpx installed every request goes through one AsyncClient and its
+# keep-alive pool. Without it, the blocking pooled session from network.py is
+# driven from a small shared executor, so the async surface works either way.
+#
+# One loop thread serves the whole process (get_runner()): pagination, search
+# fan-out, episode lists, posters and prefetching are tasks on it. Blocking
+# UI work (spinners, menus loading more rows, startup chores) is submitted to
+# the loop's job executor instead of getting a thread of its own.
+
+MAX_CONNECTIONS = 16
+MAX_KEEPALIVE = 16
+FALLBACK_WORKERS = 8
+JOB_WORKERS = 8
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code: int, url: str):
+        super().__init__(f"HTTP {status_code} for {url}")
+        self.status_code = status_code
+        self.url = url
+
+
+class AsyncHTTPClient:
+    """Minimal async HTTP client: httpx when available, pooled threads otherwise.
+
+    httpx requests go through the same per-host circuit breaker as
+    ``network.request``; the fallback gets it from network.py itself.
+    """
+
+    def __init__(self, timeout: float = 10):
+        self.timeout = timeout
+        self._client = None
+        self._executor = None
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={'User-Agent': network.USER_AGENT},
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE),
+            )
+        return self._client
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=FALLBACK_WORKERS, thread_name_prefix="async-http")
+        return self._executor
+
+    async def _blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), lambda: func(*args, **kwargs))
+
+    async def _request(self, method: str, url: str, read, **kwargs):
+        """Send an httpx request and ``read(response)``, recording the outcome in the host's health."""
+        host = network._host_key(url)
+        health.before_request(host)
+        start = time.perf_counter()
+        try:
+            async with self._get_client().stream(method, url, **kwargs) as response:
+                if response.status_code >= 500:
+                    health.record_failure(host, f"HTTP {response.status_code}")
+                    raise HTTPError(response.status_code, url)
+                health.record_success(host, time.perf_counter() - start)
+                if response.status_code >= 400:
+                    raise HTTPError(response.status_code, url)
+                return await read(response)
+        except httpx.TransportError as e:
+            health.record_failure(host, type(e).__name__)
+            raise
+
+    async def post_json(self, url: str, data: dict):
+        if HTTPX_AVAILABLE:
+            async def read(response):
+                parser = jsonstream.ArrayStreamParser()
+                items = []
+                async for chunk in response.aiter_bytes(jsonstream.STREAM_CHUNK_SIZE):
+                    items.extend(parser.feed(chunk))
+                document = parser.close()
+                return items if parser.is_array else document
+            return await self._request('POST', url, read, data=data)
+
+        def fetch():
+            response = network.post(url, data=data, timeout=self.timeout, stream=True, adaptive_timeout=True, retry_post=True)
+            with closing(response):
+                if response.status_code >= 400:
+                    raise HTTPError(response.status_code, url)
+                return jsonstream.load_chunks(response.iter_content(jsonstream.STREAM_CHUNK_SIZE))
+        return await self._blocking(fetch)
+
+    async def get_text(self, url: str, headers: Optional[dict] = None) -> str:
+        if HTTPX_AVAILABLE:
+            async def read(response):
+                await response.aread()
+                return response.text
+            return await self._request('GET', url, read, headers=headers)
+
+        def fetch():
+            response = network.get(url, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+            return response.text
+        return await self._blocking(fetch)
+
+    async def get_bytes(self, url: str, timeout: Optional[float] = None) -> bytes:
+        timeout = timeout or self.timeout
+        if HTTPX_AVAILABLE:
+            async def read(response):
+                return await response.aread()
+            return await self._request('GET', url, read, timeout=timeout)
+
+        def fetch():
+            response = network.get(url, timeout=timeout)
+            response.raise_for_status()
+            return response.content
+        return await self._blocking(fetch)
+
+    async def run_blocking(self, func, *args):
+        """Run a blocking helper (credential lookup, disk cache) off the event loop."""
+        return await self._blocking(func, *args)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class AsyncSingleFlight:
+    """asyncio twin of api.SingleFlight. Only touched from the loop, so it needs no lock.
+
+    The shared call is shielded: a caller that gets cancelled (say, a page
+    window being abandoned) leaves it running for the others and the cache.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._counters = {'calls': 0, 'executed': 0, 'collapsed': 0}
+
+    async def do(self, key: str, func, *args):
+        self._counters['calls'] += 1
+        task = self._calls.get(key)
+        if task is not None:
+            self._counters['collapsed'] += 1
+        else:
+            self._counters['executed'] += 1
+            task = self._calls[key] = asyncio.ensure_future(func(*args))
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Retrieved here so a failure nobody is waiting for anymore isn't logged.
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        result = dict(self._counters)
+        result['in_flight'] = len(self._calls)
+        return result
+
+
+# Shared by every AsyncAnimeAPI (there is one loop), reported by api.get_coalescing_stats().
+_inflight = AsyncSingleFlight()
+register_flight_group(_inflight)
+
+
+class AsyncAnimeAPI:
+    """Same surface as AnimeAPI, as coroutines sharing one connection pool, response cache and catalog."""
+
+    def __init__(self, cache=None, client: Optional[AsyncHTTPClient] = None, catalog=None,
+                 inflight: Optional[AsyncSingleFlight] = None):
+        self.cache = cache if cache is not None else get_response_cache()
+        self.client = client or AsyncHTTPClient()
+        self.catalog = catalog
+        self.inflight = inflight if inflight is not None else _inflight
+        self._refreshing = set()
+
+    async def _fetch_json(self, path: str, payload: dict):
+        base, token = await self.client.run_blocking(lambda: (get_api_base(), get_api_token()))
+        try:
+            return await self._send(base + path, payload, token)
+        except HTTPError as e:
+            if e.status_code not in AUTH_FAILURE_STATUSES:
+                raise
+            if not await self.client.run_blocking(refresh_credentials, token):
+                raise
+        base, token = await self.client.run_blocking(lambda: (get_api_base(), get_api_token()))
+        return await self._send(base + path, payload, token)
+
+    async def _send(self, url: str, payload: dict, token: str):
+        request_payload = dict(payload)
+        request_payload['Token'] = token
+        return await self.client.post_json(url, request_payload)
+
+    async def _post_json(self, path: str, payload: dict):
+        """As AnimeAPI._post_json: cache first, stale entries refreshed behind the caller."""
+        host_down = network.is_host_down(await self.client.run_blocking(get_api_base))
+        data, state = await self.client.run_blocking(
+            lambda: self.cache.get(path, payload, allow_expired=host_down)
+        )
+        if state == FRESH:
+            return data
+        if state == STALE:
+            if not host_down:
+                self._refresh_in_background(path, payload)
+            return data
+
+        return await self.fetch_list_page(path, payload)
+
+    async def fetch_list_page(self, path: str, payload: dict):
+        """Fetch one list page from the network (never the response cache), updating the cache."""
+        return await self.inflight.do(make_cache_key(path, payload), self._fetch_and_store, path, payload)
+
+    async def _fetch_and_store(self, path: str, payload: dict):
+        data = await self._fetch_json(path, payload)
+        if isinstance(data, list):
+            await self.client.run_blocking(self.cache.put, path, payload, data)
+            if self.catalog is not None and path in (ANIME_LIST_PATH, LATEST_ANIME_PATH):
+                await self.client.run_blocking(store_in_catalog, self.catalog, path, payload, data)
+        return data
+
+    def _refresh_in_background(self, path: str, payload: dict) -> None:
+        key = make_cache_key(path, payload)
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                await self.fetch_list_page(path, payload)
+            except Exception:
+                pass
+            finally:
+                self._refreshing.discard(key)
+
+        asyncio.ensure_future(refresh())
+
+    async def _fetch_page(self, path: str, base_payload: dict, from_index: int):
+        payload = dict(base_payload)
+        payload['From'] = str(from_index)
+        return await self._post_json(path, payload)
+
+    async def iter_pages(self, path: str, limit: int, from_index: int, base_payload: dict) -> AsyncIterator[List[AnimeResult]]:
+        """Async twin of AnimeAPI._iter_pages: catalog first, else the first page alone, then a window of concurrent pages."""
+        if limit <= 0:
+            return
+        batcher = PageBatcher(limit)
+
+        if self.catalog is not None and base_payload.get('FilterType') != 'SEARCH':
+            local = await self.client.run_blocking(self.catalog.get_list, path, base_payload, from_index, limit)
+            if local:
+                batch = batcher.take(local)
+                if batch:
+                    yield batch
+                return
+
+        try:
+            first_page = await self._fetch_page(path, base_payload, from_index)
+        except Exception:
+            return
+        if not isinstance(first_page, list) or not first_page:
+            return
+
+        page_size = len(first_page)
+        batch = batcher.take(first_page)
+        if batch:
+            yield batch
+        if page_size < MIN_FULL_PAGE or batcher.produced >= limit:
+            return
+
+        next_from = from_index + page_size
+        pending = []
+        try:
+            while batcher.produced < limit:
+                while len(pending) < MAX_PAGE_WORKERS and batcher.produced + len(pending) * page_size < limit:
+                    pending.append(asyncio.ensure_future(self._fetch_page(path, base_payload, next_from)))
+                    next_from += page_size
+                if not pending:
+                    break
+                try:
+                    data = await pending.pop(0)
+                except Exception:
+                    break
+                if not isinstance(data, list) or not data:
+                    break
+                batch = batcher.take(data)
+                if batch:
+                    yield batch
+                if len(data) < page_size:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get_anime_list(self, filter_type: str = "", filter_data: str = "", anime_type: str = "SERIES", from_index: int = 0, limit: int = 30) -> List[AnimeResult]:
+        payload = AnimeAPI.anime_list_payload(filter_type, filter_data, anime_type)
+        results = []
+        async for batch in self.iter_pages(ANIME_LIST_PATH, limit, from_index, payload):
+            results.extend(batch)
+        return results[:limit]
+
+    async def get_latest_anime(self, from_index: int = 0, limit: int = 30) -> List[AnimeResult]:
+        results = []
+        async for batch in self.iter_pages(LATEST_ANIME_PATH, limit, from_index, AnimeAPI.latest_payload()):
+            results.extend(batch)
+        return results[:limit]
+
+    async def _search_branch(self, query: str, anime_type: str, limit: int):
+        start = time.perf_counter()
+        try:
+            results = await self.get_anime_list(filter_type="SEARCH", filter_data=query, anime_type=anime_type, limit=limit)
+        except Exception:
+            results = []
+        return anime_type, results, time.perf_counter() - start
+
+    async def iter_search_branches(self, query: str, types, limit: int):
+        """One search per anime type, concurrently; yields (type, results, seconds) as each finishes."""
+        tasks = [asyncio.ensure_future(self._search_branch(query, anime_type, limit)) for anime_type in types]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def search_anime(self, query: str, types=SEARCH_TYPES, limit: int = SEARCH_LIMIT) -> SearchResults:
+        by_type = {}
+        timings = {}
+        async for anime_type, results, elapsed in self.iter_search_branches(query, types, limit):
+            by_type[anime_type] = results
+            timings[anime_type] = elapsed
+        return merge_search_results(query, types, by_type, timings)
+
+    async def get_episodes(self, anime_id: str) -> EpisodeIndex:
+        try:
+            data = await self._post_json(EPISODES_PATH, {'AnimeID': anime_id})
+        except Exception:
+            return EpisodeIndex()
+        return AnimeAPI._parse_episodes(data)
+
+    async def get_streaming_servers(self, anime_id: str, episode_num: str, anime_type: str = 'SERIES') -> Optional[Dict]:
+        payload = {
+            'UserId': '0',
+            'AnimeId': anime_id,
+            'Episode': str(episode_num),
+            'AnimeType': anime_type,
+        }
+        try:
+            return await self.inflight.do(make_cache_key(SERVERS_PATH, payload), self._fetch_json, SERVERS_PATH, payload)
+        except Exception:
+            return None
+
+    async def extract_mediafire_direct(self, mf_url: str) -> Optional[str]:
+        try:
+            return await self.inflight.do(make_cache_key('GET', {'url': mf_url}), self._fetch_mediafire_direct, mf_url)
+        except Exception:
+            return None
+
+    async def _fetch_mediafire_direct(self, mf_url: str) -> Optional[str]:
+        text = await self.client.get_text(mf_url, headers={'User-Agent': network.BROWSER_USER_AGENT})
+        match = re.search(r'(https://download[^"]+)', text)
+        return match.group(1) if match else None
+
+    def build_mediafire_url(self, server_id: str) -> str:
+        if server_id.startswith('http'):
+            return server_id
+        return f'https://www.mediafire.com/file/{server_id}'
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+class EventLoopThread:
+    """An asyncio loop running in a daemon thread, for driving coroutines from sync code.
+
+    Its default executor is the job pool ``submit_blocking`` runs on.
+    """
+
+    def __init__(self, job_workers: int = JOB_WORKERS):
+        self.job_workers = job_workers
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                ready = threading.Event()
+
+                def run():
+                    loop = asyncio.new_event_loop()
+                    loop.set_default_executor(ThreadPoolExecutor(max_workers=self.job_workers, thread_name_prefix="loop-job"))
+                    asyncio.set_event_loop(loop)
+                    self._loop = loop
+                    ready.set()
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name="anime-api-loop", daemon=True)
+                self._thread.start()
+                ready.wait()
+            return self._loop
+
+    def in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro) -> Future:
+        """Schedule a coroutine on the loop; the returned Future cancels the task when cancelled."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_started())
+
+    def submit_blocking(self, func, *args) -> Future:
+        """Run a blocking callable on the loop's job executor."""
+        async def job():
+            return await asyncio.get_running_loop().run_in_executor(None, lambda: func(*args))
+        return self.submit(job())
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the loop and wait for it. Never call this from the loop thread."""
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("EventLoopThread.run() called from its own loop; await the coroutine instead")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def iterate(self, agen) -> Iterator:
+        """Drive an async generator on the loop from a plain for-loop.
+
+        Leaving the for-loop early closes the generator on the loop, so the
+        tasks it started are cancelled there.
+        """
+        async def step():
+            return await agen.__anext__()
+
+        async def close():
+            await agen.aclose()
+
+        try:
+            while True:
+                try:
+                    item = self.run(step())
+                except StopAsyncIteration:
+                    return
+                yield item
+        finally:
+            try:
+                self.run(close(), timeout=5)
+            except Exception:
+                pass
+
+    def stop(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner() -> EventLoopThread:
+    """The process-wide event loop the app's network and background work share."""
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = EventLoopThread()
+    return _runner
+
+
+class SyncAnimeAPI(AnimeAPI):
+    """AnimeAPI whose network paths run on the shared event loop.
+
+    Pagination, search fan-out, episode lists, server lists and MediaFire
+    resolution go through ``self.aio`` on ``self.runner`` instead of
+    per-call thread pools; everything else (trending, the local title index,
+    streamed episodes) is inherited unchanged and reaches the loop through
+    these overrides. ``aio`` and ``runner`` are public so loop-side code, such
+    as the prefetcher, can await the coroutines directly.
+    """
+
+    def __init__(self, cache=None, catalog=None, search_index=None, runner: Optional[EventLoopThread] = None,
+                 client: Optional[AsyncHTTPClient] = None):
+        super().__init__(cache=cache, catalog=catalog, search_index=search_index)
+        self.runner = runner or get_runner()
+        self.aio = AsyncAnimeAPI(cache=self.cache, client=client, catalog=catalog)
+
+    def _post_json(self, path: str, payload: dict):
+        return self.runner.run(self.aio._post_json(path, payload))
+
+    def fetch_list_page(self, path: str, payload: dict):
+        return self.runner.run(self.aio.fetch_list_page(path, payload))
+
+    def _iter_pages(self, path: str, limit: int, from_index: int, base_payload: dict) -> Iterator[List[AnimeResult]]:
+        return self.runner.iterate(self.aio.iter_pages(path, limit, from_index, base_payload))
+
+    def _iter_search_branches(self, query: str, types, limit: int):
+        return self.runner.iterate(self.aio.iter_search_branches(query, types, limit))
+
+    def get_episodes(self, anime_id: str) -> EpisodeIndex:
+        return self.runner.run(self.aio.get_episodes(anime_id))
+
+    def get_streaming_servers(self, anime_id: str, episode_num: str, anime_type: str = 'SERIES') -> Optional[Dict]:
+        return self.runner.run(self.aio.get_streaming_servers(anime_id, episode_num, anime_type))
+
+    def extract_mediafire_direct(self, mf_url: str) -> Optional[str]:
+        return self.runner.run(self.aio.extract_mediafire_direct(mf_url))
+
+    def close(self) -> None:
+        try:
+            self.runner.run(self.aio.aclose(), timeout=5)
+        except Exception:
+            pass
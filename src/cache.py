@@ -0,0 +1,244 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import jsonstream
+from .storage import atomic_write_json
+
+# Per-endpoint (fresh_ttl, max_stale) in seconds.
+# Within fresh_ttl an entry is served as-is; up to max_stale it is still served
+# instantly but a background refresh is kicked off (stale-while-revalidate).
+ENDPOINT_TTLS = {
+    'anime/load_latest_anime.php': (10 * 60, 24 * 3600),
+    'anime/load_anime_list_v2.php': (60 * 60, 7 * 24 * 3600),
+    'episodes/load_episodes.php': (30 * 60, 7 * 24 * 3600),
+}
+DEFAULT_TTL = (10 * 60, 24 * 3600)
+
+# Payload fields that must never be part of a cache key.
+_EXCLUDED_FIELDS = {'Token'}
+
+FRESH = 'fresh'
+STALE = 'stale'
+
+
+def make_cache_key(endpoint: str, payload: dict) -> str:
+    normalized = {str(k): str(v) for k, v in (payload or {}).items() if k not in _EXCLUDED_FIELDS}
+    raw = endpoint + '|' + json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Disk-backed cache of parsed API responses with TTLs and LRU eviction.
+
+    Each entry lives in its own JSON file under ``~/.ani-cli-arabic/cache/responses``.
+    The file mtime doubles as the last-access time, so LRU order survives restarts.
+    """
+
+    MAX_BYTES = 32 * 1024 * 1024
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: Optional[int] = None):
+        if cache_dir is None:
+            cache_dir = Path.home() / ".ani-cli-arabic" / "cache" / "responses"
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes or self.MAX_BYTES
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._refreshing = set()
+        self._counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'refreshes': 0}
+        self.enabled = True
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._load_index()
+        except OSError:
+            self.enabled = False
+
+    def _load_index(self) -> None:
+        entries = []
+        for path in self.cache_dir.glob('*.json'):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, path.stem, st.st_size))
+
+        entries.sort()
+        for _, key, size in entries:
+            self._index[key] = size
+            self._total_bytes += size
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    @staticmethod
+    def ttl_for(endpoint: str) -> Tuple[int, int]:
+        return ENDPOINT_TTLS.get(endpoint, DEFAULT_TTL)
+
+    def get(self, endpoint: str, payload: dict, allow_expired: bool = False) -> Tuple[Any, Optional[str]]:
+        """Return ``(data, state)`` where state is ``'fresh'``, ``'stale'`` or ``None`` on miss.
+
+        With ``allow_expired`` an entry past its max-stale window is still
+        returned as ``'stale'`` instead of being dropped (used when offline).
+        """
+        if not self.enabled:
+            return None, None
+
+        key = make_cache_key(endpoint, payload)
+        path = self._path(key)
+
+        with self._lock:
+            known = key in self._index
+
+        if not known:
+            self._count('misses')
+            return None, None
+
+        try:
+            with open(path, 'rb') as handle:
+                entry = jsonstream.loads(handle.read())
+            stored_at = float(entry['stored_at'])
+            data = entry['data']
+        except (OSError, ValueError, KeyError, TypeError):
+            self._drop(key)
+            self._count('misses')
+            return None, None
+
+        fresh_ttl, max_stale = self.ttl_for(endpoint)
+        age = time.time() - stored_at
+
+        if age > max_stale and not allow_expired:
+            self._drop(key)
+            self._count('misses')
+            return None, None
+
+        self._touch(key, path)
+        if age <= fresh_ttl:
+            self._count('hits')
+            return data, FRESH
+
+        self._count('stale_hits')
+        return data, STALE
+
+    def put(self, endpoint: str, payload: dict, data: Any) -> None:
+        if not self.enabled:
+            return
+
+        key = make_cache_key(endpoint, payload)
+        path = self._path(key)
+        entry = {'endpoint': endpoint, 'stored_at': time.time(), 'data': data}
+
+        try:
+            atomic_write_json(path, entry, indent=None, ensure_ascii=False, fsync=False)
+            size = path.stat().st_size
+        except (OSError, TypeError, ValueError):
+            return
+
+        with self._lock:
+            previous = self._index.pop(key, 0)
+            self._index[key] = size
+            self._total_bytes += size - previous
+            self._counters['writes'] += 1
+
+        self._evict()
+
+    def refresh_async(self, endpoint: str, payload: dict, fetch: Callable[[], Any]) -> bool:
+        """Refresh an entry in the background; concurrent refreshes of one key are collapsed."""
+        if not self.enabled:
+            return False
+
+        key = make_cache_key(endpoint, payload)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._counters['refreshes'] += 1
+
+        def worker():
+            try:
+                data = fetch()
+                if data is not None:
+                    self.put(endpoint, payload, data)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=worker, daemon=True).start()
+        return True
+
+    def _touch(self, key: str, path: Path) -> None:
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _drop(self, key: str) -> None:
+        with self._lock:
+            size = self._index.pop(key, None)
+            if size is not None:
+                self._total_bytes -= size
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        victims = []
+        with self._lock:
+            while self._total_bytes > self.max_bytes and len(self._index) > 1:
+                key, size = self._index.popitem(last=False)
+                self._total_bytes -= size
+                self._counters['evictions'] += 1
+                victims.append(key)
+
+        for key in victims:
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            result = dict(self._counters)
+            result['entries'] = len(self._index)
+            result['bytes'] = self._total_bytes
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            keys = list(self._index)
+            self._index.clear()
+            self._total_bytes = 0
+        for key in keys:
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache()
+    return _response_cache
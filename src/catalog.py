@@ -0,0 +1,446 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .cache import ResponseCache, make_cache_key
+from .models import ANIME_FIELDS, AnimeResult
+
+# Local mirror of the catalog.
+# Every list page the app fetches is written here, and a background sync walks
+# the browsed lists page by page so trending/popular/genre/studio lists and
+# anime details can be served from SQLite instead of the network.
+
+SCHEMA_VERSION = 1
+
+SYNC_PAGE_INTERVAL = 1.0     # Seconds between page requests made by the sync
+SYNC_MAX_ROWS = 600          # Per list; deeper pages are left to on-demand fetching
+SYNC_IDLE_SECONDS = 60
+
+
+def list_key(path: str, base_payload: dict) -> str:
+    """Identity of a paginated list: endpoint plus every filter except the page offset."""
+    payload = {k: v for k, v in base_payload.items() if k != 'From'}
+    return make_cache_key(path, payload)
+
+
+def list_max_age(path: str) -> float:
+    """Seconds a list's rows are served before the sync must refresh them.
+
+    The same fresh TTL the response cache gives the endpoint, so the latest
+    list is not served from the catalog for longer than from the cache.
+    """
+    return ResponseCache.ttl_for(path)[0]
+
+
+class CatalogStore:
+    """SQLite store of AnimeResult rows and the ordered lists they appear in.
+
+    A single connection is shared behind a lock; WAL mode keeps the sync's
+    writes from blocking readers in other processes.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        if db_path is None:
+            db_path = Path.home() / ".ani-cli-arabic" / "database" / "catalog.db"
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._listeners: List[Callable[[List[AnimeResult]], None]] = []
+        self.enabled = True
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=5)
+            self._init_schema()
+        except (OSError, sqlite3.Error):
+            self.enabled = False
+
+    def _init_schema(self) -> None:
+        columns = ", ".join(f"{name} TEXT NOT NULL DEFAULT ''" for name in ANIME_FIELDS if name != 'id')
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS anime (id TEXT PRIMARY KEY, {columns}, updated_at REAL NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS lists ("
+                " list_key TEXT PRIMARY KEY, path TEXT NOT NULL, payload TEXT NOT NULL,"
+                " page_size INTEGER NOT NULL DEFAULT 0, next_from INTEGER NOT NULL DEFAULT 0,"
+                " complete INTEGER NOT NULL DEFAULT 0, synced_at REAL NOT NULL DEFAULT 0)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS list_rows ("
+                " list_key TEXT NOT NULL, position INTEGER NOT NULL, anime_id TEXT NOT NULL,"
+                " synced_at REAL NOT NULL, PRIMARY KEY (list_key, position))"
+            )
+            self._conn.execute("PRAGMA user_version=%d" % SCHEMA_VERSION)
+
+    @staticmethod
+    def _row_to_result(row) -> AnimeResult:
+        return AnimeResult(*row[:len(ANIME_FIELDS)])
+
+    def _upsert_anime(self, results: List[AnimeResult], now: float) -> None:
+        placeholders = ", ".join("?" for _ in range(len(ANIME_FIELDS) + 1))
+        updates = ", ".join(f"{name}=excluded.{name}" for name in ANIME_FIELDS[1:])
+        self._conn.executemany(
+            f"INSERT INTO anime ({', '.join(ANIME_FIELDS)}, updated_at) VALUES ({placeholders})"
+            f" ON CONFLICT(id) DO UPDATE SET {updates}, updated_at=excluded.updated_at",
+            [tuple(str(getattr(r, name) or '') for name in ANIME_FIELDS) + (now,) for r in results if r.id],
+        )
+
+    def add_listener(self, callback: Callable[[List[AnimeResult]], None]) -> None:
+        """Call ``callback(results)`` after anime rows are written (e.g. to keep an index current)."""
+        self._listeners.append(callback)
+
+    def _notify(self, results: List[AnimeResult]) -> None:
+        for callback in self._listeners:
+            try:
+                callback(results)
+            except Exception:
+                pass
+
+    def upsert_anime(self, results: List[AnimeResult]) -> None:
+        if not self.enabled or not results:
+            return
+        with self._lock:
+            try:
+                with self._conn:
+                    self._upsert_anime(results, time.time())
+            except sqlite3.Error:
+                return
+        self._notify(results)
+
+    def store_page(self, path: str, base_payload: dict, from_index: int, results: List[AnimeResult]) -> None:
+        """Record one fetched page: its anime rows and their positions in the list.
+
+        A page shorter than the longest page seen for the list marks its end.
+        """
+        if not self.enabled:
+            return
+        key = list_key(path, base_payload)
+        payload = json.dumps({k: v for k, v in base_payload.items() if k != 'From'}, sort_keys=True)
+        now = time.time()
+        with self._lock:
+            try:
+                with self._conn:
+                    self._upsert_anime(results, now)
+                    self._conn.execute(
+                        "INSERT INTO lists (list_key, path, payload, page_size) VALUES (?, ?, ?, ?)"
+                        " ON CONFLICT(list_key) DO UPDATE SET page_size=MAX(page_size, excluded.page_size)",
+                        (key, path, payload, len(results)),
+                    )
+                    page_size = self._conn.execute("SELECT page_size FROM lists WHERE list_key=?", (key,)).fetchone()[0]
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO list_rows (list_key, position, anime_id, synced_at) VALUES (?, ?, ?, ?)",
+                        [(key, from_index + offset, r.id, now) for offset, r in enumerate(results) if r.id],
+                    )
+                    # Contiguous pages move the sync's resume point along with browsing.
+                    self._conn.execute(
+                        "UPDATE lists SET next_from=? WHERE list_key=? AND next_from=?",
+                        (from_index + len(results), key, from_index),
+                    )
+                    if len(results) < page_size:
+                        # A short page is the end of the list; drop rows past it.
+                        end = from_index + len(results)
+                        self._conn.execute("DELETE FROM list_rows WHERE list_key=? AND position>=?", (key, end))
+            except sqlite3.Error:
+                return
+        self._notify(results)
+
+    def get_list(self, path: str, base_payload: dict, from_index: int, limit: int,
+                 max_age: Optional[float] = None) -> Optional[List[AnimeResult]]:
+        """Rows ``from_index .. from_index+limit`` of a list, or None unless all are present and fresh."""
+        if not self.enabled or limit <= 0:
+            return None
+        key = list_key(path, base_payload)
+        cutoff = time.time() - (list_max_age(path) if max_age is None else max_age)
+        with self._lock:
+            try:
+                state = self._conn.execute("SELECT complete FROM lists WHERE list_key=?", (key,)).fetchone()
+                if state is None:
+                    return None
+                rows = self._conn.execute(
+                    f"SELECT {', '.join('a.' + name for name in ANIME_FIELDS)}, r.position, r.synced_at"
+                    " FROM list_rows r JOIN anime a ON a.id = r.anime_id"
+                    " WHERE r.list_key=? AND r.position>=? AND r.position<? ORDER BY r.position",
+                    (key, from_index, from_index + limit),
+                ).fetchall()
+                last = None
+                if len(rows) < limit and state[0]:
+                    last = self._conn.execute("SELECT MAX(position) FROM list_rows WHERE list_key=?", (key,)).fetchone()[0]
+            except sqlite3.Error:
+                return None
+
+        if not rows:
+            return None
+        # No holes, nothing stale, and either the full range or the true end of a synced list.
+        positions = [row[-2] for row in rows]
+        if positions != list(range(from_index, from_index + len(rows))):
+            return None
+        if any(row[-1] < cutoff for row in rows):
+            return None
+        if len(rows) < limit and (last is None or positions[-1] != last):
+            return None
+        return [self._row_to_result(row) for row in rows]
+
+    def get_anime(self, anime_id: str) -> Optional[AnimeResult]:
+        if not self.enabled or not anime_id:
+            return None
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    f"SELECT {', '.join(ANIME_FIELDS)} FROM anime WHERE id=?", (str(anime_id),)
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+        return self._row_to_result(row) if row else None
+
+    def get_many(self, anime_ids: List[str]) -> Dict[str, AnimeResult]:
+        if not self.enabled or not anime_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in anime_ids)
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(ANIME_FIELDS)} FROM anime WHERE id IN ({placeholders})",
+                    [str(anime_id) for anime_id in anime_ids],
+                ).fetchall()
+            except sqlite3.Error:
+                return {}
+        return {row[0]: self._row_to_result(row) for row in rows}
+
+    def iter_titles(self):
+        """Yield ``(id, title_en, title_jp, title_romaji)`` for every stored anime."""
+        if not self.enabled:
+            return
+        with self._lock:
+            try:
+                rows = self._conn.execute("SELECT id, title_en, title_jp, title_romaji FROM anime").fetchall()
+            except sqlite3.Error:
+                return
+        yield from rows
+
+    def list_ids(self, key: str, from_index: int, limit: int) -> List[str]:
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    "SELECT anime_id FROM list_rows WHERE list_key=? AND position>=? AND position<? ORDER BY position",
+                    (key, from_index, from_index + limit),
+                ).fetchall()
+            except sqlite3.Error:
+                return []
+        return [row[0] for row in rows]
+
+    def lists(self) -> List[Dict]:
+        if not self.enabled:
+            return []
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    "SELECT l.list_key, l.path, l.payload, l.page_size, l.next_from, l.complete, l.synced_at,"
+                    " (SELECT COUNT(*) FROM list_rows r WHERE r.list_key = l.list_key),"
+                    " (SELECT MIN(synced_at) FROM list_rows r WHERE r.list_key = l.list_key)"
+                    " FROM lists l"
+                ).fetchall()
+            except sqlite3.Error:
+                return []
+        return [
+            {
+                'key': row[0], 'path': row[1], 'payload': json.loads(row[2]), 'page_size': row[3],
+                'next_from': row[4], 'complete': bool(row[5]), 'synced_at': row[6],
+                'rows': row[7], 'oldest_row': row[8] or 0,
+            }
+            for row in rows
+        ]
+
+    def register_list(self, path: str, base_payload: dict) -> None:
+        """Make sure a list is known to the sync even before it has been browsed."""
+        if not self.enabled:
+            return
+        payload = json.dumps({k: v for k, v in base_payload.items() if k != 'From'}, sort_keys=True)
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO lists (list_key, path, payload) VALUES (?, ?, ?)",
+                        (list_key(path, base_payload), path, payload),
+                    )
+            except sqlite3.Error:
+                pass
+
+    def set_progress(self, key: str, next_from: int, complete: bool) -> None:
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "UPDATE lists SET next_from=?, complete=?, synced_at=? WHERE list_key=?",
+                        (next_from, int(complete), time.time(), key),
+                    )
+            except sqlite3.Error:
+                pass
+
+    def touch_list(self, key: str) -> None:
+        """Mark every row of a list as freshly confirmed."""
+        now = time.time()
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute("UPDATE list_rows SET synced_at=? WHERE list_key=?", (now, key))
+                    self._conn.execute("UPDATE lists SET synced_at=? WHERE list_key=?", (now, key))
+            except sqlite3.Error:
+                pass
+
+    def counts(self) -> Dict[str, int]:
+        if not self.enabled:
+            return {'anime': 0, 'lists': 0, 'list_rows': 0}
+        with self._lock:
+            try:
+                return {
+                    'anime': self._conn.execute("SELECT COUNT(*) FROM anime").fetchone()[0],
+                    'lists': self._conn.execute("SELECT COUNT(*) FROM lists").fetchone()[0],
+                    'list_rows': self._conn.execute("SELECT COUNT(*) FROM list_rows").fetchone()[0],
+                }
+            except sqlite3.Error:
+                return {'anime': 0, 'lists': 0, 'list_rows': 0}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self.enabled = False
+
+
+class CatalogSync:
+    """Background, resumable, rate-limited walk over the lists in a CatalogStore.
+
+    Unfinished lists continue from their saved offset (so a sync interrupted by
+    quitting picks up where it stopped). Finished lists whose rows have gone
+    stale are re-read from the top, stopping at the first page that matches
+    what is stored, so only the changed head of a list is pulled again.
+    """
+
+    def __init__(self, api, store: CatalogStore, interval: float = SYNC_PAGE_INTERVAL,
+                 max_rows: int = SYNC_MAX_ROWS, max_age: Optional[float] = None,
+                 on_progress: Optional[Callable[[Dict], None]] = None):
+        self.api = api
+        self.store = store
+        self.interval = interval
+        self.max_rows = max_rows
+        # None: each list's endpoint decides, see list_max_age().
+        self.max_age = max_age
+        self.on_progress = on_progress
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._status = {'running': False, 'current': None, 'pages': 0, 'rows': 0, 'errors': 0}
+
+    def start(self) -> None:
+        if not self.store.enabled:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="catalog-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 2) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+    def status(self) -> Dict:
+        with self._lock:
+            result = dict(self._status)
+        result.update(self.store.counts())
+        return result
+
+    def _bump(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            value = self._status[name] + amount
+        self._update(**{name: value})
+
+    def _update(self, **changes) -> None:
+        with self._lock:
+            self._status.update(changes)
+            snapshot = dict(self._status)
+        if self.on_progress is not None:
+            try:
+                self.on_progress(snapshot)
+            except Exception:
+                pass
+
+    def _run(self) -> None:
+        self._update(running=True)
+        try:
+            while not self._stop.is_set():
+                worked = False
+                for entry in self.store.lists():
+                    if self._stop.is_set():
+                        break
+                    if self._needs_work(entry) and self._sync_list(entry):
+                        worked = True
+                if not worked:
+                    # Nothing to do, or the API is failing: check back later.
+                    self._update(current=None)
+                    self._stop.wait(SYNC_IDLE_SECONDS)
+        finally:
+            self._update(running=False, current=None)
+
+    def _needs_work(self, entry: Dict) -> bool:
+        if not entry['complete']:
+            return True
+        max_age = list_max_age(entry['path']) if self.max_age is None else self.max_age
+        return entry['rows'] > 0 and entry['oldest_row'] < time.time() - max_age
+
+    def _fetch(self, entry: Dict, from_index: int) -> Optional[list]:
+        payload = dict(entry['payload'])
+        payload['From'] = str(from_index)
+        self._stop.wait(self.interval)
+        if self._stop.is_set():
+            return None
+        try:
+            data = self.api.fetch_list_page(entry['path'], payload)
+        except Exception:
+            self._bump('errors')
+            return None
+        return data if isinstance(data, list) else []
+
+    def _sync_list(self, entry: Dict) -> bool:
+        """Sync one list until it is complete (or confirmed unchanged); False if no page could be fetched."""
+        key = entry['key']
+        refreshing = entry['complete']
+        from_index = 0 if refreshing else entry['next_from']
+        page_size = entry['page_size']
+        self._update(current=entry['payload'].get('FilterData') or entry['path'])
+
+        progressed = False
+        while not self._stop.is_set():
+            stored_ids = self.store.list_ids(key, from_index, max(page_size, 1))
+            data = self._fetch(entry, from_index)
+            if data is None:
+                return progressed
+            progressed = True
+            results = [self.api._parse_anime_result(item) for item in data if isinstance(item, dict)]
+            page_size = max(page_size, len(data))
+
+            if self.api.catalog is not self.store:
+                self.store.store_page(entry['path'], entry['payload'], from_index, results)
+            unchanged = refreshing and bool(results) and [r.id for r in results] == stored_ids[:len(results)]
+            from_index += len(data)
+            self._bump('pages')
+            self._bump('rows', len(results))
+
+            if unchanged:
+                # The head of the list matches what we have; the rest is still valid.
+                self.store.touch_list(key)
+                self.store.set_progress(key, max(from_index, entry['next_from']), True)
+                return True
+            complete = not data or len(data) < page_size or from_index >= self.max_rows
+            self.store.set_progress(key, from_index, complete)
+            if complete:
+                return True
+        return progressed
@@ -4,12 +4,15 @@ import subprocess
 import shutil
 import time
 import re
-from src.api import AnimeAPI
+import threading
+import requests
+from src.api import AnimeAPI, rank_search_results
 from src.player import PlayerManager
-from src.models import QualityOption
+from src.models import EpisodeIndex, QualityOption
 from src.history import HistoryManager
 from src.version import APP_VERSION
 from src.config import MINIMAL_ASCII_ART, GOODBYE_ART, THEMES
+from src.utils import format_position
 from rich.console import Console
 from rich.text import Text
 from rich.panel import Panel
@@ -44,7 +47,12 @@ class AniCliWrapper:
         print(f"\033[1;31m{msg}\033[0m", file=sys.stderr)
         sys.exit(1)
 
-    def _launcher(self, items, prompt_text, multi=False):
+    def _launcher(self, items, prompt_text, multi=False, stream=None):
+        """Let the user pick from items.
+
+        ``stream`` is an optional iterator of further item lists; fzf shows them
+        as they arrive, the numbered fallback waits for all of them.
+        """
         if not items:
             return []
 
@@ -54,19 +62,21 @@ class AniCliWrapper:
             if multi:
                 args.append('-m')
             
-            input_str = "\n".join(items)
-            
             try:
-                result = subprocess.run(
-                    args,
-                    input=input_str,
-                    text=True,
-                    encoding='utf-8',
-                    stdout=subprocess.PIPE,
-                    stderr=None  # Let fzf render UI to terminal
-                )
-                if result.returncode == 0:
-                    out = result.stdout.strip()
+                if stream is not None:
+                    returncode, out = self._run_fzf_streaming(args, items, stream)
+                else:
+                    result = subprocess.run(
+                        args,
+                        input="\n".join(items),
+                        text=True,
+                        encoding='utf-8',
+                        stdout=subprocess.PIPE,
+                        stderr=None  # Let fzf render UI to terminal
+                    )
+                    returncode, out = result.returncode, result.stdout
+                if returncode == 0:
+                    out = out.strip()
                     if not out:
                         return []
                     return out.split('\n')
@@ -74,6 +84,10 @@ class AniCliWrapper:
             except Exception as e:
                 self._die(f"Error running fzf: {e}")
         else:
+            if stream is not None:
+                items = list(items)
+                for more in stream:
+                    items.extend(more)
             print(f"\033[1;36m{prompt_text}\033[0m")
             for i, item in enumerate(items, 1):
                 print(f"{i}. {item}")
@@ -105,6 +119,42 @@ class AniCliWrapper:
             except Exception:
                 return []
     
+    def _run_fzf_streaming(self, args, items, stream):
+        proc = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=None,
+            text=True,
+            encoding='utf-8'
+        )
+
+        def feed():
+            try:
+                proc.stdin.write("\n".join(items) + "\n")
+                proc.stdin.flush()
+                for more in stream:
+                    if not more:
+                        continue
+                    proc.stdin.write("\n".join(more) + "\n")
+                    proc.stdin.flush()
+            except (BrokenPipeError, OSError, ValueError):
+                # fzf exited before the list finished loading; keep loading
+                # anyway so the list is complete if the caller shows it again.
+                for _ in stream:
+                    pass
+            finally:
+                try:
+                    proc.stdin.close()
+                except (BrokenPipeError, OSError):
+                    pass
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        out = proc.stdout.read()
+        proc.wait()
+        return proc.returncode, out
+
     def get_quality_preference(self, server_data):
         current_ep_data = server_data.get('CurrentEpisode', {})
         qualities = [
@@ -161,66 +211,109 @@ class AniCliWrapper:
             print(f"\033[1;31mFailed to extract direct link for {selected_q.name}\033[0m")
             return False
 
-        print(f"\033[1;34mPlaying episode {ep.number} ({selected_q.name})...\033[0m")
+        resume_at = self.history.get_resume_position(anime.id, ep.display_num)
+        if resume_at:
+            print(f"\033[1;34mResuming episode {ep.number} ({selected_q.name}) at {format_position(resume_at)}...\033[0m")
+        else:
+            print(f"\033[1;34mPlaying episode {ep.number} ({selected_q.name})...\033[0m")
         
-        self.player.play(direct_url, f"{anime.title_en} - Episode {ep.number}")
+        progress = self.player.play(direct_url, f"{anime.title_en} - Episode {ep.number}", start=resume_at)
         
-        self.history.mark_watched(anime.id, ep.display_num, anime.title_en)
+        if progress is None:
+            self.history.mark_watched(anime.id, ep.display_num, anime.title_en)
+        else:
+            self.history.mark_watched(
+                anime.id, ep.display_num, anime.title_en,
+                position=progress.position, duration=progress.duration, completed=progress.completed
+            )
         self.history.save_history()
         return True
 
-    def _process_anime_list(self, results, title="Select Anime"):
+    def _format_anime_line(self, res, width):
+        C_CYAN = "\033[36m"
+        C_RESET = "\033[0m"
+        C_DIM = "\033[90m"
+        C_YELLOW = "\033[33m"
+
+        t_str = res.title_en
+        if len(t_str) > 60: t_str = t_str[:57] + "..."
+        padding = " " * (max(width, len(t_str)) - len(t_str) + 3)
+        
+        # Metadata
+        meta = []
+        if res.episodes and str(res.episodes) not in ["?", "0"]:
+            meta.append(f"{res.episodes} eps")
+        
+        if res.premiered and str(res.premiered) not in ["0", "N/A", "None", "", "?"]:
+            meta.append(f"{res.premiered}")
+        
+        meta_str = ""
+        if meta:
+            meta_str = f" {C_DIM}|{C_RESET} ".join(meta)
+            meta_str = f"{C_DIM}[{C_RESET} {meta_str} {C_DIM}]{C_RESET}"
+        
+        score_str = ""
+        if res.score and str(res.score) not in ["0", "N/A", "None", ""]:
+             score_str = f"   {C_YELLOW}★ {res.score}{C_RESET}"
+        
+        return f"{C_CYAN}{t_str}{C_RESET}{padding}{meta_str}{score_str}"
+
+    def _process_anime_list(self, results, title="Select Anime", more_batches=None, rerank=None):
+        if not results:
+            self.console.print("[yellow]No results found[/yellow]")
+            return
+
         anime_map = {}
         display_lines = []
+        map_lock = threading.Lock()
+        ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
         
         # Calculate alignment padding
         max_len = 0
-        clean_titles = []
         for res in results:
-            t = res.title_en
-            if len(t) > 60: t = t[:57] + "..."
-            clean_titles.append(t)
-            if len(t) > max_len: max_len = len(t)
-        
-        for idx, res in enumerate(results):
-            C_CYAN = "\033[36m"
-            C_RESET = "\033[0m"
-            C_DIM = "\033[90m"
-            C_YELLOW = "\033[33m"
-            C_GREEN = "\033[32m"
-            
-            t_str = clean_titles[idx]
-            padding = " " * (max_len - len(t_str) + 3)
-            
-            # Metadata
-            meta = []
-            if res.episodes and str(res.episodes) not in ["?", "0"]:
-                meta.append(f"{res.episodes} eps")
-            
-            if res.premiered and str(res.premiered) not in ["0", "N/A", "None", "", "?"]:
-                meta.append(f"{res.premiered}")
-            
-            meta_str = ""
-            if meta:
-                meta_str = f" {C_DIM}|{C_RESET} ".join(meta)
-                meta_str = f"{C_DIM}[{C_RESET} {meta_str} {C_DIM}]{C_RESET}"
-            
-            score_str = ""
-            if res.score and str(res.score) not in ["0", "N/A", "None", ""]:
-                 score_str = f"   {C_YELLOW}★ {res.score}{C_RESET}"
-            
-            line = f"{C_CYAN}{t_str}{C_RESET}{padding}{meta_str}{score_str}"
-            display_lines.append(line)
-            
-            # Map the exact line
-            anime_map[line] = res
-            
-            ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-            clean_line = ansi_escape.sub('', line)
-            anime_map[clean_line] = res
+            max_len = max(max_len, min(len(res.title_en), 60))
+
+        def add_lines(batch):
+            lines = []
+            for res in batch:
+                line = self._format_anime_line(res, max_len)
+                lines.append(line)
+                with map_lock:
+                    # Map the exact line and its plain form
+                    anime_map[line] = res
+                    anime_map[ansi_escape.sub('', line)] = res
+            display_lines.extend(lines)
+            return lines
+
+        add_lines(results)
+
+        stream = None
+        loaded = None
+        if more_batches is not None:
+            # Later pages are appended to fzf while the user is already browsing.
+            loaded = threading.Event()
+
+            def load_batches():
+                try:
+                    for batch in more_batches:
+                        yield add_lines(batch)
+                finally:
+                    loaded.set()
+
+            stream = load_batches()
 
         while True:
-            selection = self._launcher(display_lines, title)
+            if stream is None and loaded is not None:
+                # Reopened after picking or backing out early: show the whole list, not just what had arrived.
+                loaded.wait()
+                if rerank is not None:
+                    # Batches were shown in arrival order; settle the final one.
+                    ranked = rerank([anime_map[line] for line in display_lines])
+                    order = {id(res): idx for idx, res in enumerate(ranked)}
+                    display_lines.sort(key=lambda line: order[id(anime_map[line])])
+                    rerank = None
+            selection = self._launcher(list(display_lines), title, stream=stream)
+            stream = None
             if selection is None:
                 # Back
                 break
@@ -229,12 +322,13 @@ class AniCliWrapper:
                 continue
 
             sel_text = selection[0]
-            if sel_text not in anime_map:
-                # Try stripping ANSI if direct lookup fails
-                ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-                sel_text = ansi_escape.sub('', sel_text)
+            with map_lock:
+                if sel_text not in anime_map:
+                    # Try stripping ANSI if direct lookup fails
+                    sel_text = ansi_escape.sub('', sel_text)
+                found = sel_text in anime_map
             
-            if sel_text not in anime_map:
+            if not found:
                 print("\033[1;31mSelection error: Item not found in map.\033[0m")
                 continue
 
@@ -245,8 +339,17 @@ class AniCliWrapper:
                 self.rpc.update_viewing_anime(selected_anime.title_en, selected_anime.thumbnail)
 
             episodes = []
-            with self.console.status("[bold blue]Fetching episodes...[/bold blue]", spinner="dots"):
-                episodes = self.api.get_episodes(selected_anime.id)
+            try:
+                with self.console.status("[bold blue]Fetching episodes...[/bold blue]", spinner="dots") as status:
+                    for ep in self.api.iter_episodes(selected_anime.id):
+                        episodes.append(ep)
+                        if len(episodes) % 100 == 0:
+                            status.update(f"[bold blue]Fetching episodes... {len(episodes)}[/bold blue]")
+            except (requests.RequestException, ValueError, TypeError):
+                # Don't offer a list that stops short of the real last episode.
+                print(f"\033[1;31mEpisode list was cut off after {len(episodes)} episodes. Try again.\033[0m")
+                continue
+            episodes = EpisodeIndex(episodes)
                 
             if not episodes:
                 print("\033[1;31mNo episodes found.\033[0m")
@@ -306,22 +409,18 @@ class AniCliWrapper:
                         cmd = sel[0]
                         
                         if cmd == "Next":
-                            next_ep_num = self._get_next_ep_num(episodes, ep)
-                            if next_ep_num:
-                                next_ep = next((e for e in episodes if e.number == next_ep_num), None)
-                                if next_ep:
-                                    ep = next_ep
-                                    self.play_video(selected_anime, ep, current_quality)
+                            next_ep = episodes.next_episode(ep)
+                            if next_ep:
+                                ep = next_ep
+                                self.play_video(selected_anime, ep, current_quality)
                             else:
                                 print("\033[1;33mNo next episode.\033[0m")
                         
                         elif cmd == "Previous":
-                            prev_ep_num = self._get_prev_ep_num(episodes, ep)
-                            if prev_ep_num:
-                                prev_ep = next((e for e in episodes if e.number == prev_ep_num), None)
-                                if prev_ep:
-                                    ep = prev_ep
-                                    self.play_video(selected_anime, ep, current_quality)
+                            prev_ep = episodes.previous_episode(ep)
+                            if prev_ep:
+                                ep = prev_ep
+                                self.play_video(selected_anime, ep, current_quality)
                             else:
                                 print("\033[1;33mNo previous episode.\033[0m")
 
@@ -429,10 +528,11 @@ class AniCliWrapper:
                 continue
                 
             if cmd == 'p':
+                 batches = self.api.iter_anime_list("SORT", "HIGHEST_RATE", "SERIES", limit=100)
                  with self.console.status("[bold blue]Fetching popular...[/bold blue]", spinner="dots"):
-                    results = self.api.get_top_rated_anime(limit=100)
+                    results = next(batches, [])
                  self.console.print(f"[green]Got {len(results)} popular results[/green]")
-                 self._process_anime_list(results, "Popular Anime")
+                 self._process_anime_list(results, "Popular Anime", more_batches=batches)
                  os.system('cls' if os.name == 'nt' else 'clear')
                  self._print_header()
                  continue
@@ -444,10 +544,11 @@ class AniCliWrapper:
                 sel = self._launcher(genres, "Select Genre")
                 if sel and sel[0]:
                     genre = sel[0]
+                    batches = self.api.iter_anime_list("GENRE", genre, "SERIES", limit=100)
                     with self.console.status(f"[bold blue]Fetching {genre} anime...[/bold blue]", spinner="dots"):
-                         results = self.api.get_anime_list("GENRE", genre, "SERIES", limit=100)
+                         results = next(batches, [])
                     self.console.print(f"[green]Got {len(results)} results for {genre}[/green]")
-                    self._process_anime_list(results, f"Genre: {genre}")
+                    self._process_anime_list(results, f"Genre: {genre}", more_batches=batches)
                 
                 os.system('cls' if os.name == 'nt' else 'clear')
                 self._print_header()
@@ -465,10 +566,11 @@ class AniCliWrapper:
                 sel = self._launcher(studios, "Select Studio")
                 if sel and sel[0]:
                     studio = sel[0]
+                    batches = self.api.iter_anime_list("STUDIOS", studio, "SERIES", limit=100)
                     with self.console.status(f"[bold blue]Fetching {studio} anime...[/bold blue]", spinner="dots"):
-                         results = self.api.get_anime_list("STUDIOS", studio, "SERIES", limit=100)
+                         results = next(batches, [])
                     self.console.print(f"[green]Got {len(results)} results for {studio}[/green]")
-                    self._process_anime_list(results, f"Studio: {studio}")
+                    self._process_anime_list(results, f"Studio: {studio}", more_batches=batches)
 
                 os.system('cls' if os.name == 'nt' else 'clear')
                 self._print_header()
@@ -485,47 +587,35 @@ class AniCliWrapper:
             search_q = cmd
 
             results = []
+            batches = self.api.iter_search(search_q)
             with self.console.status(f"[bold green]Searching for: {search_q}...[/bold green]", spinner="earth"):
                 if self.rpc: self.rpc.update_searching()
-                results = self.api.search_anime(search_q)
+                results = next(batches, [])
             
             if not results:
                 print(f"\033[1;31mNo results found for '{search_q}'\033[0m")
                 continue
             
-            self._process_anime_list(results, f"Search: {search_q}")
+            self._process_anime_list(
+                list(results), f"Search: {search_q}", more_batches=batches,
+                rerank=lambda items: rank_search_results(search_q, items)
+            )
             
             os.system('cls' if os.name == 'nt' else 'clear')
-            self._print_header() 
-
-
-
-
-    def _get_next_ep_num(self, all_episodes, current_ep):
-        for i, e in enumerate(all_episodes):
-            if e.number == current_ep.number:
-                if i + 1 < len(all_episodes):
-                    return all_episodes[i+1].number
-        return None
+            self._print_header()
 
-    def _get_prev_ep_num(self, all_episodes, current_ep):
-        for i, e in enumerate(all_episodes):
-            if e.number == current_ep.number:
-                if i - 1 >= 0:
-                    return all_episodes[i-1].number
-        return None
 
 def run_simple_cli(query=None, deps=None):
     if deps:
         cli = AniCliWrapper(deps['api'], deps['player'], deps['history'], deps['settings'], deps['rpc'])
     else:
         # Fallback for old calls (should not happen with new app structure)
-        from src.api import AnimeAPI
+        from src.async_api import SyncAnimeAPI
         from src.player import PlayerManager
         from src.history import HistoryManager
-        from src.settings import SettingsManager
+        from src.settings import get_settings
         from src.discord_rpc import DiscordRPCManager
-        cli = AniCliWrapper(AnimeAPI(), PlayerManager(console=None), HistoryManager(), SettingsManager(), DiscordRPCManager())
+        cli = AniCliWrapper(SyncAnimeAPI(), PlayerManager(console=None), HistoryManager(), get_settings(), DiscordRPCManager())
 
     exit_code = 0
     result = None
@@ -56,24 +56,28 @@ THEMES = {
 }
 
 def load_user_theme():
-    """Load theme from config.json"""
+    """Name of the theme chosen in the settings"""
     try:
-        from pathlib import Path
-        import json
-        
-        home_dir = Path.home()
-        config_file = home_dir / ".ani-cli-arabic" / "database" / "config.json"
-        
-        if config_file.exists():
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                return config.get('theme', 'blue')
-    except (IOError, json.JSONDecodeError, KeyError):
+        from .settings import get_settings
+        theme = get_settings().get('theme')
+        if theme in THEMES:
+            return theme
+    except Exception:
         pass
     return 'blue'
 
+def get_theme_colors(theme=None):
+    """Colors of ``theme``, or of the theme currently selected in the settings"""
+    return THEMES.get(theme or load_user_theme(), THEMES['blue'])
+
+def theme_color(key):
+    """One color of the current theme, for styles that combine it with attributes (e.g. "bold")"""
+    return get_theme_colors().get(key, THEMES['blue'][key])
+
+# Colors of the theme selected at startup. The UI draws with named styles
+# (see UIManager.apply_theme) so a theme change applies without a restart.
 selected_theme = load_user_theme()
-theme_colors = THEMES.get(selected_theme, THEMES['blue'])
+theme_colors = get_theme_colors(selected_theme)
 
 HEADER_ART = DEFAULT_HEADER_ART
 COLOR_ASCII = theme_colors.get("ascii", "#8BD218")
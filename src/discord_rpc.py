@@ -42,8 +42,10 @@ class DiscordRPCManager:
             
             self.update_browsing()
             
-            self.update_thread = threading.Thread(target=self._auto_update, daemon=True)
-            self.update_thread.start()
+            # Reconnecting after disconnect() can find the previous updater still asleep.
+            if self.update_thread is None or not self.update_thread.is_alive():
+                self.update_thread = threading.Thread(target=self._auto_update, daemon=True)
+                self.update_thread.start()
             
             return True
         except Exception:
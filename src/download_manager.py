@@ -0,0 +1,376 @@
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from rich.align import Align
+from rich.box import HEAVY
+from rich.console import Group
+from rich.live import Live
+from rich.panel import Panel
+from rich.progress import (BarColumn, DownloadColumn, MofNCompleteColumn, Progress, TextColumn,
+                           TimeElapsedColumn, TimeRemainingColumn, TransferSpeedColumn)
+from rich.text import Text
+
+from .downloader import DEFAULT_CONNECTIONS, BandwidthLimiter, DownloadCancelled, SegmentedDownload
+from .prefetch import DIRECT_LINK_TTL
+from .storage import atomic_write_json
+from .utils import resolve_mediafire_direct, sanitize_download_filename
+
+# Job states. Only unfinished jobs are kept in the queue file.
+QUEUED = 'queued'
+RESOLVING = 'resolving'
+READY = 'ready'
+DOWNLOADING = 'downloading'
+DONE = 'done'
+FAILED = 'failed'
+
+DEFAULT_CONCURRENCY = 2
+MAX_CONCURRENCY = 6
+# Links resolved beyond the running downloads. Kept small so they don't expire while waiting.
+RESOLVE_AHEAD = 2
+RESOLVE_RETRIES = 2
+
+# resolve(job) -> (direct_url, filename, source_url, error)
+Resolver = Callable[['DownloadJob'], Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]]
+
+
+@dataclass
+class DownloadJob:
+    id: str
+    anime_id: str
+    anime_title: str
+    anime_type: str
+    episode_number: str
+    display_num: str
+    status: str = QUEUED
+    filename: str = ""
+    direct_url: str = ""
+    source_url: str = ""
+    resolved_at: float = 0.0
+    error: str = ""
+    attempts: int = 0
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'DownloadJob':
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+class DownloadQueue:
+    """Unfinished download jobs, persisted to ``download_queue.json`` after every change."""
+
+    FILENAME = "download_queue.json"
+
+    def __init__(self, path: Optional[Path] = None):
+        if path is None:
+            path = Path.home() / ".ani-cli-arabic" / "database" / self.FILENAME
+        self.path = path
+        self._lock = threading.RLock()
+        self._jobs: List[DownloadJob] = self._load()
+
+    def _load(self) -> List[DownloadJob]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return []
+        if not isinstance(data, list):
+            return []
+
+        jobs = []
+        for item in data:
+            try:
+                job = DownloadJob.from_dict(item)
+            except (TypeError, AttributeError):
+                continue
+            # Whatever was in flight when the app stopped starts over from the matching step.
+            if job.status == RESOLVING:
+                job.status = QUEUED
+            elif job.status == DOWNLOADING:
+                job.status = READY if job.direct_url else QUEUED
+            if job.status in (QUEUED, READY):
+                jobs.append(job)
+        return jobs
+
+    def save(self) -> None:
+        with self._lock:
+            data = [asdict(job) for job in self._jobs if job.status not in (DONE, FAILED)]
+        try:
+            atomic_write_json(self.path, data, indent=2)
+        except (OSError, TypeError, ValueError):
+            pass
+
+    def add(self, job: DownloadJob) -> bool:
+        with self._lock:
+            if any(existing.id == job.id for existing in self._jobs if existing.status not in (DONE, FAILED)):
+                return False
+            self._jobs.append(job)
+        self.save()
+        return True
+
+    def update(self, job: DownloadJob, **changes) -> None:
+        with self._lock:
+            for key, value in changes.items():
+                setattr(job, key, value)
+        self.save()
+
+    def jobs(self) -> List[DownloadJob]:
+        with self._lock:
+            return list(self._jobs)
+
+    def pending(self) -> List[DownloadJob]:
+        with self._lock:
+            return [job for job in self._jobs if job.status not in (DONE, FAILED)]
+
+    def prune(self) -> None:
+        with self._lock:
+            self._jobs = [job for job in self._jobs if job.status not in (DONE, FAILED)]
+        self.save()
+
+
+class DownloadManager:
+    """Runs queued episode downloads with link resolution pipelined ahead of them.
+
+    One resolver thread turns queued jobs into direct links, staying at most
+    ``RESOLVE_AHEAD`` jobs ahead of the ``concurrency`` download workers. All
+    downloads share one bandwidth limiter and are shown in a single live view.
+    The queue lives on disk, so jobs interrupted by Ctrl+C or a crash are
+    picked up by the next run, and their ``.part`` files resume.
+    """
+
+    def __init__(self, resolve: Resolver, download_dir: str, concurrency: int = DEFAULT_CONCURRENCY,
+                 connections: int = DEFAULT_CONNECTIONS, bandwidth_limit: float = 0,
+                 on_complete: Optional[Callable[[DownloadJob], None]] = None,
+                 queue: Optional[DownloadQueue] = None):
+        self.resolve = resolve
+        self.download_dir = os.path.abspath((download_dir or "downloads").strip() or "downloads")
+        self.concurrency = max(1, min(int(concurrency or 1), MAX_CONCURRENCY))
+        self.connections = connections or DEFAULT_CONNECTIONS
+        self.limiter = BandwidthLimiter(bandwidth_limit) if bandwidth_limit and bandwidth_limit > 0 else None
+        self.on_complete = on_complete
+        self.queue = queue if queue is not None else DownloadQueue()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._active: Dict[str, SegmentedDownload] = {}
+        self._complete_lock = threading.Lock()
+
+    def enqueue(self, anime_id: str, anime_title: str, anime_type: str, episode_number, display_num) -> bool:
+        job = DownloadJob(
+            id=f"{anime_id}:{episode_number}",
+            anime_id=str(anime_id),
+            anime_title=anime_title,
+            anime_type=anime_type,
+            episode_number=str(episode_number),
+            display_num=str(display_num),
+        )
+        return self.queue.add(job)
+
+    def pending_count(self) -> int:
+        return len(self.queue.pending())
+
+    # -- scheduling ------------------------------------------------------
+
+    def _count(self, jobs: List[DownloadJob], status: str) -> int:
+        return sum(1 for job in jobs if job.status == status)
+
+    def _finished(self, jobs: List[DownloadJob]) -> bool:
+        return all(job.status in (DONE, FAILED) for job in jobs)
+
+    def _claim_for_resolving(self, jobs: List[DownloadJob]) -> Optional[DownloadJob]:
+        """Wait until a queued job may be resolved; None once the run is over."""
+        with self._cond:
+            while not self._stop.is_set() and not self._finished(jobs):
+                queued = [job for job in jobs if job.status == QUEUED]
+                idle_workers = max(0, self.concurrency - self._count(jobs, DOWNLOADING))
+                if queued and self._count(jobs, READY) < RESOLVE_AHEAD + idle_workers:
+                    self.queue.update(queued[0], status=RESOLVING)
+                    return queued[0]
+                self._cond.wait(0.5)
+        return None
+
+    def _resolver_loop(self, jobs: List[DownloadJob]) -> None:
+        while True:
+            job = self._claim_for_resolving(jobs)
+            if job is None:
+                return
+
+            direct_url, filename, source_url, error = None, None, None, None
+            for _ in range(RESOLVE_RETRIES):
+                try:
+                    direct_url, filename, source_url, error = self.resolve(job)
+                except Exception as exc:
+                    error = str(exc)
+                if direct_url or self._stop.is_set():
+                    break
+
+            with self._cond:
+                if direct_url:
+                    self.queue.update(job, status=READY, direct_url=direct_url, source_url=source_url or "",
+                                      filename=filename or job.filename, resolved_at=time.time(), error="")
+                elif self._stop.is_set():
+                    self.queue.update(job, status=QUEUED)
+                else:
+                    self.queue.update(job, status=FAILED, error=error or "Could not resolve a download link.")
+                self._cond.notify_all()
+
+    def _next_ready(self, jobs: List[DownloadJob]) -> Optional[DownloadJob]:
+        with self._cond:
+            while not self._stop.is_set():
+                for job in jobs:
+                    if job.status == READY:
+                        if time.time() - job.resolved_at > DIRECT_LINK_TTL:
+                            # Waited too long; let the resolver fetch a fresh link first.
+                            self.queue.update(job, status=QUEUED)
+                            self._cond.notify_all()
+                            continue
+                        self.queue.update(job, status=DOWNLOADING, attempts=job.attempts + 1)
+                        return job
+                if not any(job.status in (QUEUED, RESOLVING) for job in jobs):
+                    return None
+                self._cond.wait(0.5)
+        return None
+
+    def _worker_loop(self, jobs: List[DownloadJob], files: Progress) -> None:
+        while not self._stop.is_set():
+            job = self._next_ready(jobs)
+            if job is None:
+                return
+            self._download(job, files)
+            with self._cond:
+                self._cond.notify_all()
+
+    def _download(self, job: DownloadJob, files: Progress) -> None:
+        filename = sanitize_download_filename(job.filename or f"{job.anime_title} - Ep {job.display_num}.mp4")
+        filepath = os.path.join(self.download_dir, filename)
+        task_id = files.add_task("download", filename=_short(filename), total=None)
+
+        download = SegmentedDownload(
+            job.direct_url,
+            filepath,
+            connections=self.connections,
+            on_start=lambda total, completed: files.reset(task_id, total=total, completed=completed),
+            on_advance=lambda size: files.update(task_id, advance=size),
+            source_url=job.source_url or None,
+            resolve_source=resolve_mediafire_direct,
+            limiter=self.limiter,
+        )
+        with self._cond:
+            self._active[job.id] = download
+        try:
+            download.run()
+        except DownloadCancelled:
+            self.queue.update(job, status=READY)
+        except Exception as error:
+            if self._stop.is_set():
+                self.queue.update(job, status=READY)
+            else:
+                self.queue.update(job, status=FAILED, error=str(error))
+        else:
+            self.queue.update(job, status=DONE, error="")
+            if self.on_complete:
+                # Callbacks (history, etc.) aren't written for concurrent use.
+                with self._complete_lock:
+                    try:
+                        self.on_complete(job)
+                    except Exception:
+                        pass
+        finally:
+            with self._cond:
+                self._active.pop(job.id, None)
+            files.remove_task(task_id)
+
+    def _stop_all(self) -> None:
+        self._stop.set()
+        with self._cond:
+            active = list(self._active.values())
+            self._cond.notify_all()
+        for download in active:
+            download.cancel()
+
+    # -- running ---------------------------------------------------------
+
+    def run(self, console) -> Tuple[int, int]:
+        """Process every pending job, returning ``(completed, failed)``.
+
+        Ctrl+C stops the run but keeps the queue and partial files for the next one.
+        """
+        jobs = self.queue.pending()
+        if not jobs:
+            return 0, 0
+        os.makedirs(self.download_dir, exist_ok=True)
+        self._stop.clear()
+
+        overall = Progress(
+            TextColumn("[bold]{task.description}"),
+            BarColumn(bar_width=36),
+            MofNCompleteColumn(),
+            "•",
+            TimeElapsedColumn(),
+            console=console,
+        )
+        files = Progress(
+            TextColumn("[bold blue]{task.fields[filename]}"),
+            BarColumn(bar_width=28),
+            "[progress.percentage]{task.percentage:>3.1f}%",
+            "•",
+            DownloadColumn(binary_units=True),
+            "•",
+            TransferSpeedColumn(),
+            "•",
+            TimeRemainingColumn(),
+            console=console,
+        )
+        overall_id = overall.add_task("Episodes", total=len(jobs))
+
+        threads = [threading.Thread(target=self._resolver_loop, args=(jobs,), daemon=True)]
+        threads += [threading.Thread(target=self._worker_loop, args=(jobs, files), daemon=True)
+                    for _ in range(self.concurrency)]
+
+        def render():
+            done = self._count(jobs, DONE)
+            failed = self._count(jobs, FAILED)
+            overall.update(overall_id, completed=done + failed)
+            status = Text(f"Downloading {self._count(jobs, DOWNLOADING)} • Ready {self._count(jobs, READY)}"
+                          f" • Queued {self._count(jobs, QUEUED) + self._count(jobs, RESOLVING)}"
+                          f" • Done {done}" + (f" • Failed {failed}" if failed else ""), style="secondary")
+            panel = Panel(
+                Group(overall, Text(""), files, Text(""), Align.center(status)),
+                title=Text("DOWNLOADS", style="title"),
+                subtitle=Text("Ctrl+C to pause - the queue resumes next time", style="secondary"),
+                box=HEAVY,
+                border_style="panel.border",
+                padding=(1, 2),
+                width=100,
+            )
+            return Align.center(panel, vertical="middle", height=console.height)
+
+        try:
+            with Live(render(), console=console, refresh_per_second=8, screen=True) as live:
+                for thread in threads:
+                    thread.start()
+                while not self._finished(jobs) and any(thread.is_alive() for thread in threads):
+                    time.sleep(0.125)
+                    live.update(render())
+                live.update(render())
+        except KeyboardInterrupt:
+            self._stop_all()
+            for thread in threads:
+                thread.join(timeout=5)
+        finally:
+            self._stop.set()
+            with self._cond:
+                self._cond.notify_all()
+
+        completed = self._count(jobs, DONE)
+        failed = self._count(jobs, FAILED)
+        self.queue.prune()
+        return completed, failed
+
+
+def _short(name: str, width: int = 36) -> str:
+    return name if len(name) <= width else name[:width - 3] + "..."
+
@@ -0,0 +1,444 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import requests
+
+from . import network
+from .storage import atomic_write_json
+
+# Built-in download engine.
+# Files are fetched over several HTTP range requests at once, each segment
+# written straight to its offset in a preallocated ``.part`` file. A JSON
+# sidecar next to it records which byte ranges are already on disk, so an
+# interrupted download picks up where it stopped, even after a restart.
+# Servers that don't honour ranges get a plain single-stream download instead.
+
+DEFAULT_CONNECTIONS = 8
+MAX_CONNECTIONS = 16             # Matches network.DEFAULT_POOL_MAXSIZE
+MIN_SEGMENT_SIZE = 1024 * 1024   # Smaller files aren't worth splitting
+CHUNK_SIZE = 256 * 1024
+SEGMENT_RETRIES = 3
+RETRY_BACKOFF = 0.5
+DOWNLOAD_TIMEOUT = (10, 45)
+
+PART_SUFFIX = '.part'
+STATE_SUFFIX = '.part.json'
+STATE_VERSION = 1
+STATE_SAVE_INTERVAL = 1.0
+
+# Statuses that mean the direct link itself has expired.
+_EXPIRED_STATUSES = (403, 404, 410)
+
+_CONTENT_RANGE_RE = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)')
+
+
+class RangeNotSupported(Exception):
+    """The server ignored a Range header (or the file changed under If-Range)."""
+
+
+class DownloadCancelled(Exception):
+    pass
+
+
+@dataclass
+class RemoteFile:
+    total_size: Optional[int]
+    accepts_ranges: bool
+    etag: str = ""
+    last_modified: str = ""
+
+    @property
+    def if_range(self) -> str:
+        """Validator for If-Range: a strong ETag, else Last-Modified.
+
+        Servers must not match a weak ETag (``W/"..."``) in If-Range, so
+        sending one would make every resumed range come back whole.
+        """
+        if self.etag and not self.etag.startswith('W/'):
+            return self.etag
+        return self.last_modified
+
+
+def probe(url: str, headers: dict) -> RemoteFile:
+    """Describe the remote file using a one-byte range request.
+
+    A GET for ``bytes=0-0`` is more reliable than HEAD on file hosts that
+    redirect or answer HEAD differently.
+    """
+    probe_headers = dict(headers)
+    probe_headers['Range'] = 'bytes=0-0'
+    with network.get(url, stream=True, headers=probe_headers, timeout=DOWNLOAD_TIMEOUT) as response:
+        response.raise_for_status()
+        etag = response.headers.get('etag', '')
+        last_modified = response.headers.get('last-modified', '')
+        if response.status_code == 206:
+            match = _CONTENT_RANGE_RE.match(response.headers.get('content-range', ''))
+            if match and match.group(3) != '*':
+                return RemoteFile(int(match.group(3)), True, etag, last_modified)
+            return RemoteFile(None, False, etag, last_modified)
+
+        length = response.headers.get('content-length')
+        total_size = int(length) if length and length.isdigit() else None
+        return RemoteFile(total_size, False, etag, last_modified)
+
+
+def split_ranges(total_size: int, connections: int) -> List[Tuple[int, int]]:
+    """Split ``[0, total_size)`` into at most ``connections`` inclusive byte ranges."""
+    if total_size <= 0:
+        return []
+    return split_gaps([(0, total_size - 1)], connections)
+
+
+def split_gaps(gaps: List[Tuple[int, int]], connections: int) -> List[Tuple[int, int]]:
+    """Cut the largest inclusive ranges in half until there is one per connection."""
+    segments = sorted(gaps)
+    while len(segments) < connections:
+        largest = max(segments, key=lambda r: r[1] - r[0], default=None)
+        if largest is None or largest[1] - largest[0] + 1 < 2 * MIN_SEGMENT_SIZE:
+            break
+        start, end = largest
+        middle = start + (end - start + 1) // 2
+        segments.remove(largest)
+        segments.extend([(start, middle - 1), (middle, end)])
+        segments.sort()
+    return segments
+
+
+def missing_ranges(completed: List[Tuple[int, int]], total_size: int) -> List[Tuple[int, int]]:
+    """Inclusive ranges of ``[0, total_size)`` not covered by ``completed``."""
+    gaps = []
+    position = 0
+    for start, end in sorted(completed):
+        if start > position:
+            gaps.append((position, start - 1))
+        position = max(position, end + 1)
+    if position < total_size:
+        gaps.append((position, total_size - 1))
+    return gaps
+
+
+def preallocate(filepath: str, size: int) -> None:
+    with open(filepath, 'wb') as handle:
+        if size <= 0:
+            return
+        if hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(handle.fileno(), 0, size)
+                return
+            except OSError:
+                pass
+        handle.truncate(size)
+
+
+class BandwidthLimiter:
+    """Token bucket shared by every download that should stay under ``rate`` bytes/s.
+
+    Consumers may overdraw the bucket by one chunk; they then sleep until the
+    debt is paid back, which keeps the long-run rate exact without splitting chunks.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = float(rate)
+        self._tokens = self.rate
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, size: int) -> None:
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= size
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if delay > 0:
+            time.sleep(delay)
+
+
+def part_paths(filepath: str) -> Tuple[str, str]:
+    return filepath + PART_SUFFIX, filepath + STATE_SUFFIX
+
+
+def _write_all(handle, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        written = handle.write(view)
+        view = view[written:]
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class SegmentedDownload:
+    """Download ``url`` to ``filepath`` over up to ``connections`` parallel range requests.
+
+    Data goes to ``filepath + '.part'`` and is renamed into place when done.
+    The sidecar ``filepath + '.part.json'`` stores the URL, the MediaFire
+    page it came from, ETag/Last-Modified, the size and the completed byte
+    ranges. A later run reuses the partial file only if the remote size and
+    validators still match. When the direct link has expired (403/404/410),
+    ``resolve_source(source_url)`` is asked for a fresh one.
+
+    ``on_start(total, completed)`` is called when the size is known (and again
+    if the download restarts as a single stream); ``on_advance(n)`` is called
+    from worker threads as bytes land on disk.
+    """
+
+    def __init__(self, url: str, filepath: str, connections: int = DEFAULT_CONNECTIONS, headers: Optional[dict] = None,
+                 on_start: Optional[Callable[[Optional[int], int], None]] = None,
+                 on_advance: Optional[Callable[[int], None]] = None,
+                 source_url: Optional[str] = None,
+                 resolve_source: Optional[Callable[[str], Optional[str]]] = None,
+                 limiter: Optional[BandwidthLimiter] = None):
+        self.url = url
+        self.filepath = filepath
+        self.part_path, self.state_path = part_paths(filepath)
+        self.connections = max(1, min(int(connections or 1), MAX_CONNECTIONS))
+        self.headers = dict(headers or {'User-Agent': network.BROWSER_USER_AGENT})
+        self.on_start = on_start or (lambda total, completed: None)
+        self.on_advance = on_advance or (lambda n: None)
+        self.source_url = source_url
+        self.resolve_source = resolve_source
+        self.limiter = limiter
+        self.cancelled = threading.Event()
+        self.remote = None
+        self.total_size = None
+        self.segmented = False
+        self.resumed_bytes = 0
+        self._lock = threading.Lock()
+        self._segments = []
+        self._completed = []
+        self._last_save = 0.0
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+    def run(self) -> None:
+        state = self._load_state()
+        if not self.source_url and state:
+            self.source_url = state.get('source_url') or None
+
+        self.remote = self._probe()
+        self.total_size = self.remote.total_size
+
+        if self.remote.accepts_ranges and self.total_size:
+            try:
+                self.segmented = True
+                self._run_segmented(self._plan_segments(state))
+                self._finish()
+                return
+            except RangeNotSupported:
+                # Stop the other segments' cancellation from aborting the fallback.
+                self.cancelled.clear()
+                self.segmented = False
+
+        _remove(self.state_path)
+        self._run_single()
+        self._finish()
+
+    def _probe(self) -> RemoteFile:
+        try:
+            return probe(self.url, self.headers)
+        except requests.HTTPError as error:
+            if not self._refresh_url(self.url, error):
+                raise
+            return probe(self.url, self.headers)
+
+    def _refresh_url(self, failed_url: str, error: Exception) -> bool:
+        """Swap in a freshly resolved direct link; False if that isn't possible."""
+        response = getattr(error, 'response', None)
+        if response is None or response.status_code not in _EXPIRED_STATUSES:
+            return False
+        if not self.source_url or not self.resolve_source:
+            return False
+
+        with self._lock:
+            if self.url != failed_url:
+                # Another segment already refreshed it.
+                return True
+            new_url = self.resolve_source(self.source_url)
+            if not new_url or new_url == failed_url:
+                return False
+            self.url = new_url
+            return True
+
+    def _plan_segments(self, state: Optional[dict]) -> List[List[int]]:
+        """Return ``[start, end, position]`` segments still to fetch, preparing the .part file."""
+        total_size = self.total_size
+        completed = self._usable_ranges(state)
+        if completed is None:
+            preallocate(self.part_path, total_size)
+            completed = []
+
+        gaps = missing_ranges(completed, total_size)
+        self.resumed_bytes = total_size - sum(end - start + 1 for start, end in gaps)
+        self._completed = completed
+        self._segments = [[start, end, start] for start, end in split_gaps(gaps, self.connections)]
+        self._save_state(force=True)
+        return self._segments
+
+    def _usable_ranges(self, state: Optional[dict]) -> Optional[List[Tuple[int, int]]]:
+        """Completed ranges from a previous run, or None if the partial file can't be trusted."""
+        if not state or state.get('version') != STATE_VERSION:
+            return None
+        remote = self.remote
+        if state.get('total_size') != remote.total_size:
+            return None
+        if state.get('etag') and remote.etag:
+            if state['etag'] != remote.etag:
+                return None
+        elif state.get('last_modified') and remote.last_modified:
+            if state['last_modified'] != remote.last_modified:
+                return None
+        try:
+            if os.path.getsize(self.part_path) != remote.total_size:
+                return None
+            return [(int(start), int(end)) for start, end in state.get('completed', [])]
+        except (OSError, TypeError, ValueError):
+            return None
+
+    def _load_state(self) -> Optional[dict]:
+        if not os.path.exists(self.part_path):
+            return None
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as handle:
+                data = json.load(handle)
+            return data if isinstance(data, dict) else None
+        except (OSError, ValueError):
+            return None
+
+    def _save_state(self, force: bool = False) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_save < STATE_SAVE_INTERVAL:
+                return
+            self._last_save = now
+            completed = list(self._completed)
+            completed.extend((start, position - 1) for start, _, position in self._segments if position > start)
+            data = {
+                'version': STATE_VERSION,
+                'url': self.url,
+                'source_url': self.source_url or '',
+                'etag': self.remote.etag,
+                'last_modified': self.remote.last_modified,
+                'total_size': self.total_size,
+                'completed': [list(r) for r in sorted(completed)],
+            }
+        try:
+            atomic_write_json(Path(self.state_path), data, indent=None, fsync=False)
+        except (OSError, TypeError, ValueError):
+            pass
+
+    def _finish(self) -> None:
+        os.replace(self.part_path, self.filepath)
+        _remove(self.state_path)
+
+    def _run_single(self) -> None:
+        last_error = None
+        for attempt in range(SEGMENT_RETRIES):
+            try:
+                with network.get(self.url, stream=True, headers=self.headers, timeout=DOWNLOAD_TIMEOUT) as response:
+                    response.raise_for_status()
+                    length = response.headers.get('content-length')
+                    self.total_size = int(length) if length and length.isdigit() else None
+                    self.on_start(self.total_size, 0)
+                    with open(self.part_path, 'wb') as handle:
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            if self.cancelled.is_set():
+                                raise DownloadCancelled()
+                            if not chunk:
+                                continue
+                            handle.write(chunk)
+                            self.on_advance(len(chunk))
+                            if self.limiter:
+                                self.limiter.consume(len(chunk))
+                return
+            except requests.RequestException as error:
+                last_error = error
+                if not self._refresh_url(self.url, error):
+                    time.sleep(RETRY_BACKOFF * (attempt + 1))
+        raise last_error
+
+    def _run_segmented(self, segments: List[List[int]]) -> None:
+        self.on_start(self.total_size, self.resumed_bytes)
+        if not segments:
+            return
+
+        pool = ThreadPoolExecutor(max_workers=len(segments), thread_name_prefix="download-segment")
+        futures = [pool.submit(self._fetch_segment, segment) for segment in segments]
+        try:
+            pending = set(futures)
+            while pending:
+                # Short waits keep the main thread responsive to Ctrl+C.
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_EXCEPTION)
+                for future in done:
+                    error = future.exception()
+                    if error is not None:
+                        raise error
+        except BaseException:
+            self.cancelled.set()
+            raise
+        finally:
+            pool.shutdown(wait=True)
+            self._save_state(force=True)
+
+    def _fetch_segment(self, segment: List[int]) -> None:
+        start, end, _ = segment
+        attempt = 0
+        validator = self.remote.if_range
+        while segment[2] <= end:
+            if self.cancelled.is_set():
+                raise DownloadCancelled()
+
+            position = segment[2]
+            url = self.url
+            headers = dict(self.headers)
+            headers['Range'] = f'bytes={position}-{end}'
+            if validator:
+                # If the file changed since the probe the server sends it whole (200).
+                headers['If-Range'] = validator
+            try:
+                with network.get(url, stream=True, headers=headers, timeout=DOWNLOAD_TIMEOUT) as response:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise RangeNotSupported(url)
+
+                    # Unbuffered, so the sidecar never claims bytes still sitting in a buffer.
+                    with open(self.part_path, 'r+b', buffering=0) as handle:
+                        handle.seek(position)
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            if self.cancelled.is_set():
+                                raise DownloadCancelled()
+                            if not chunk:
+                                continue
+                            chunk = chunk[:end - segment[2] + 1]
+                            _write_all(handle, chunk)
+                            with self._lock:
+                                segment[2] += len(chunk)
+                            self.on_advance(len(chunk))
+                            self._save_state()
+                            if self.limiter:
+                                self.limiter.consume(len(chunk))
+                            if segment[2] > end:
+                                break
+                if segment[2] <= end:
+                    raise requests.ConnectionError(f"Segment {start}-{end} ended early at {segment[2]}")
+            except requests.RequestException as error:
+                # Bytes already written are kept; the retry resumes at the segment position.
+                attempt = 1 if segment[2] > position else attempt + 1
+                if attempt > SEGMENT_RETRIES:
+                    raise
+                if not self._refresh_url(url, error):
+                    time.sleep(RETRY_BACKOFF * attempt)
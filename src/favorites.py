@@ -1,72 +1,94 @@
-import json
-from pathlib import Path
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from .storage import atomic_write_json
+from typing import Optional
+
+from .userdb import UserDatabase, get_user_db
+from .writebehind import WriteBehind, get_write_behind, load_rows
 
 class FavoritesManager:
-    # Maximum favorites to prevent database bloat and ensure performance
-    MAX_FAVORITES = 100
-    
-    def __init__(self):
-        self.file_path = self._get_path()
+    def __init__(self, db: Optional[UserDatabase] = None, writer: Optional[WriteBehind] = None):
+        self.db = db or get_user_db()
+        # Changes apply to self.favorites at once and reach the database through the write-behind journal.
+        self.writer = writer or get_write_behind()
+        self._lock = threading.Lock()
+        self._version = self._data_version()
+        # Oldest first; re-adding a favorite moves it to the end.
         self.favorites = self._load()
 
-    def _get_path(self) -> Path:
-        home_dir = Path.home()
-        db_dir = home_dir / ".ani-cli-arabic" / "database"
-        db_dir.mkdir(parents=True, exist_ok=True)
-        return db_dir / "favorites.json"
+    @staticmethod
+    def _entry(title, thumbnail, added_at) -> dict:
+        return {'title': title, 'thumbnail': thumbnail, 'added_at': added_at}
 
-    def _load(self) -> dict:
-        if not self.file_path.exists():
-            return {}
+    def _load(self) -> OrderedDict:
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if not isinstance(data, dict):
-                    return {}
-                return data
-        except (json.JSONDecodeError, IOError, OSError):
-            return {}
+            rows = load_rows(self.db, 'favorites', "removed_at IS NULL", order_by="added_at")
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to load favorites: {e}", file=sys.stderr)
+            return OrderedDict()
+        return OrderedDict((row[0], self._entry(*row[1:4])) for row in rows)
 
-    def save(self):
+    def _data_version(self) -> Optional[int]:
         try:
-            atomic_write_json(self.file_path, self.favorites, indent=4, ensure_ascii=False)
-        except (IOError, OSError, ValueError, TypeError) as e:
-            import sys
-            print(f"Warning: Failed to save favorites: {e}", file=sys.stderr)
+            return self.db.data_version()
+        except sqlite3.Error:
+            return None
+
+    def _sync(self) -> None:
+        """Reload if another process committed since we last looked (see HistoryManager._sync)."""
+        version = self._data_version()
+        if version is None or version == self._version:
+            return
+        self.writer.flush()
+        favorites = self._load()
+        for anime_id, row in self.writer.pending_rows('favorites'):
+            if row is None or row[4] is not None:
+                favorites.pop(anime_id, None)
+            else:
+                favorites[anime_id] = self._entry(*row[1:4])
+                favorites.move_to_end(anime_id)
+        with self._lock:
+            self.favorites = favorites
+            self._version = version
+
+    def _store(self, anime_id: str, removed_at: Optional[str] = None) -> None:
+        entry = self.favorites[anime_id]
+        self.writer.put('favorites', (anime_id, entry['title'], entry['thumbnail'] or '', entry['added_at'], removed_at))
 
     def add(self, anime_id, title, thumbnail):
+        self._sync()
         anime_id_str = str(anime_id)
-        if anime_id_str in self.favorites:
-            # Update existing favorite
-            self.favorites[anime_id_str]['added_at'] = datetime.now().isoformat()
-            self.save()
-            return
-        
-        if len(self.favorites) >= self.MAX_FAVORITES:
-            oldest = min(self.favorites.items(), key=lambda x: x[1]['added_at'])
-            del self.favorites[oldest[0]]
-        
-        self.favorites[str(anime_id)] = {
-            'title': title,
-            'thumbnail': thumbnail,
-            'added_at': datetime.now().isoformat()
-        }
-        self.save()
+        with self._lock:
+            if anime_id_str in self.favorites:
+                # Update existing favorite
+                self.favorites[anime_id_str]['added_at'] = datetime.now().isoformat()
+                self.favorites.move_to_end(anime_id_str)
+                self._store(anime_id_str)
+                return
+
+            self.favorites[anime_id_str] = {
+                'title': title,
+                'thumbnail': thumbnail,
+                'added_at': datetime.now().isoformat()
+            }
+            self._store(anime_id_str)
 
     def remove(self, anime_id):
-        if str(anime_id) in self.favorites:
-            del self.favorites[str(anime_id)]
-            self.save()
+        self._sync()
+        with self._lock:
+            if str(anime_id) in self.favorites:
+                # Kept as a removal stamp so it can be ordered against adds from other processes.
+                self._store(str(anime_id), removed_at=datetime.now().isoformat())
+                del self.favorites[str(anime_id)]
 
     def is_favorite(self, anime_id):
+        self._sync()
         return str(anime_id) in self.favorites
 
     def get_all(self):
-        # Return list sorted by added date (newest first)
-        return sorted(
-            [{'anime_id': k, 'id': k, **v} for k, v in self.favorites.items()],
-            key=lambda x: x['added_at'],
-            reverse=True
-        )
+        # Newest first
+        self._sync()
+        with self._lock:
+            return [{'anime_id': k, 'id': k, **v} for k, v in reversed(self.favorites.items())]
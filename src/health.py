@@ -0,0 +1,223 @@
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+# Per-host health tracking.
+# Every request through network.py records its latency and outcome here. The
+# observed latency percentiles replace the fixed timeouts once enough samples
+# exist, and a host that keeps failing gets its circuit opened so callers fail
+# fast (and fall back to cached data) instead of waiting out every timeout.
+
+# Latency histogram bucket upper bounds, in seconds. The last bucket is open-ended.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+MIN_SAMPLES = 20             # Samples needed before timeouts adapt
+TIMEOUT_PERCENTILE = 0.99
+TIMEOUT_MULTIPLIER = 3.0     # Headroom over the observed percentile
+MIN_TIMEOUT = 2.0
+
+FAILURE_THRESHOLD = 5        # Consecutive failures that open the circuit
+OPEN_SECONDS = 15.0          # First cool-down; doubles on every failed probe
+MAX_OPEN_SECONDS = 120.0
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"{host} is unavailable, retrying in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; percentiles are bucket upper bounds."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.total:
+            return None
+        target = fraction * self.total
+        running = 0
+        for idx, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                return self.buckets[idx] if idx < len(self.buckets) else self.max
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.total if self.total else None
+
+
+class HostHealth:
+    """Latency, outcome counters and circuit state for one host. Not thread-safe on its own."""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.latency = LatencyHistogram()
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.open_until = 0.0
+        self.open_seconds = OPEN_SECONDS
+        self.probing = False
+        self.last_error = ''
+
+    def timeout(self, ceiling: float) -> float:
+        if self.latency.total < MIN_SAMPLES:
+            return ceiling
+        observed = self.latency.percentile(TIMEOUT_PERCENTILE) or ceiling
+        return min(ceiling, max(MIN_TIMEOUT, observed * TIMEOUT_MULTIPLIER))
+
+
+class HealthTracker:
+    """Thread-safe registry of HostHealth entries keyed by hostname."""
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD):
+        self.failure_threshold = failure_threshold
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, HostHealth] = {}
+
+    def _entry(self, host: str) -> HostHealth:
+        entry = self._hosts.get(host)
+        if entry is None:
+            entry = self._hosts[host] = HostHealth(host)
+        return entry
+
+    def before_request(self, host: str) -> None:
+        """Raise CircuitOpenError if ``host`` should not be contacted right now.
+
+        Once the cool-down has passed a single probe request is let through
+        (half-open); everyone else keeps failing fast until it comes back.
+        """
+        with self._lock:
+            entry = self._entry(host)
+            if entry.state == CLOSED:
+                return
+            now = time.monotonic()
+            if entry.state == OPEN and now >= entry.open_until:
+                entry.state = HALF_OPEN
+            if entry.state == HALF_OPEN and not entry.probing:
+                entry.probing = True
+                return
+            entry.rejected += 1
+            retry_in = max(0.0, entry.open_until - now)
+        raise CircuitOpenError(host, retry_in)
+
+    def record_success(self, host: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._entry(host)
+            entry.latency.record(seconds)
+            entry.successes += 1
+            entry.consecutive_failures = 0
+            entry.state = CLOSED
+            entry.probing = False
+            entry.open_seconds = OPEN_SECONDS
+
+    def record_failure(self, host: str, error: str = '') -> None:
+        with self._lock:
+            entry = self._entry(host)
+            entry.failures += 1
+            entry.consecutive_failures += 1
+            entry.last_error = error
+            if entry.state == HALF_OPEN:
+                # The probe failed: back off for longer.
+                entry.open_seconds = min(MAX_OPEN_SECONDS, entry.open_seconds * 2)
+                self._open(entry)
+            elif entry.consecutive_failures >= self.failure_threshold:
+                self._open(entry)
+
+    @staticmethod
+    def _open(entry: HostHealth) -> None:
+        entry.state = OPEN
+        entry.probing = False
+        entry.open_until = time.monotonic() + entry.open_seconds
+
+    def release_probe(self, host: str) -> None:
+        """A half-open probe ended without a verdict (e.g. a 4xx); let the next one through."""
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is not None:
+                entry.probing = False
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            entry = self._hosts.get(host)
+            return entry is not None and entry.state == OPEN and time.monotonic() < entry.open_until
+
+    def timeout_for(self, host: str, timeout):
+        """Adapt a caller's timeout (a number or a (connect, read) tuple) to the host's latency.
+
+        The caller's value is the ceiling; the read timeout shrinks towards
+        what the host actually needs once enough samples have been seen.
+        """
+        with self._lock:
+            entry = self._entry(host)
+            if isinstance(timeout, tuple):
+                connect, read = timeout
+                return (connect, entry.timeout(read) if read is not None else None)
+            return entry.timeout(timeout)
+
+    def snapshot(self) -> List[Dict]:
+        """Per-host stats for the diagnostics screen, busiest hosts first."""
+        rows = []
+        now = time.monotonic()
+        with self._lock:
+            for host, entry in self._hosts.items():
+                latency = entry.latency
+                rows.append({
+                    'host': host,
+                    'state': entry.state,
+                    'requests': entry.successes + entry.failures,
+                    'failures': entry.failures,
+                    'rejected': entry.rejected,
+                    'p50': latency.percentile(0.5),
+                    'p90': latency.percentile(0.9),
+                    'p99': latency.percentile(0.99),
+                    'mean': latency.mean,
+                    'max': latency.max if latency.total else None,
+                    'timeout': entry.timeout(10.0) if latency.total >= MIN_SAMPLES else None,
+                    'retry_in': max(0.0, entry.open_until - now) if entry.state == OPEN else 0.0,
+                    'last_error': entry.last_error,
+                    'histogram': list(zip(LATENCY_BUCKETS + (float('inf'),), latency.counts)),
+                })
+        rows.sort(key=lambda row: row['requests'], reverse=True)
+        return rows
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hosts.clear()
+
+
+health = HealthTracker()
+
+
+def is_host_failure(response: Optional[requests.Response] = None, error: Optional[BaseException] = None) -> Tuple[bool, str]:
+    """Whether an outcome counts against the host: connection errors, timeouts and 5xx answers."""
+    if error is not None:
+        return isinstance(error, (requests.ConnectionError, requests.Timeout)), type(error).__name__
+    if response is not None and response.status_code >= 500:
+        return True, f"HTTP {response.status_code}"
+    return False, ''
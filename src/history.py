@@ -1,72 +1,249 @@
-import json
-from pathlib import Path
-from datetime import datetime
-from .storage import atomic_write_json
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Optional, Sequence
+
+from .player import COMPLETION_RATIO
+from .userdb import UserDatabase, get_user_db
+from .writebehind import WriteBehind, get_write_behind, load_rows
+
+# Every playback is appended to the watch log. Log entries older than this are
+# compacted down to the latest watch (and the latest completed watch) of each
+# episode; how far into an episode you got years ago isn't worth keeping.
+WATCH_LOG_KEEP_DAYS = 180
+COMPACT_EVERY_DAYS = 7
+COMPACT_TASK = "watch_log_compaction"
+
+
+# Entries with a newer one for the same episode and completion state.
+# Window functions need SQLite 3.25; older libraries use a correlated
+# subquery (served by the per-anime index), which picks the same rows.
+if sqlite3.sqlite_version_info >= (3, 25, 0):
+    _COMPACT_SQL = (
+        "DELETE FROM watch_log WHERE entry_id IN ("
+        " SELECT entry_id FROM ("
+        "  SELECT entry_id, watched_at, ROW_NUMBER() OVER ("
+        "   PARTITION BY anime_id, episode, completed ORDER BY watched_at DESC, entry_id DESC) AS newer"
+        "  FROM watch_log)"
+        " WHERE newer > 1 AND watched_at < ?)"
+    )
+else:
+    _COMPACT_SQL = (
+        "DELETE FROM watch_log WHERE watched_at < ? AND EXISTS ("
+        " SELECT 1 FROM watch_log n WHERE n.anime_id = watch_log.anime_id"
+        " AND n.episode = watch_log.episode AND n.completed = watch_log.completed"
+        " AND (n.watched_at > watch_log.watched_at"
+        "  OR (n.watched_at = watch_log.watched_at AND n.entry_id > watch_log.entry_id)))"
+    )
+
+
+def compact_watch_log(db: UserDatabase, keep_days: int = WATCH_LOG_KEEP_DAYS) -> int:
+    """Drop superseded log entries older than ``keep_days``; returns how many were removed."""
+    cutoff = (datetime.now() - timedelta(days=keep_days)).isoformat()
+    with db.transaction() as conn:
+        removed = conn.execute(_COMPACT_SQL, (cutoff,)).rowcount
+    db.mark_run(COMPACT_TASK)
+    return removed
+
+
+class HistoryView(Sequence):
+    """Newest-first view of the history for menus.
+
+    Nothing is copied when the view is taken: rows are read straight off the
+    manager's OrderedDict, from the newest end, and the dicts the menus read
+    are built only for the rows looked at. Showing a screenful of history
+    costs the same with ten entries or ten thousand; reaching row ``i``
+    walks ``i`` entries.
+
+    The view follows changes this process makes, like the menus expect when
+    they come back from playback; a reload after another process wrote leaves
+    it on the previous contents until ``get_history`` is called again.
+    """
+
+    def __init__(self, history: OrderedDict, lock: threading.Lock):
+        self._history = history
+        self._lock = lock
+
+    def __len__(self):
+        return len(self._history)
+
+    def _entries(self, start: int, stop: int) -> list:
+        with self._lock:
+            return list(islice(reversed(self._history.items()), start, stop))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return [self._item(entry) for entry in self._entries(start, max(start, stop))]
+        if index < 0:
+            index += len(self)
+        entries = self._entries(index, index + 1) if index >= 0 else []
+        if not entries:
+            raise IndexError("history index out of range")
+        return self._item(entries[0])
+
+    def __iter__(self):
+        for entry in self._entries(0, None):
+            yield self._item(entry)
+
+    @staticmethod
+    def _item(entry):
+        anime_id, data = entry
+        return {
+            'anime_id': anime_id,
+            'title': data.get('title') or 'Unknown',
+            'episode': data.get('episode') or '?',
+            'last_updated': data.get('last_updated', ''),
+            'position': data.get('position'),
+            'duration': data.get('duration'),
+            'completed': data.get('completed', True),
+        }
+
 
 class HistoryManager:
-    # Maximum history entries to maintain reasonable file size and load times
-    MAX_HISTORY_SIZE = 100
-    
-    def __init__(self):
-        self.history_file = self._get_history_path()
+    def __init__(self, db: Optional[UserDatabase] = None, writer: Optional[WriteBehind] = None):
+        self.db = db or get_user_db()
+        # Changes apply to self.history at once and reach the database through the write-behind journal.
+        self.writer = writer or get_write_behind()
+        self._lock = threading.Lock()
+        self._version = self._data_version()
+        # Latest watch per anime, least recent first; mark_watched moves an anime to the end.
         self.history = self._load_history()
+        # anime_id -> {episode: latest log entry}, loaded from the watch log the first time it's asked for.
+        self._episodes: Dict[str, Dict[str, dict]] = {}
+        self._schedule_compaction()
 
-    def _get_history_path(self) -> Path:
-        home_dir = Path.home()
-        db_dir = home_dir / ".ani-cli-arabic" / "database"
-        db_dir.mkdir(parents=True, exist_ok=True)
-        return db_dir / "history.json"
+    @staticmethod
+    def _entry(title, episode, last_updated, position, duration, completed) -> dict:
+        return {
+            'episode': episode, 'title': title, 'last_updated': last_updated,
+            'position': position, 'duration': duration, 'completed': completed != 0,
+        }
 
-    def _load_history(self) -> dict:
-        if not self.history_file.exists():
-            return {}
+    def _load_history(self) -> OrderedDict:
         try:
-            with open(self.history_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if not isinstance(data, dict):
-                    return {}
-                return data
-        except (json.JSONDecodeError, IOError, OSError):
-            return {}
+            rows = load_rows(self.db, 'history', order_by="last_updated")
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to load history: {e}", file=sys.stderr)
+            return OrderedDict()
+        return OrderedDict((row[0], self._entry(*row[1:])) for row in rows)
 
-    def save_history(self):
+    def _data_version(self) -> Optional[int]:
         try:
-            if len(self.history) > self.MAX_HISTORY_SIZE:
-                sorted_items = sorted(
-                    self.history.items(),
-                    key=lambda x: x[1].get('last_updated', ''),
-                    reverse=True
-                )
-                self.history = dict(sorted_items[:self.MAX_HISTORY_SIZE])
-
-            atomic_write_json(self.history_file, self.history, indent=4, ensure_ascii=False)
-        except (IOError, OSError, ValueError, TypeError) as e:
-            import sys
-            print(f"Warning: Failed to save history: {e}", file=sys.stderr)
-
-    def mark_watched(self, anime_id, episode_num, anime_title):
-        self.history[str(anime_id)] = {
-            'episode': str(episode_num),
+            return self.db.data_version()
+        except sqlite3.Error:
+            return None
+
+    def _sync(self) -> None:
+        """Reload if another process committed since we last looked.
+
+        Our own pending changes are flushed first (the database keeps whichever
+        side changed a row last), and anything still unflushed is laid over the
+        reloaded view.
+        """
+        version = self._data_version()
+        if version is None or version == self._version:
+            return
+        self.writer.flush()
+        history = self._load_history()
+        for anime_id, row in self.writer.pending_rows('history'):
+            if row is not None:
+                history[anime_id] = self._entry(*row[1:])
+                history.move_to_end(anime_id)
+        with self._lock:
+            self.history = history
+            self._episodes = {}
+            self._version = version
+
+    def _schedule_compaction(self) -> None:
+        if not self.db.persistent:
+            return
+
+        def run():
+            try:
+                last_run = self.db.last_run(COMPACT_TASK)
+                if last_run is None or time.time() - last_run > COMPACT_EVERY_DAYS * 86400:
+                    compact_watch_log(self.db)
+            except sqlite3.Error:
+                pass
+
+        threading.Thread(target=run, name="watch-log-compaction", daemon=True).start()
+
+    def save_history(self):
+        """Ask for pending changes to be written soon; they are journaled already."""
+        self.writer.request_flush()
+
+    def mark_watched(self, anime_id, episode_num, anime_title, position=None, duration=None, completed=None):
+        """Record a watch. Without a completion flag, the episode counts as watched
+        if the player reported nothing or got at least near the end."""
+        self._sync()
+        anime_id = str(anime_id)
+        episode = str(episode_num)
+        if completed is None:
+            completed = position is None or bool(duration and position >= duration * COMPLETION_RATIO)
+        entry = {
+            'episode': episode,
             'title': anime_title,
-            'last_updated': datetime.now().isoformat()
+            'last_updated': datetime.now().isoformat(),
+            'position': position,
+            'duration': duration,
+            'completed': bool(completed),
         }
-        self.save_history()
+        episodes = self._episodes_for(anime_id)
+        with self._lock:
+            self.history[anime_id] = entry
+            self.history.move_to_end(anime_id)
+            episodes[episode] = entry
+            self.writer.put('history', (
+                anime_id, anime_title, episode, entry['last_updated'], position, duration, int(entry['completed'])
+            ))
+            self.writer.put('watch_log', (
+                uuid.uuid4().hex, anime_id, anime_title, episode, entry['last_updated'],
+                position, duration, int(entry['completed'])
+            ))
+
+    def _episodes_for(self, anime_id: str) -> Dict[str, dict]:
+        episodes = self._episodes.get(anime_id)
+        if episodes is not None:
+            return episodes
+        try:
+            rows = load_rows(self.db, 'watch_log', "anime_id=?", (anime_id,), order_by="watched_at")
+        except sqlite3.Error:
+            rows = []
+        pending = [row for _, row in self.writer.pending_rows('watch_log') if row is not None and row[1] == anime_id]
+        rows = list(rows) + sorted(pending, key=lambda row: row[4])
+        episodes = {row[3]: self._entry(row[2], *row[3:]) for row in rows}
+        with self._lock:
+            return self._episodes.setdefault(anime_id, episodes)
 
     def get_last_watched(self, anime_id):
+        self._sync()
         data = self.history.get(str(anime_id))
         if data:
             return data.get('episode')
         return None
-    
-    def get_history(self):
-        items = []
-        for anime_id, data in self.history.items():
-            items.append({
-                'anime_id': anime_id,
-                'title': data.get('title', 'Unknown'),
-                'episode': data.get('episode', '?'),
-                'last_updated': data.get('last_updated', '')
-            })
-        # Sort by last_updated, most recent first
-        items.sort(key=lambda x: x['last_updated'], reverse=True)
-        return items
\ No newline at end of file
+
+    def get_watched_episodes(self, anime_id) -> set:
+        """Episodes of this anime that were watched to the end at their latest viewing."""
+        self._sync()
+        episodes = self._episodes_for(str(anime_id))
+        return {episode for episode, entry in list(episodes.items()) if entry['completed']}
+
+    def get_resume_position(self, anime_id, episode_num) -> Optional[float]:
+        """Where playback of this episode stopped, if it was left unfinished."""
+        self._sync()
+        entry = self._episodes_for(str(anime_id)).get(str(episode_num))
+        if not entry or entry['completed'] or not entry['position']:
+            return None
+        return entry['position']
+
+    def get_history(self) -> HistoryView:
+        self._sync()
+        return HistoryView(self.history, self._lock)
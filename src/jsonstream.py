@@ -0,0 +1,199 @@
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator, List
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Incremental JSON for large API responses.
+# The catalog endpoints answer with one top-level array. Instead of buffering
+# the whole body and parsing it in one go, ArrayStreamParser decodes each
+# element as soon as its last byte has arrived, so callers get the first rows
+# before the download finishes and only the unparsed tail of the body is held.
+# Elements go through the stdlib's C scanner (raw_decode); whole documents
+# (cache files, non-array bodies) use orjson when it is installed.
+
+STREAM_CHUNK_SIZE = 16 * 1024
+# A single array element larger than this is treated as a malformed body.
+MAX_ELEMENT_CHARS = 1024 * 1024
+
+# The decoder's C scanner, called directly to skip raw_decode's wrapper on every element.
+_scan_once = json.JSONDecoder().scan_once
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_WHITESPACE_CHARS = ' \t\n\r'
+_NUMBER_TAIL = re.compile(r'[0-9eE.+\-]*')
+_CONTAINERS = (dict, list, str)
+
+# Parser states
+_BEFORE = 0      # Nothing but whitespace seen yet
+_ITEMS = 1       # Inside the top-level array
+_DONE = 2        # Top-level array closed
+_DOCUMENT = 3    # Not an array: buffered and parsed whole on close()
+
+
+def loads(data) -> Any:
+    """Parse a complete JSON document (bytes or str) with the fastest available backend."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def backend() -> str:
+    return "orjson" if ORJSON_AVAILABLE else "json"
+
+
+class ArrayStreamParser:
+    """Feed-style parser yielding the elements of a top-level JSON array.
+
+    ``feed(chunk)`` returns the elements completed by that chunk and
+    ``close()`` checks the document ended cleanly. A body that isn't an array
+    (an error object, ``null``) is buffered instead and returned by ``close()``.
+    Malformed input raises ValueError.
+    """
+
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._text = ""
+        self._parts: List[str] = []
+        self._state = _BEFORE
+        self._need_separator = False
+        self._after_comma = False
+
+    @property
+    def is_array(self) -> bool:
+        return self._state in (_ITEMS, _DONE)
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        decoded = self._utf8.decode(chunk)
+        if self._state == _DOCUMENT:
+            self._parts.append(decoded)
+            return []
+
+        text = self._text + decoded if self._text else decoded
+        end = len(text)
+        pos = 0
+        items: List[Any] = []
+        while True:
+            if pos < end and text[pos] in _WHITESPACE_CHARS:
+                pos += 1
+                if pos < end and text[pos] in _WHITESPACE_CHARS:
+                    pos = _WHITESPACE.match(text, pos).end()
+            if pos >= end:
+                break
+            char = text[pos]
+
+            if self._state == _ITEMS:
+                if self._need_separator:
+                    if char == ',':
+                        self._need_separator = False
+                        self._after_comma = True
+                        pos += 1
+                    elif char == ']':
+                        self._state = _DONE
+                        pos += 1
+                    else:
+                        raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+                    continue
+                if char == ']' and not self._after_comma:
+                    self._state = _DONE
+                    pos += 1
+                    continue
+                cut = text.rfind('},', pos)
+                if cut != -1:
+                    # Fast path for arrays of objects: parse everything up to the last "},"
+                    # in one backend call. If that "}," is inside a string or closes a
+                    # nested object, the slice can't be valid JSON (a string or brace is
+                    # left open), so a successful parse always ends on an element boundary.
+                    try:
+                        batch = loads('[' + text[pos:cut + 1] + ']')
+                    except ValueError:
+                        batch = None
+                    if batch is not None:
+                        items.extend(batch)
+                        pos = cut + 2
+                        self._after_comma = True
+                        continue
+                try:
+                    value, value_end = _scan_once(text, pos)
+                except (StopIteration, json.JSONDecodeError):
+                    # Most likely the element continues in the next chunk.
+                    if end - pos > MAX_ELEMENT_CHARS:
+                        raise ValueError("JSON array element too large or malformed")
+                    break
+                if value.__class__ not in _CONTAINERS:
+                    # A number may still be cut short ("12" of "123", "1." of "1.5"):
+                    # only take it once the separator after it has arrived.
+                    after = _WHITESPACE.match(text, value_end).end()
+                    if after >= end:
+                        break
+                    if text[after] not in ',]':
+                        if _NUMBER_TAIL.match(text, value_end).end() >= end:
+                            break
+                        raise ValueError(f"Expected ',' or ']' in JSON array, got {text[after]!r}")
+                items.append(value)
+                pos = value_end
+                if pos < end and text[pos] == ',':
+                    # Common case, handled here to save a loop round per element.
+                    pos += 1
+                    self._after_comma = True
+                else:
+                    self._need_separator = True
+                continue
+
+            if self._state == _BEFORE:
+                if char != '[':
+                    self._state = _DOCUMENT
+                    self._parts.append(text[pos:])
+                    self._text = ""
+                    return items
+                self._state = _ITEMS
+                pos += 1
+                continue
+
+            raise ValueError("Extra data after JSON array")
+
+        self._text = text[pos:]
+        return items
+
+    def close(self) -> Any:
+        """Finish parsing; returns the whole document when it wasn't an array, else None."""
+        tail = self._utf8.decode(b"", final=True)
+        if self._state == _DOCUMENT:
+            return loads("".join(self._parts) + tail)
+        if self._state == _BEFORE:
+            return loads(self._text + tail)
+        if self._state == _ITEMS:
+            raise ValueError("Truncated JSON array")
+        if (self._text + tail).strip():
+            raise ValueError("Extra data after JSON array")
+        return None
+
+
+def iter_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Elements of the JSON array in ``chunks``, as each one completes.
+
+    Raises ValueError if the document is malformed or is not an array.
+    """
+    parser = ArrayStreamParser()
+    for chunk in chunks:
+        if chunk:
+            yield from parser.feed(chunk)
+    document = parser.close()
+    if not parser.is_array:
+        raise ValueError(f"Expected a JSON array, got {type(document).__name__}")
+
+
+def load_chunks(chunks: Iterable[bytes]) -> Any:
+    """Parse a whole JSON document from ``chunks``, building arrays element by element."""
+    parser = ArrayStreamParser()
+    items: List[Any] = []
+    for chunk in chunks:
+        if chunk:
+            items.extend(parser.feed(chunk))
+    document = parser.close()
+    return items if parser.is_array else document
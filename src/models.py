@@ -1,36 +1,410 @@
+import math
+import sys
+from bisect import bisect_left, bisect_right
+from array import array
 from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Union
+
+ANIME_FIELDS = (
+    'id', 'title_en', 'title_jp', 'type', 'episodes', 'status', 'genres', 'mal_id',
+    'relation_id', 'score', 'rank', 'popularity', 'rating', 'premiered', 'creators',
+    'duration', 'thumbnail', 'title_romaji', 'trailer', 'yt_trailer',
+)
+
+# Low-cardinality fields repeated across thousands of results; interned so
+# every result shares one string object per distinct value.
+CATEGORICAL_FIELDS = ('type', 'episodes', 'status', 'genres', 'rating', 'premiered', 'creators', 'duration')
+NUMERIC_FIELDS = ('score', 'rank', 'popularity')
+
+
+def _text(value) -> str:
+    # A missing field reads back as empty, never as "None".
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+def _intern(value) -> str:
+    return sys.intern(_text(value))
+
+
+def _compact_number(value) -> Union[int, float, str]:
+    """Numeric text as an int/float when it converts back to exactly the same text.
+
+    "nan" and "inf" stay text: a NaN would break equality and sorting.
+    """
+    text = _text(value)
+    try:
+        number = int(text)
+        if str(number) == text:
+            return number
+    except ValueError:
+        pass
+    try:
+        number = float(text)
+        if math.isfinite(number) and repr(number) == text:
+            return number
+    except ValueError:
+        pass
+    return sys.intern(text)
+
 
-@dataclass
 class AnimeResult:
-    id: str
-    title_en: str
-    title_jp: str
-    type: str
-    episodes: str
-    status: str
-    genres: str
-    mal_id: str
-    relation_id: str
-    score: str
-    rank: str
-    popularity: str
-    rating: str
-    premiered: str
-    creators: str
-    duration: str
-    thumbnail: str
-    title_romaji: str = ""
-    trailer: str = ""
-    yt_trailer: str = ""
+    """One catalog entry.
+
+    Slotted rather than a dataclass so large lists don't carry a ``__dict__``
+    per result. Categorical fields are interned, score/rank/popularity are kept
+    as numbers when they are plain numbers, and the thumbnail URL is composed
+    from a shared base on access. Every field still reads back as the same
+    string the API sent.
+    """
+
+    __slots__ = (
+        'id', 'title_en', 'title_jp', 'type', 'episodes', 'status', 'genres', 'mal_id',
+        'relation_id', '_score', '_rank', '_popularity', 'rating', 'premiered', 'creators',
+        'duration', '_thumbnail_base', '_thumbnail_file', 'title_romaji', 'trailer', 'yt_trailer',
+    )
+
+    def __init__(self, id: str, title_en: str, title_jp: str, type: str, episodes: str, status: str,
+                 genres: str, mal_id: str, relation_id: str, score: str, rank: str, popularity: str,
+                 rating: str, premiered: str, creators: str, duration: str, thumbnail: str,
+                 title_romaji: str = "", trailer: str = "", yt_trailer: str = "", thumbnail_base: str = ""):
+        self.id = id
+        self.title_en = title_en
+        self.title_jp = title_jp
+        self.type = _intern(type)
+        self.episodes = _intern(episodes)
+        self.status = _intern(status)
+        self.genres = _intern(genres)
+        self.mal_id = mal_id
+        self.relation_id = relation_id
+        self._score = _compact_number(score)
+        self._rank = _compact_number(rank)
+        self._popularity = _compact_number(popularity)
+        self.rating = _intern(rating)
+        self.premiered = _intern(premiered)
+        self.creators = _intern(creators)
+        self.duration = _intern(duration)
+        # With a base, ``thumbnail`` is only the file name and the URL is built on access.
+        self._thumbnail_base = sys.intern(thumbnail_base) if thumbnail and thumbnail_base else ""
+        self._thumbnail_file = thumbnail
+        self.title_romaji = title_romaji
+        self.trailer = trailer
+        self.yt_trailer = yt_trailer
+
+    @property
+    def score(self) -> str:
+        return self._score if isinstance(self._score, str) else str(self._score)
+
+    @score.setter
+    def score(self, value) -> None:
+        self._score = _compact_number(value)
+
+    @property
+    def rank(self) -> str:
+        return self._rank if isinstance(self._rank, str) else str(self._rank)
+
+    @rank.setter
+    def rank(self, value) -> None:
+        self._rank = _compact_number(value)
+
+    @property
+    def popularity(self) -> str:
+        return self._popularity if isinstance(self._popularity, str) else str(self._popularity)
+
+    @popularity.setter
+    def popularity(self, value) -> None:
+        self._popularity = _compact_number(value)
+
+    @property
+    def thumbnail(self) -> str:
+        return self._thumbnail_base + self._thumbnail_file if self._thumbnail_base else self._thumbnail_file
+
+    @thumbnail.setter
+    def thumbnail(self, value: str) -> None:
+        self._thumbnail_base = ""
+        self._thumbnail_file = value
+
+    @property
+    def score_value(self) -> Optional[float]:
+        return float(self._score) if isinstance(self._score, (int, float)) else None
+
+    @property
+    def rank_value(self) -> Optional[int]:
+        return self._rank if isinstance(self._rank, int) else None
+
+    @property
+    def popularity_value(self) -> Optional[int]:
+        """Popularity position (lower is more popular), or None when the API sent no number."""
+        value = self._popularity
+        if isinstance(value, str):
+            return int(value) if value.isdigit() else None
+        return value if isinstance(value, int) and value >= 0 else None
+
+    def as_tuple(self) -> tuple:
+        return tuple(getattr(self, name) for name in ANIME_FIELDS)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return "AnimeResult(" + ", ".join(f"{name}={getattr(self, name)!r}" for name in ANIME_FIELDS) + ")"
+
 
-@dataclass
 class Episode:
-    number: str
-    type: str
-    display_num: int
+    __slots__ = ('number', 'type', 'display_num')
+
+    def __init__(self, number: str, type: str, display_num: Union[int, float]):
+        self.number = number
+        self.type = _intern(type)
+        self.display_num = display_num
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.number, self.type, self.display_num) == (other.number, other.type, other.display_num)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Episode(number={self.number!r}, type={self.type!r}, display_num={self.display_num!r})"
+
+
+class EpisodeIndex(list):
+    """An anime's episode list plus hash and sorted indexes over it.
+
+    Built once per ``get_episodes`` result so jumping, resuming, next/previous
+    and range marking don't rescan the list. It is still a plain list of
+    Episode in API order; treat it as read-only, since the indexes are not
+    updated if it is changed in place.
+
+    Episodes are matched by ``number`` (the API's own text, e.g. "12.5") and
+    by ``display_num``. When several share a value (a special numbered like
+    a regular episode), lookups return the first in list order.
+    """
+
+    def __init__(self, episodes=()):
+        super().__init__(episodes)
+        self._by_identity: Dict[int, int] = {}
+        self._by_number: Dict[str, int] = {}
+        self._by_text: Dict[str, int] = {}
+        self._by_value: Dict[float, int] = {}
+        self._sorted_values: List[float] = []
+        self._sorted_positions: List[int] = []
+
+        ordered = []
+        for idx, ep in enumerate(self):
+            self._by_identity[id(ep)] = idx
+            self._by_number.setdefault(str(ep.number), idx)
+            self._by_text.setdefault(str(ep.display_num), idx)
+            self._by_text.setdefault(str(ep.number), idx)
+            value = self.episode_value(ep, idx)
+            if not math.isnan(value):
+                self._by_value.setdefault(value, idx)
+                ordered.append((value, idx))
+        ordered.sort()
+        self._sorted_values = [value for value, _ in ordered]
+        self._sorted_positions = [idx for _, idx in ordered]
+
+    @staticmethod
+    def episode_value(ep: Episode, idx: int) -> float:
+        """Numeric position of an episode; its list position (1-based) when it has no number."""
+        try:
+            return float(ep.display_num)
+        except (TypeError, ValueError):
+            return float(idx + 1)
+
+    def position(self, ep: Episode) -> Optional[int]:
+        """Index of ``ep`` in the list, by identity or else by episode number."""
+        idx = self._by_identity.get(id(ep))
+        if idx is not None and self[idx] is ep:
+            return idx
+        return self._by_number.get(str(ep.number))
+
+    def by_number(self, number) -> Optional[Episode]:
+        idx = self._by_number.get(str(number))
+        return None if idx is None else self[idx]
+
+    def find_value(self, value) -> Optional[int]:
+        """Index of the first episode whose display number equals ``value`` numerically."""
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        return self._by_value.get(value)
+
+    def find(self, episode_value) -> Optional[int]:
+        """Index for a user- or history-supplied episode value.
+
+        The exact text of a display number or API number wins, then a numeric
+        match ("7" finds 7, "7.0" finds 7, "12.50" finds 12.5).
+        """
+        if episode_value is None:
+            return None
+        text = str(episode_value).strip()
+        if not text:
+            return None
+        idx = self._by_text.get(text)
+        if idx is not None:
+            return idx
+        return self.find_value(text)
+
+    def next_episode(self, ep: Episode) -> Optional[Episode]:
+        idx = self.position(ep)
+        if idx is None or idx + 1 >= len(self):
+            return None
+        return self[idx + 1]
+
+    def previous_episode(self, ep: Episode) -> Optional[Episode]:
+        idx = self.position(ep)
+        if idx is None or idx == 0:
+            return None
+        return self[idx - 1]
+
+    def indices_between(self, start: float, end: float) -> List[int]:
+        """List indices of episodes numbered within ``start``..``end`` inclusive, in list order."""
+        if start > end:
+            start, end = end, start
+        lo = bisect_left(self._sorted_values, start)
+        hi = bisect_right(self._sorted_values, end)
+        return sorted(self._sorted_positions[lo:hi])
+
 
 @dataclass
 class QualityOption:
     name: str
     server_key: str
     style: str
+
+
+class SearchResults(list):
+    """Search hits plus per-branch timing (seconds per anime type searched)."""
+
+    def __init__(self, items=(), timings: Optional[Dict[str, float]] = None):
+        super().__init__(items)
+        self.timings = dict(timings or {})
+
+
+# Kinds of value held in an AnimeBatch numeric column.
+_INT, _FLOAT, _TEXT = 0, 1, 2
+
+
+class AnimeBatch:
+    """Column-oriented storage for large sets of AnimeResult.
+
+    Categorical columns hold small integer codes into a per-column string
+    table, numeric columns are packed arrays, and the remaining text columns
+    are plain lists. Rows are materialized as AnimeResult only when accessed,
+    so a catalog-sized batch costs a fraction of the equivalent object list.
+    """
+
+    _TEXT_FIELDS = ('id', 'title_en', 'title_jp', 'mal_id', 'relation_id', 'title_romaji', 'trailer', 'yt_trailer')
+
+    def __init__(self, results=()):
+        self._text: Dict[str, List[str]] = {name: [] for name in self._TEXT_FIELDS}
+        self._codes: Dict[str, array] = {name: array('I') for name in CATEGORICAL_FIELDS}
+        self._tables: Dict[str, List[str]] = {name: [] for name in CATEGORICAL_FIELDS}
+        self._lookup: Dict[str, Dict[str, int]] = {name: {} for name in CATEGORICAL_FIELDS}
+        self._numbers: Dict[str, array] = {name: array('d') for name in NUMERIC_FIELDS}
+        self._kinds: Dict[str, array] = {name: array('b') for name in NUMERIC_FIELDS}
+        self._raw_numbers: Dict[str, Dict[int, str]] = {name: {} for name in NUMERIC_FIELDS}
+        self._thumb_bases: List[str] = []
+        self._thumb_base_lookup: Dict[str, int] = {}
+        self._thumb_base_codes = array('I')
+        self._thumb_files: List[str] = []
+        self.extend(results)
+
+    def __len__(self) -> int:
+        return len(self._text['id'])
+
+    def _code(self, name: str, value: str) -> int:
+        lookup = self._lookup[name]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self._tables[name])
+            self._tables[name].append(value)
+        return code
+
+    def append(self, result: AnimeResult) -> None:
+        row = len(self)
+        for name in self._TEXT_FIELDS:
+            self._text[name].append(getattr(result, name))
+        for name in CATEGORICAL_FIELDS:
+            self._codes[name].append(self._code(name, getattr(result, name)))
+        for name in NUMERIC_FIELDS:
+            value = getattr(result, '_' + name)
+            if isinstance(value, int) and not isinstance(value, bool) and abs(value) < 2 ** 53:
+                self._numbers[name].append(float(value))
+                self._kinds[name].append(_INT)
+            elif isinstance(value, float):
+                self._numbers[name].append(value)
+                self._kinds[name].append(_FLOAT)
+            else:
+                self._numbers[name].append(math.nan)
+                self._kinds[name].append(_TEXT)
+                self._raw_numbers[name][row] = str(value)
+        base = result._thumbnail_base
+        code = self._thumb_base_lookup.get(base)
+        if code is None:
+            code = self._thumb_base_lookup[base] = len(self._thumb_bases)
+            self._thumb_bases.append(base)
+        self._thumb_base_codes.append(code)
+        self._thumb_files.append(result._thumbnail_file)
+
+    def extend(self, results) -> None:
+        for result in results:
+            self.append(result)
+
+    def _number_text(self, name: str, row: int) -> str:
+        kind = self._kinds[name][row]
+        if kind == _INT:
+            return str(int(self._numbers[name][row]))
+        if kind == _FLOAT:
+            return repr(self._numbers[name][row])
+        return self._raw_numbers[name][row]
+
+    def _row(self, row: int) -> AnimeResult:
+        text = self._text
+        values = {name: text[name][row] for name in self._TEXT_FIELDS}
+        for name in CATEGORICAL_FIELDS:
+            values[name] = self._tables[name][self._codes[name][row]]
+        for name in NUMERIC_FIELDS:
+            values[name] = self._number_text(name, row)
+        values['thumbnail'] = self._thumb_files[row]
+        values['thumbnail_base'] = self._thumb_bases[self._thumb_base_codes[row]]
+        return AnimeResult(**values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(row) for row in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("AnimeBatch index out of range")
+        return self._row(index)
+
+    def __iter__(self) -> Iterator[AnimeResult]:
+        for row in range(len(self)):
+            yield self._row(row)
+
+    def column(self, name: str) -> list:
+        """All values of one field, as strings, without building rows."""
+        if name in self._text:
+            return list(self._text[name])
+        if name in self._codes:
+            table = self._tables[name]
+            return [table[code] for code in self._codes[name]]
+        if name in self._numbers:
+            return [self._number_text(name, row) for row in range(len(self))]
+        if name == 'thumbnail':
+            return [self._thumb_bases[code] + file if self._thumb_bases[code] else file
+                    for code, file in zip(self._thumb_base_codes, self._thumb_files)]
+        raise KeyError(name)
+
+    def numeric_column(self, name: str) -> array:
+        """Raw numeric column (NaN where the API sent text)."""
+        return self._numbers[name]
@@ -5,6 +5,7 @@ import requests
 from datetime import datetime, timezone
 from .api import _get_endpoint_config
 from .config import CURRENT_VERSION
+from . import network
 
 class MonitoringSystem:
     _instance = None
@@ -39,9 +40,8 @@ class MonitoringSystem:
     def _send_data(self, action: str, details: dict):
         """Send analytics data only if user has opted in."""
         try:
-            from .settings import SettingsManager
-            settings = SettingsManager()
-            if not settings.get('analytics'):
+            from .settings import get_settings
+            if not get_settings().get('analytics'):
                 return
         except Exception:
             return
@@ -63,7 +63,7 @@ class MonitoringSystem:
                     'User-Agent': 'AniCliAr-Monitor/1.0'
                 }
                 
-                requests.post(
+                network.post(
                     f"{endpoint_url}/monitor", 
                     json=payload, 
                     headers=headers, 
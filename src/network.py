@@ -0,0 +1,304 @@
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from .health import health, is_host_failure
+
+# Shared HTTP session layer.
+# Every module that talks to the network goes through here so connections to
+# the catalog API, MediaFire, the poster CDN, GitHub and PyPI are pooled and
+# kept alive across calls instead of paying a fresh TCP+TLS handshake each time.
+
+USER_AGENT = 'AniCliAr/2.0'
+BROWSER_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+DEFAULT_POOL_CONNECTIONS = 10   # Number of hosts kept in the pool manager
+DEFAULT_POOL_MAXSIZE = 16       # Keep-alive connections kept per host
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.3
+DEFAULT_TIMEOUT = (5, 10)       # (connect, read) seconds
+
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+_RETRY_METHODS = frozenset({'GET', 'HEAD'})
+# POSTs are only retried when the caller says they're idempotent (the catalog
+# API's list/search/episode endpoints); analytics and the like are sent once.
+_IDEMPOTENT_POST_RETRY_METHODS = _RETRY_METHODS | {'POST'}
+
+
+class ConnectionStats:
+    """Thread-safe counters of connections opened vs. requests served per host."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, int]] = {}
+
+    def _entry(self, host: str) -> Dict[str, int]:
+        entry = self._hosts.get(host)
+        if entry is None:
+            entry = self._hosts[host] = {'opened': 0, 'requests': 0}
+        return entry
+
+    def record_open(self, host: str) -> None:
+        with self._lock:
+            self._entry(host)['opened'] += 1
+
+    def record_request(self, host: str) -> None:
+        with self._lock:
+            self._entry(host)['requests'] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            result = {}
+            for host, entry in self._hosts.items():
+                opened = entry['opened']
+                served = entry['requests']
+                result[host] = {
+                    'opened': opened,
+                    'requests': served,
+                    'reused': max(0, served - opened),
+                }
+            return result
+
+    def totals(self) -> Dict[str, int]:
+        totals = {'opened': 0, 'requests': 0, 'reused': 0}
+        for entry in self.snapshot().values():
+            for key in totals:
+                totals[key] += entry[key]
+        return totals
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hosts.clear()
+
+
+stats = ConnectionStats()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        stats.record_open(self.host)
+        return super()._new_conn()
+
+    def _make_request(self, *args, **kwargs):
+        stats.record_request(self.host)
+        return super()._make_request(*args, **kwargs)
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        stats.record_open(self.host)
+        return super()._new_conn()
+
+    def _make_request(self, *args, **kwargs):
+        stats.record_request(self.host)
+        return super()._make_request(*args, **kwargs)
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with per-host keep-alive pools, counters and a default timeout."""
+
+    def __init__(self, pool_connections: int, pool_maxsize: int, max_retries: Retry, timeout):
+        self.default_timeout = timeout
+        super().__init__(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+        )
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.default_timeout
+        return super().send(request, **kwargs)
+
+
+class SessionManager:
+    """Hands out thread-local ``requests.Session`` objects sharing one adapter.
+
+    ``requests.Session`` is not guaranteed to be thread-safe, but the urllib3
+    pools behind an adapter are. Each thread gets its own session (cookies,
+    headers) while every session is mounted on the same adapter, so all threads
+    draw from the same warm per-host connection pools.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._generation = 0
+        # retry_post -> adapter; the retrying one only serves idempotent POSTs.
+        self._adapters: Dict[bool, PooledAdapter] = {}
+        self.pool_connections = DEFAULT_POOL_CONNECTIONS
+        self.pool_maxsize = DEFAULT_POOL_MAXSIZE
+        self.retries = DEFAULT_RETRIES
+        self.backoff = DEFAULT_BACKOFF
+        self.timeout = DEFAULT_TIMEOUT
+
+    def configure(self, pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None,
+                  retries: Optional[int] = None, backoff: Optional[float] = None, timeout=None) -> None:
+        with self._lock:
+            if pool_connections is not None:
+                self.pool_connections = max(1, int(pool_connections))
+            if pool_maxsize is not None:
+                self.pool_maxsize = max(1, int(pool_maxsize))
+            if retries is not None:
+                self.retries = max(0, int(retries))
+            if backoff is not None:
+                self.backoff = max(0.0, float(backoff))
+            if timeout is not None:
+                self.timeout = timeout
+            old_adapters = list(self._adapters.values())
+            self._adapters = {}
+            self._generation += 1
+        for adapter in old_adapters:
+            adapter.close()
+
+    def _build_retry(self, retry_post: bool = False) -> Retry:
+        return Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=self.backoff,
+            status_forcelist=_RETRY_STATUSES,
+            allowed_methods=_IDEMPOTENT_POST_RETRY_METHODS if retry_post else _RETRY_METHODS,
+            raise_on_status=False,
+        )
+
+    def _get_adapter(self, retry_post: bool = False) -> PooledAdapter:
+        with self._lock:
+            adapter = self._adapters.get(retry_post)
+            if adapter is None:
+                adapter = self._adapters[retry_post] = PooledAdapter(
+                    self.pool_connections,
+                    self.pool_maxsize,
+                    self._build_retry(retry_post),
+                    self.timeout,
+                )
+            return adapter
+
+    def get_session(self, retry_post: bool = False) -> requests.Session:
+        if getattr(self._local, 'generation', None) != self._generation:
+            self._local.sessions = {}
+            self._local.generation = self._generation
+        session = self._local.sessions.get(retry_post)
+        if session is not None:
+            return session
+
+        adapter = self._get_adapter(retry_post)
+        session = requests.Session()
+        session.headers['User-Agent'] = USER_AGENT
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        self._local.sessions[retry_post] = session
+        return session
+
+    def close(self) -> None:
+        with self._lock:
+            adapters = list(self._adapters.values())
+            self._adapters = {}
+            self._generation += 1
+        for adapter in adapters:
+            adapter.close()
+
+
+_manager = SessionManager()
+
+
+def get_session(retry_post: bool = False) -> requests.Session:
+    return _manager.get_session(retry_post)
+
+
+def configure(**kwargs) -> None:
+    """Adjust pool sizes, retry/backoff policy or the default timeout."""
+    _manager.configure(**kwargs)
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    host = parts.hostname or ''
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    return f"{host}:{port}" if port else host
+
+
+def request(method: str, url: str, adaptive_timeout: Optional[bool] = None, retry_post: bool = False,
+            **kwargs) -> requests.Response:
+    """Send a request through the pooled session, guarded by the host's health.
+
+    Fails fast with ``health.CircuitOpenError`` (a ``requests.ConnectionError``)
+    while the host's circuit is open. For regular requests the given timeout is
+    a ceiling that shrinks to the host's observed latency; streamed downloads
+    keep theirs since their reads are bounded by throughput, not latency.
+    ``adaptive_timeout=True`` opts a streamed API response back in.
+    POSTs are not retried unless ``retry_post=True`` marks them idempotent.
+    """
+    host = _host_key(url)
+    health.before_request(host)
+    if adaptive_timeout is None:
+        adaptive_timeout = not kwargs.get('stream')
+    if adaptive_timeout:
+        kwargs['timeout'] = health.timeout_for(host, kwargs.get('timeout') or _manager.timeout)
+
+    start = time.perf_counter()
+    try:
+        response = get_session(retry_post).request(method, url, **kwargs)
+    except Exception as e:
+        failed, reason = is_host_failure(error=e)
+        if failed:
+            health.record_failure(host, reason)
+        else:
+            health.release_probe(host)
+        raise
+
+    failed, reason = is_host_failure(response=response)
+    if failed:
+        health.record_failure(host, reason)
+    else:
+        health.record_success(host, time.perf_counter() - start)
+    return response
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request('POST', url, **kwargs)
+
+
+def head(url: str, **kwargs) -> requests.Response:
+    kwargs.setdefault('allow_redirects', False)
+    return request('HEAD', url, **kwargs)
+
+
+def get_connection_stats() -> Dict[str, Dict[str, int]]:
+    """Per-host counters: connections opened, requests served, connections reused."""
+    return stats.snapshot()
+
+
+def is_host_down(url: str) -> bool:
+    """True while the circuit for ``url``'s host is open."""
+    return health.is_open(_host_key(url))
+
+
+def get_host_health() -> List[Dict]:
+    """Per-host latency percentiles, failures and circuit state."""
+    return health.snapshot()
+
+
+def close() -> None:
+    _manager.close()
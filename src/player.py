@@ -7,11 +7,58 @@ import tempfile
 from typing import Optional
 from .utils import is_bundled
 
+# An episode counts as watched once this much of it has played.
+COMPLETION_RATIO = 0.9
+
+# mpv writes "<position> <duration> <eof>" to the file named by the
+# anicli-progress script option every few seconds and when the file unloads.
+MPV_PROGRESS_SCRIPT = """
+local report = mp.get_opt("anicli-progress")
+local function save()
+    local pos = mp.get_property_number("time-pos")
+    if not report or not pos then return end
+    local file = io.open(report, "w")
+    if not file then return end
+    file:write(string.format("%.3f %.3f %d\\n", pos, mp.get_property_number("duration") or 0,
+        mp.get_property_bool("eof-reached") and 1 or 0))
+    file:close()
+end
+mp.add_periodic_timer(5, save)
+mp.add_hook("on_unload", 50, save)
+"""
+
+
+class PlaybackProgress:
+    """Where playback stopped, as reported by the player."""
+    __slots__ = ('position', 'duration', 'finished')
+
+    def __init__(self, position: float, duration: Optional[float] = None, finished: bool = False):
+        self.position = position
+        self.duration = duration
+        self.finished = finished
+
+    @property
+    def completed(self) -> bool:
+        if self.finished:
+            return True
+        return bool(self.duration) and self.position >= self.duration * COMPLETION_RATIO
+
+    @classmethod
+    def read(cls, path: str) -> Optional['PlaybackProgress']:
+        try:
+            with open(path, 'r', encoding='utf-8') as handle:
+                position, duration, finished = handle.read().split()[:3]
+            return cls(float(position), float(duration) or None, finished == '1')
+        except (OSError, ValueError):
+            return None
+
+
 class PlayerManager:
     def __init__(self, rpc_manager=None, console=None):
         self.temp_mpv_path = None
         self.rpc_manager = rpc_manager
         self.console = console
+        self._script_dir = None
 
     def get_mpv_path(self) -> Optional[str]:
         if is_bundled():
@@ -56,13 +103,29 @@ class PlayerManager:
                 shutil.rmtree(temp_dir, ignore_errors=True)
             except (OSError, PermissionError):
                 pass
+        if self._script_dir:
+            shutil.rmtree(self._script_dir, ignore_errors=True)
+            self._script_dir = None
 
-    def play(self, url: str, title: str, player_type: str = 'mpv'):
+    def _progress_script(self) -> Optional[str]:
+        try:
+            if not self._script_dir or not os.path.isdir(self._script_dir):
+                self._script_dir = tempfile.mkdtemp(prefix='anime_browser_progress_')
+            script_path = os.path.join(self._script_dir, 'progress.lua')
+            if not os.path.exists(script_path):
+                with open(script_path, 'w', encoding='utf-8') as handle:
+                    handle.write(MPV_PROGRESS_SCRIPT)
+            return script_path
+        except OSError:
+            return None
+
+    def play(self, url: str, title: str, player_type: str = 'mpv', start: Optional[float] = None) -> Optional[PlaybackProgress]:
+        """Play until the player exits; returns where it stopped when the player can tell us."""
         try:
             if player_type == 'vlc':
-                self._play_vlc(url, title)
+                self._play_vlc(url, title, start)
             else:
-                self._play_mpv(url, title)
+                return self._play_mpv(url, title, start)
 
         except FileNotFoundError:
             if self.console:
@@ -80,8 +143,9 @@ class PlayerManager:
             else:
                 print(f"Error launching player: {str(e)}", file=sys.stderr)
                 input("Press Enter to continue...")
+        return None
 
-    def _play_vlc(self, url: str, title: str):
+    def _play_vlc(self, url: str, title: str, start: Optional[float] = None):
         vlc_path = shutil.which('vlc')
         if not vlc_path:
             if os.name == 'nt':
@@ -111,8 +175,10 @@ class PlayerManager:
             '--fullscreen',
             '--play-and-exit',
             '--meta-title', title,
-            url
         ]
+        if start:
+            vlc_args.append(f'--start-time={start:.1f}')
+        vlc_args.append(url)
         
         subprocess.run(
             vlc_args,
@@ -121,7 +187,7 @@ class PlayerManager:
             stderr=subprocess.DEVNULL
         )
 
-    def _play_mpv(self, url: str, title: str):
+    def _play_mpv(self, url: str, title: str, start: Optional[float] = None) -> Optional[PlaybackProgress]:
         mpv_path = self.get_mpv_path()
         
         if mpv_path != 'mpv' and not os.path.exists(mpv_path):
@@ -156,6 +222,18 @@ class PlayerManager:
         
         
         mpv_args.append('--force-window=yes')
+        if start:
+            mpv_args.append(f'--start={start:.1f}')
+
+        report_path = None
+        script_path = self._progress_script()
+        if script_path:
+            report_path = os.path.join(self._script_dir, f'progress-{os.getpid()}.txt')
+            try:
+                os.remove(report_path)
+            except OSError:
+                pass
+            mpv_args += ['--script=' + script_path, '--script-opts=anicli-progress=' + report_path]
 
         result = subprocess.run(
             mpv_args,
@@ -169,4 +247,6 @@ class PlayerManager:
             if self.console:
                 from rich.text import Text
                 self.console.print(Text(f"MPV exited with error code {result.returncode}", style="bold red"))
-                input("Press Enter to continue...")
\ No newline at end of file
+                input("Press Enter to continue...")
+
+        return PlaybackProgress.read(report_path) if report_path else None
@@ -0,0 +1,368 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+from PIL import Image, ImageEnhance
+
+from . import network
+from .storage import atomic_write_json
+
+# Bump whenever the rendered output changes so persisted renders are invalidated.
+RENDERER_VERSION = 2
+
+QUADRANTS = [' ', '▘', '▝', '▀', '▖', '▌', '▞', '▛', '▗', '▚', '▐', '▜', '▄', '▙', '▟', '█']
+
+
+def prepare_image(img: Image.Image, max_height: int) -> np.ndarray:
+    """Sharpen, boost contrast and resize a poster to fit ``max_height`` text rows."""
+    img = img.convert("RGB")
+
+    enhancer = ImageEnhance.Sharpness(img)
+    img = enhancer.enhance(1.8)
+    enhancer = ImageEnhance.Contrast(img)
+    img = enhancer.enhance(1.15)
+
+    target_pixel_height = max_height * 2
+    new_height = target_pixel_height
+    new_width = int((img.width / img.height) * new_height * 2.0)
+
+    if new_width % 2 != 0:
+        new_width -= 1
+    if new_height % 2 != 0:
+        new_height -= 1
+
+    # Use BILINEAR for speed (still good quality)
+    img = img.resize((new_width, new_height), Image.Resampling.BILINEAR)
+    return np.array(img, dtype=np.uint8)
+
+
+def render_ansi(arr: np.ndarray) -> str:
+    """Render an RGB array as truecolor quadrant-block characters.
+
+    Every 2x2 pixel block becomes one cell: pixels brighter than the block's
+    mean luminance form the foreground, the rest the background. All per-block
+    math runs as whole-image array operations; only the final string
+    formatting is done per cell.
+    """
+    height, width = arr.shape[0] & ~1, arr.shape[1] & ~1
+    if height == 0 or width == 0:
+        return ""
+
+    arr = arr[:height, :width, :3]
+    # Block pixels in reading order: top-left, top-right, bottom-left, bottom-right.
+    blocks = np.stack(
+        (arr[0::2, 0::2], arr[0::2, 1::2], arr[1::2, 0::2], arr[1::2, 1::2]),
+        axis=2,
+    ).astype(np.int64)
+
+    channels = blocks.astype(np.float64)
+    lums = 0.299 * channels[..., 0] + 0.587 * channels[..., 1] + 0.114 * channels[..., 2]
+    avg_lum = (((lums[..., 0] + lums[..., 1]) + lums[..., 2]) + lums[..., 3]) / 4
+    mask = lums > avg_lum[..., None]
+
+    bright_count = mask.sum(axis=2)
+    dark_count = 4 - bright_count
+    bright_sum = (blocks * mask[..., None]).sum(axis=2)
+    total_sum = blocks.sum(axis=2)
+    dark_sum = total_sum - bright_sum
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fg = np.where(
+            bright_count[..., None] > 0,
+            bright_sum / bright_count[..., None],
+            total_sum / 4,
+        ).astype(int)
+        bg = np.where(
+            dark_count[..., None] > 0,
+            dark_sum / dark_count[..., None],
+            fg,
+        ).astype(int)
+
+    char_idx = mask[..., 0] * 1 + mask[..., 1] * 2 + mask[..., 2] * 4 + mask[..., 3] * 8
+    char_idx[(char_idx == 0) | (char_idx == 15)] = 15
+
+    quadrants = QUADRANTS
+    output_lines = []
+    for fg_row, bg_row, idx_row in zip(fg.tolist(), bg.tolist(), char_idx.tolist()):
+        line = "".join([
+            f"\033[38;2;{f[0]};{f[1]};{f[2]}m\033[48;2;{b[0]};{b[1]};{b[2]}m{quadrants[i]}"
+            for f, b, i in zip(fg_row, bg_row, idx_row)
+        ])
+        output_lines.append(line + "\033[0m")
+
+    return "\n".join(output_lines)
+
+
+class PosterCache:
+    """Two-level poster cache.
+
+    Level one keeps decoded images in memory for the session. Level two lives
+    on disk under ``~/.ani-cli-arabic/cache/posters``: raw image bytes stored by
+    content hash (so identical posters behind different URLs share one file)
+    and rendered ANSI keyed by url, height, renderer version and color mode.
+    Failed fetches are remembered only for ``FAILURE_TTL`` seconds.
+    """
+
+    MEMORY_IMAGES = 32
+    MAX_IMAGE_BYTES = 64 * 1024 * 1024
+    MAX_ANSI_BYTES = 32 * 1024 * 1024
+    FAILURE_TTL = 60
+    INDEX_FILENAME = "index.json"
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        if cache_dir is None:
+            cache_dir = Path.home() / ".ani-cli-arabic" / "cache" / "posters"
+        self.cache_dir = cache_dir
+        self.images_dir = cache_dir / "images"
+        self.ansi_dir = cache_dir / "ansi"
+        self.index_file = cache_dir / self.INDEX_FILENAME
+        self._lock = threading.Lock()
+        self._images: "OrderedDict[str, Image.Image]" = OrderedDict()
+        self._failures: Dict[str, float] = {}
+        self._counters = {'ansi_hits': 0, 'image_memory_hits': 0, 'image_disk_hits': 0, 'downloads': 0, 'failures': 0}
+        self.enabled = True
+
+        try:
+            self.images_dir.mkdir(parents=True, exist_ok=True)
+            self.ansi_dir.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            self.enabled = False
+        self._index = self._load_index()
+
+    def _load_index(self) -> Dict[str, str]:
+        if not self.enabled or not self.index_file.exists():
+            return {}
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as handle:
+                data = json.load(handle)
+            return {str(k): str(v) for k, v in data.items()} if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self) -> None:
+        with self._lock:
+            snapshot = dict(self._index)
+        try:
+            atomic_write_json(self.index_file, snapshot, indent=None, fsync=False)
+        except (OSError, TypeError, ValueError):
+            pass
+
+    @staticmethod
+    def _ansi_key(url: str, max_height: int, color_mode: str) -> str:
+        raw = f"{url}|{max_height}|{RENDERER_VERSION}|{color_mode}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def has_rendered(self, url: str, max_height: int, color_mode: str = "truecolor") -> bool:
+        return self.enabled and (self.ansi_dir / f"{self._ansi_key(url, max_height, color_mode)}.ans").exists()
+
+    def recently_failed(self, url: str) -> bool:
+        with self._lock:
+            expires_at = self._failures.get(url)
+            if expires_at is None:
+                return False
+            if expires_at < time.time():
+                del self._failures[url]
+                return False
+            return True
+
+    def render(self, url: str, max_height: int, color_mode: str = "truecolor") -> Optional[str]:
+        """Return the rendered ANSI poster, or None if it can't be produced right now."""
+        if not url or self.recently_failed(url):
+            return None
+
+        ansi_path = self.ansi_dir / f"{self._ansi_key(url, max_height, color_mode)}.ans"
+        if self.enabled:
+            try:
+                ansi = ansi_path.read_text(encoding='utf-8')
+                self._count('ansi_hits')
+                _touch(ansi_path)
+                return ansi
+            except OSError:
+                pass
+
+        try:
+            img = self._get_image(url)
+            ansi = render_ansi(prepare_image(img, max_height))
+        except Exception:
+            self.mark_failed(url)
+            return None
+
+        if self.enabled:
+            try:
+                _write_bytes_atomic(ansi_path, ansi.encode('utf-8'))
+                _evict_dir(self.ansi_dir, self.MAX_ANSI_BYTES)
+            except OSError:
+                pass
+        return ansi
+
+    def mark_failed(self, url: str) -> None:
+        with self._lock:
+            self._failures[url] = time.time() + self.FAILURE_TTL
+            self._counters['failures'] += 1
+
+    def has_image(self, url: str) -> bool:
+        """Whether ``url`` can be rendered without downloading it."""
+        with self._lock:
+            if url in self._images:
+                return True
+            content_hash = self._index.get(url)
+        return bool(content_hash) and self.enabled and (self.images_dir / f"{content_hash}.img").exists()
+
+    def add_image(self, url: str, data: bytes) -> None:
+        """Take image bytes downloaded elsewhere (the asyncio client) for ``url``."""
+        img = _decode_image(data)
+        self._count('downloads')
+        self._store_image(url, data)
+        self._remember(url, img)
+
+    def _get_image(self, url: str) -> Image.Image:
+        with self._lock:
+            img = self._images.get(url)
+            if img is not None:
+                self._images.move_to_end(url)
+                self._counters['image_memory_hits'] += 1
+                return img
+            content_hash = self._index.get(url)
+
+        img = None
+        if content_hash and self.enabled:
+            image_path = self.images_dir / f"{content_hash}.img"
+            try:
+                img = _decode_image(image_path.read_bytes())
+                self._count('image_disk_hits')
+                _touch(image_path)
+            except (OSError, ValueError):
+                # Missing or corrupt on disk - drop it and download again.
+                try:
+                    image_path.unlink()
+                except OSError:
+                    pass
+                img = None
+
+        if img is None:
+            response = network.get(url, timeout=5)
+            response.raise_for_status()
+            data = response.content
+            self._count('downloads')
+            img = _decode_image(data)
+            self._store_image(url, data)
+
+        self._remember(url, img)
+        return img
+
+    def _remember(self, url: str, img: Image.Image) -> None:
+        with self._lock:
+            self._images[url] = img
+            while len(self._images) > self.MEMORY_IMAGES:
+                self._images.popitem(last=False)
+
+    def _store_image(self, url: str, data: bytes) -> None:
+        if not self.enabled:
+            return
+        content_hash = hashlib.sha256(data).hexdigest()
+        image_path = self.images_dir / f"{content_hash}.img"
+        try:
+            if not image_path.exists():
+                _write_bytes_atomic(image_path, data)
+            removed = _evict_dir(self.images_dir, self.MAX_IMAGE_BYTES)
+        except OSError:
+            return
+
+        with self._lock:
+            self._index[url] = content_hash
+            if removed:
+                self._index = {u: h for u, h in self._index.items() if h not in removed}
+        self._save_index()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            result = dict(self._counters)
+            result['memory_images'] = len(self._images)
+            result['indexed_urls'] = len(self._index)
+        return result
+
+
+def _decode_image(data: bytes) -> Image.Image:
+    img = Image.open(BytesIO(data))
+    img.load()
+    return img
+
+
+def _touch(path: Path) -> None:
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def _write_bytes_atomic(path: Path, data: bytes) -> None:
+    fd, temp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+        os.replace(temp_path, path)
+    finally:
+        try:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        except OSError:
+            pass
+
+
+def _evict_dir(directory: Path, max_bytes: int) -> set:
+    """Delete least recently used files until ``directory`` fits in ``max_bytes``.
+
+    Returns the stems of the removed files.
+    """
+    entries = []
+    total = 0
+    for path in directory.iterdir():
+        if path.name.startswith('.'):
+            continue
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, path, st.st_size))
+        total += st.st_size
+
+    removed = set()
+    if total <= max_bytes:
+        return removed
+
+    entries.sort()
+    for _, path, size in entries:
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+            total -= size
+            removed.add(path.stem)
+        except OSError:
+            continue
+    return removed
+
+
+_poster_cache = None
+_poster_cache_lock = threading.Lock()
+
+
+def get_poster_cache() -> PosterCache:
+    global _poster_cache
+    if _poster_cache is None:
+        with _poster_cache_lock:
+            if _poster_cache is None:
+                _poster_cache = PosterCache()
+    return _poster_cache
@@ -0,0 +1,224 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# How many upcoming episodes to resolve while the current one plays.
+PREFETCH_DEPTH = 2
+
+# Server lists rarely change; MediaFire direct links carry a short-lived key,
+# so they are only reused for a fraction of their real lifetime.
+SERVER_TTL = 30 * 60
+DIRECT_LINK_TTL = 10 * 60
+
+# MediaFire server keys from best to worst quality.
+QUALITY_SERVER_KEYS = ('FRFhdQ', 'FRLink', 'FRLowQ')
+
+
+class EpisodePrefetcher:
+    """Resolves server lists and MediaFire direct links ahead of the viewer.
+
+    While an episode plays, the next ``depth`` episodes of the same anime are
+    resolved in the background at the quality the user just picked, so "Next
+    Episode" and auto-next skip both loading spinners. Work for an anime is
+    dropped as soon as another anime is focused.
+
+    ``api`` is an ``async_api.SyncAnimeAPI``: prefetches are tasks on its
+    event loop (``api.runner``) awaiting ``api.aio``, not pool threads.
+    """
+
+    def __init__(self, api, depth: int = PREFETCH_DEPTH, server_ttl: int = SERVER_TTL, link_ttl: int = DIRECT_LINK_TTL):
+        self.api = api
+        self.depth = depth
+        self.server_ttl = server_ttl
+        self.link_ttl = link_ttl
+        self._lock = threading.Lock()
+        self._servers: Dict[Tuple[str, str], Tuple[dict, float]] = {}
+        # mediafire_url -> (direct url, expiry, anime it was resolved for)
+        self._links: Dict[str, Tuple[str, float, Optional[str]]] = {}
+        self._futures = []
+        self._anime_id = None
+        self._generation = 0
+        self._counters = {'server_hits': 0, 'server_misses': 0, 'link_hits': 0, 'link_misses': 0, 'prefetched': 0, 'prefetch_failed': 0, 'cancelled': 0}
+
+    def focus(self, anime_id: str) -> None:
+        """Switch to ``anime_id``; in-flight work and cached entries for any other anime are dropped."""
+        with self._lock:
+            if self._anime_id == anime_id:
+                return
+        self.cancel()
+        with self._lock:
+            self._anime_id = anime_id
+            self._servers = {key: value for key, value in self._servers.items() if key[0] == anime_id}
+
+    def cancel(self) -> None:
+        """Drop in-flight work and the direct links resolved for the focused anime.
+
+        Anything already on its way back from the network is discarded when it
+        lands, since the generation it was started under is gone.
+        """
+        with self._lock:
+            self._generation += 1
+            futures, self._futures = self._futures, []
+            old_anime_id, self._anime_id = self._anime_id, None
+            if old_anime_id is not None:
+                self._links = {key: value for key, value in self._links.items() if value[2] != old_anime_id}
+        for future in futures:
+            if future.cancel():
+                self._count('cancelled')
+
+    def shutdown(self) -> None:
+        self.cancel()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _cached_servers(self, anime_id: str, episode_num: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._servers.get((anime_id, str(episode_num)))
+            if entry and entry[1] > time.time():
+                return entry[0]
+        return None
+
+    def has_servers(self, anime_id: str, episode_num: str) -> bool:
+        return self._cached_servers(anime_id, episode_num) is not None
+
+    def get_servers(self, anime_id: str, episode_num: str, anime_type: str = 'SERIES') -> Optional[dict]:
+        data = self._cached_servers(anime_id, episode_num)
+        if data is not None:
+            self._count('server_hits')
+            return data
+
+        self._count('server_misses')
+        generation = self._current_generation()
+        data = self.api.get_streaming_servers(anime_id, episode_num, anime_type)
+        self._keep_servers(generation, anime_id, episode_num, data)
+        return data
+
+    async def _resolve_servers(self, generation: int, anime_id: str, episode_num: str, anime_type: str) -> Optional[dict]:
+        """get_servers() for prefetch tasks, on the event loop."""
+        data = self._cached_servers(anime_id, episode_num)
+        if data is not None:
+            self._count('server_hits')
+            return data
+        self._count('server_misses')
+        data = await self.api.aio.get_streaming_servers(anime_id, episode_num, anime_type)
+        self._keep_servers(generation, anime_id, episode_num, data)
+        return data
+
+    def _current_generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def _keep_servers(self, generation: int, anime_id: str, episode_num: str, data: Optional[dict]) -> None:
+        if data:
+            with self._lock:
+                # Results that land after a focus change or cancel() are not kept.
+                if generation == self._generation:
+                    self._servers[(anime_id, str(episode_num))] = (data, time.time() + self.server_ttl)
+
+    def _cached_link(self, mediafire_url: str) -> Optional[str]:
+        with self._lock:
+            entry = self._links.get(mediafire_url)
+            if entry and entry[1] > time.time():
+                return entry[0]
+            self._links.pop(mediafire_url, None)
+        return None
+
+    def has_direct_link(self, mediafire_url: str) -> bool:
+        return self._cached_link(mediafire_url) is not None
+
+    def get_direct_link(self, mediafire_url: str) -> Optional[str]:
+        url = self._cached_link(mediafire_url)
+        if url is not None:
+            self._count('link_hits')
+            return url
+
+        self._count('link_misses')
+        with self._lock:
+            generation, anime_id = self._generation, self._anime_id
+        url = self.api.extract_mediafire_direct(mediafire_url)
+        self._keep_link(generation, anime_id, mediafire_url, url)
+        return url
+
+    async def _resolve_link(self, generation: int, anime_id: str, mediafire_url: str) -> Optional[str]:
+        """get_direct_link() for prefetch tasks, on the event loop."""
+        url = self._cached_link(mediafire_url)
+        if url is not None:
+            self._count('link_hits')
+            return url
+        self._count('link_misses')
+        url = await self.api.aio.extract_mediafire_direct(mediafire_url)
+        self._keep_link(generation, anime_id, mediafire_url, url)
+        return url
+
+    def _keep_link(self, generation: int, anime_id: Optional[str], mediafire_url: str, url: Optional[str]) -> None:
+        if url:
+            with self._lock:
+                if generation == self._generation:
+                    self._links[mediafire_url] = (url, time.time() + self.link_ttl, anime_id)
+
+    def source_for(self, direct_url: str) -> Optional[str]:
+        """The MediaFire page a cached direct link was extracted from."""
+        with self._lock:
+            for mediafire_url, (url, _, _) in self._links.items():
+                if url == direct_url:
+                    return mediafire_url
+        return None
+
+    def invalidate_link(self, mediafire_url: str) -> None:
+        with self._lock:
+            self._links.pop(mediafire_url, None)
+
+    def prefetch_after(self, anime, episodes: List, current_idx: int, preferred_key: Optional[str] = None) -> None:
+        """Queue the ``depth`` episodes after ``current_idx`` of ``anime`` for background resolution."""
+        self.focus(anime.id)
+        generation = self._current_generation()
+
+        upcoming = episodes[current_idx + 1:current_idx + 1 + self.depth]
+        futures = [
+            self.api.runner.submit(self._prefetch_one(generation, anime.id, anime.type, ep.number, preferred_key))
+            for ep in upcoming
+        ]
+        with self._lock:
+            if generation == self._generation:
+                self._futures = [f for f in self._futures if not f.done()] + futures
+                return
+        for future in futures:
+            future.cancel()
+
+    async def _prefetch_one(self, generation: int, anime_id: str, anime_type: str, episode_num: str, preferred_key: Optional[str]) -> None:
+        def stale() -> bool:
+            with self._lock:
+                return generation != self._generation
+
+        if stale():
+            return
+        data = await self._resolve_servers(generation, anime_id, episode_num, anime_type)
+        if stale():
+            return
+        if not data:
+            self._count('prefetch_failed')
+            return
+
+        current_ep_data = data.get('CurrentEpisode', {})
+        keys = [preferred_key] if preferred_key else []
+        keys += [key for key in QUALITY_SERVER_KEYS if key != preferred_key]
+        for key in keys:
+            server_id = current_ep_data.get(key)
+            if server_id:
+                mediafire_url = self.api.build_mediafire_url(server_id)
+                await self._resolve_link(generation, anime_id, mediafire_url)
+                if stale():
+                    return
+                # Only a link that made it into the cache saves the viewer a spinner.
+                self._count('prefetched' if self.has_direct_link(mediafire_url) else 'prefetch_failed')
+                return
+        self._count('prefetch_failed')
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            result = dict(self._counters)
+            result['servers_cached'] = len(self._servers)
+            result['links_cached'] = len(self._links)
+        return result
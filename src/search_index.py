@@ -0,0 +1,170 @@
+import heapq
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from .models import AnimeResult
+
+# Offline title search.
+# An in-memory trigram index over the English, Japanese and romaji titles of
+# everything in the local catalog. Trigrams make it tolerant of typos and
+# partial words, and both the indexed titles and the query go through the same
+# normalization (case, Latin accents, Arabic letter variants and diacritics).
+
+# Best score at or above which local hits are trusted without asking the API.
+CONFIDENT_SCORE = 0.75
+# Hits below this are noise.
+MIN_SCORE = 0.3
+# Candidate titles sharing fewer trigrams with the query than this fraction are skipped.
+MIN_SHARED_FRACTION = 0.3
+# Only this many candidates per requested result (by shared trigram count) are scored in full.
+CANDIDATES_PER_RESULT = 8
+
+_ARABIC_DIACRITICS = re.compile('[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]')
+_ARABIC_LETTERS = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي',
+    'ؤ': 'و',
+    'ة': 'ه',
+})
+_NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """Fold case, strip Latin accents and Arabic diacritics/letter variants, collapse punctuation."""
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = _ARABIC_DIACRITICS.sub('', text).translate(_ARABIC_LETTERS)
+    # Drop combining marks (é -> e) without touching kana or CJK.
+    text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    text = unicodedata.normalize('NFKC', text)
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    """Word trigrams padded pg_trgm style, so short words and word starts still match."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+class TitleIndex:
+    """Trigram index over catalog titles, kept current through CatalogStore listeners.
+
+    The index is built from the store on first use and holds only ids and
+    normalized titles; full results are read back from the store.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._built = False
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._titles: Dict[str, Tuple[Tuple[str, Set[str]], ...]] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        store.add_listener(self.add)
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def build(self) -> None:
+        with self._lock:
+            if self._built:
+                return
+            for anime_id, *titles in self.store.iter_titles():
+                self._add_locked(anime_id, titles)
+            self._built = True
+
+    def add(self, results: List[AnimeResult]) -> None:
+        with self._lock:
+            if not self._built:
+                # Picked up by build() from the store.
+                return
+            for result in results:
+                if result.id:
+                    self._add_locked(result.id, (result.title_en, result.title_jp, result.title_romaji))
+
+    def _add_locked(self, anime_id: str, titles) -> None:
+        normalized = tuple(dict.fromkeys(t for t in (normalize_text(title) for title in titles) if t))
+        current = self._titles.get(anime_id)
+        if current is not None and tuple(title for title, _ in current) == normalized:
+            return
+        for gram in self._grams.get(anime_id, ()):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(anime_id)
+        entries = tuple((title, trigrams(title)) for title in normalized)
+        grams = set()
+        for _, title_grams in entries:
+            grams |= title_grams
+        for gram in grams:
+            self._postings[gram].add(anime_id)
+        self._titles[anime_id] = entries
+        self._grams[anime_id] = grams
+
+    @staticmethod
+    def _score(query: str, query_grams: Set[str], title: str, title_grams: Set[str]) -> float:
+        if title == query:
+            return 1.0
+        if title.startswith(query):
+            return 0.95
+        if f" {query}" in f" {title}":
+            return 0.9
+        shared = len(query_grams & title_grams)
+        if not shared:
+            return 0.0
+        # Mostly "how much of the query is in the title", a little "how much of the title is the query".
+        containment = shared / len(query_grams)
+        dice = 2 * shared / (len(query_grams) + len(title_grams))
+        return 0.8 * containment + 0.2 * dice
+
+    def search_ids(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        """Ranked ``(anime_id, score)`` pairs, best first, scores in 0..1."""
+        self.build()
+        normalized = normalize_text(query)
+        query_grams = trigrams(normalized)
+        if not query_grams:
+            return []
+
+        with self._lock:
+            counts: Dict[str, int] = defaultdict(int)
+            for gram in query_grams:
+                for anime_id in self._postings.get(gram, ()):
+                    counts[anime_id] += 1
+            needed = max(1, int(len(query_grams) * MIN_SHARED_FRACTION))
+            # Most shared trigrams first; among equals, titles with the fewest extra trigrams.
+            ranked = heapq.nlargest(
+                limit * CANDIDATES_PER_RESULT,
+                ((count, -len(self._grams[anime_id]), anime_id) for anime_id, count in counts.items() if count >= needed),
+            )
+            candidates = [(anime_id, self._titles[anime_id]) for _, _, anime_id in ranked]
+
+        scored = []
+        for anime_id, entries in candidates:
+            # Ties go to the shortest title, i.e. the one closest to the query.
+            score, shortest = max(
+                (self._score(normalized, query_grams, title, title_grams), -len(title))
+                for title, title_grams in entries
+            )
+            if score >= MIN_SCORE:
+                scored.append((score, shortest, anime_id))
+        scored.sort(reverse=True)
+        return [(anime_id, score) for score, _, anime_id in scored[:limit]]
+
+    def search(self, query: str, limit: int = 20) -> Tuple[List[AnimeResult], float]:
+        """Ranked results from the local catalog plus the best score (0 when nothing matched)."""
+        hits = self.search_ids(query, limit)
+        if not hits:
+            return [], 0.0
+        by_id = self.store.get_many([anime_id for anime_id, _ in hits])
+        results = [by_id[anime_id] for anime_id, _ in hits if anime_id in by_id]
+        return results, hits[0][1]
+
+    def is_confident(self, score: Optional[float]) -> bool:
+        return bool(score) and score >= CONFIDENT_SCORE
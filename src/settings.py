@@ -1,54 +1,204 @@
-import json
-from pathlib import Path
-from .storage import atomic_write_json
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .config import THEMES
+from .userdb import UserDatabase, get_user_db
+
+# Settings live in memory; the database is only read at startup and again
+# when another process has committed since the last look (checked at most
+# once per RELOAD_CHECK_INTERVAL). Parts of the app that depend on a setting
+# subscribe to it and apply changes as they happen, whether they come from
+# the settings menu or from another running instance. Callbacks touch the
+# UI, so they only ever run on the main thread, and never from inside a
+# read: changes are queued and delivered when a menu loop calls dispatch()
+# between key presses (or right away by set() on the main thread).
+
+RELOAD_CHECK_INTERVAL = 1.0
+
+
+def _on_main_thread() -> bool:
+    return threading.current_thread() is threading.main_thread()
+
+
+class Setting(NamedTuple):
+    type: type
+    default: Any
+    choices: Optional[Tuple[Any, ...]] = None
+
+
+QUALITIES = ("1080p", "720p", "480p")
+
+SETTINGS_SCHEMA = {
+    "default_quality": Setting(str, "1080p", QUALITIES),
+    "default_download_quality": Setting(str, "1080p", QUALITIES),
+    "download_mode": Setting(str, "internal", ("internal", "aria2c", "idm", "auto")),
+    "download_directory": Setting(str, "downloads"),
+    "download_connections": Setting(int, 8),
+    "download_concurrency": Setting(int, 2),
+    "download_bandwidth_limit": Setting(int, 0),  # KiB/s shared by batch downloads, 0 = unlimited
+    "catalog_sync": Setting(bool, True),  # Mirror browsed lists into the local catalog in the background
+    "player": Setting(str, "mpv", ("mpv", "vlc")),
+    "auto_next": Setting(bool, False),
+    "discord_rpc": Setting(bool, True),
+    "show_donation": Setting(bool, True),
+    "theme": Setting(str, "blue", tuple(THEMES)),
+    "analytics": Setting(bool, True),  # Allow users to opt-out of analytics
+}
+
+DEFAULT_SETTINGS = {key: setting.default for key, setting in SETTINGS_SCHEMA.items()}
+
+
+def coerce_setting(key: str, value: Any) -> Any:
+    """``value`` as the type the schema gives ``key``; raises ValueError if it doesn't fit."""
+    setting = SETTINGS_SCHEMA.get(key)
+    if setting is None:
+        return value
+    if setting.type is bool:
+        if not isinstance(value, bool):
+            raise ValueError(f"{key} must be true or false, not {value!r}")
+    elif setting.type is int:
+        if isinstance(value, bool):
+            raise ValueError(f"{key} must be a number, not {value!r}")
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{key} must be a number, not {value!r}") from None
+    else:
+        value = setting.type(value)
+    if setting.choices is not None and value not in setting.choices:
+        raise ValueError(f"{key} must be one of {', '.join(map(str, setting.choices))}, not {value!r}")
+    return value
+
 
 class SettingsManager:
-    def __init__(self):
-        self.config_file = self._get_config_path()
+    def __init__(self, db: Optional[UserDatabase] = None):
+        self.db = db or get_user_db()
+        self._lock = threading.RLock()
+        self._subscribers: Dict[str, List[Callable[[Any], None]]] = {}
+        self._pending = deque()
+        self._version = self._data_version()
+        self._checked_at = time.monotonic()
         self.settings = self._load_settings()
 
-    def _get_config_path(self) -> Path:
-        home_dir = Path.home()
-        db_dir = home_dir / ".ani-cli-arabic" / "database"
-        db_dir.mkdir(parents=True, exist_ok=True)
-        return db_dir / "config.json"
+    def _data_version(self) -> Optional[int]:
+        try:
+            return self.db.data_version()
+        except sqlite3.Error:
+            return None
 
     def _load_settings(self) -> dict:
-        defaults = {
-            "default_quality": "1080p",
-            "default_download_quality": "1080p",
-            "download_mode": "internal",
-            "download_directory": "downloads",
-            "player": "mpv",
-            "auto_next": False,
-            "discord_rpc": True,
-            "show_donation": True,
-            "theme": "blue",
-            "analytics": True  # Allow users to opt-out of analytics
-        }
-        
-        if not self.config_file.exists():
-            return defaults
-            
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                saved = json.load(f)
-                if not isinstance(saved, dict):
-                    return defaults
-                return {**defaults, **saved}
-        except (json.JSONDecodeError, IOError, OSError):
-            return defaults
+            stored = self.db.get_settings()
+        except sqlite3.Error:
+            return dict(DEFAULT_SETTINGS)
+        settings = dict(DEFAULT_SETTINGS)
+        for key, value in stored.items():
+            try:
+                settings[key] = coerce_setting(key, value)
+            except ValueError:
+                # Hand-edited or written by another version; keep the default.
+                continue
+        return settings
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        version = self._data_version()
+        if version is None or version == self._version:
+            return
+        settings = self._load_settings()
+        with self._lock:
+            self._version = version
+            changed = {key: value for key, value in settings.items() if self.settings.get(key) != value}
+            self.settings = settings
+        for key, value in changed.items():
+            self._notify(key, value)
+
+    def reload(self) -> None:
+        """Pick up changes made by other processes now instead of on the next read."""
+        self._checked_at = 0.0
+        self._maybe_reload()
 
     def save(self):
         try:
-            atomic_write_json(self.config_file, self.settings, indent=4, ensure_ascii=False)
-        except (IOError, OSError, ValueError, TypeError) as e:
-            import sys
+            self.db.set_settings(self.settings)
+        except sqlite3.Error as e:
             print(f"Warning: Failed to save settings: {e}", file=sys.stderr)
 
     def get(self, key):
+        # Background threads read the in-memory values; only the UI thread
+        # looks for changes from other processes. Those are queued for
+        # dispatch(), never applied from here.
+        if _on_main_thread():
+            self._maybe_reload()
         return self.settings.get(key)
 
     def set(self, key, value):
-        self.settings[key] = value
-        self.save()
+        value = coerce_setting(key, value)
+        with self._lock:
+            changed = self.settings.get(key) != value
+            self.settings[key] = value
+        try:
+            self.db.set_settings({key: value})
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to save settings: {e}", file=sys.stderr)
+        if changed:
+            self._notify(key, value)
+            self.dispatch()
+
+    # Subscribers
+
+    def subscribe(self, key: str, callback: Callable[[Any], None]) -> None:
+        """Call ``callback(new_value)`` on the main thread whenever ``key`` changes."""
+        with self._lock:
+            self._subscribers.setdefault(key, []).append(callback)
+
+    def unsubscribe(self, key: str, callback: Callable[[Any], None]) -> None:
+        with self._lock:
+            callbacks = self._subscribers.get(key, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def _notify(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._pending.append((key, value))
+
+    def dispatch(self) -> None:
+        """Pick up changes from other processes and run the callbacks for queued changes.
+
+        Meant for menu loops, between key presses; does nothing off the main thread.
+        """
+        if not _on_main_thread():
+            return
+        self._maybe_reload()
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                key, value = self._pending.popleft()
+                callbacks = list(self._subscribers.get(key, ()))
+            for callback in callbacks:
+                try:
+                    callback(value)
+                except Exception as e:
+                    print(f"Warning: Failed to apply setting {key}: {e}", file=sys.stderr)
+
+
+_settings = None
+_settings_lock = threading.Lock()
+
+
+def get_settings() -> SettingsManager:
+    """The process-wide settings, shared by every part of the app."""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = SettingsManager()
+    return _settings
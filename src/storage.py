@@ -4,8 +4,15 @@ import tempfile
 from pathlib import Path
 from typing import Any
 
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:
+    fcntl = None
+    import msvcrt
 
-def atomic_write_json(path: Path, data: Any, indent: int = 4, ensure_ascii: bool = False) -> None:
+
+def atomic_write_json(path: Path, data: Any, indent: int = 4, ensure_ascii: bool = False, fsync: bool = True) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
     fd, temp_path = tempfile.mkstemp(
@@ -18,11 +25,32 @@ def atomic_write_json(path: Path, data: Any, indent: int = 4, ensure_ascii: bool
         with os.fdopen(fd, "w", encoding="utf-8") as handle:
             json.dump(data, handle, indent=indent, ensure_ascii=ensure_ascii)
             handle.flush()
-            os.fsync(handle.fileno())
+            if fsync:
+                os.fsync(handle.fileno())
         os.replace(temp_path, path)
     finally:
         try:
             if os.path.exists(temp_path):
                 os.remove(temp_path)
         except OSError:
-            pass
\ No newline at end of file
+            pass
+
+def try_lock_file(handle) -> bool:
+    """Take a non-blocking exclusive lock on an open file; False if another process holds it.
+
+    The lock lasts until the handle is closed (or the process exits).
+    """
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            # Lock the first byte; the region may lie past the end of an empty file.
+            position = handle.tell()
+            handle.seek(0)
+            try:
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            finally:
+                handle.seek(position)
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,96 @@
+import heapq
+import threading
+import time
+from typing import Callable, List
+
+from .models import AnimeBatch, AnimeResult
+
+# How far past the last requested row the latest list is read before ranking,
+# so a page isn't cut from a too-short sample.
+TRENDING_LOOKAHEAD = 20
+# A trending view older than this is rebuilt the next time the list is opened
+# from the top. Scrolling an open list never triggers a rebuild.
+TRENDING_TTL = 10 * 60
+
+
+class TrendingIndex:
+    """Trending order (most popular first) built incrementally from the latest-anime list.
+
+    Each page of the latest-anime list is fetched once, at the server's own
+    page boundaries, and its rows are kept in a columnar AnimeBatch with only
+    (popularity, row) pairs on the heap. Rows are popped into the served order
+    as pages are requested, so a page already shown never changes and later
+    pages only cost the rows they add; candidates that are never shown are
+    never held as objects.
+
+    ``fetch_page(from_index)`` returns one whole API page of parsed results.
+    """
+
+    def __init__(self, fetch_page: Callable[[int], List[AnimeResult]],
+                 lookahead: int = TRENDING_LOOKAHEAD, ttl: float = TRENDING_TTL):
+        self.fetch_page = fetch_page
+        self.lookahead = lookahead
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._candidates = AnimeBatch()
+        self._heap = []
+        self._served: List[AnimeResult] = []
+        self._ids = set()
+        self._fetched = 0
+        self._page_size = 0
+        self._exhausted = False
+        self._built_at = time.time()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def _is_expired(self) -> bool:
+        return time.time() - self._built_at > self.ttl
+
+    def _fill(self, needed: int) -> None:
+        """Read latest-anime pages until ``needed`` rows have been seen or the list ends."""
+        while self._fetched < needed and not self._exhausted:
+            try:
+                batch = self.fetch_page(self._fetched)
+            except Exception:
+                # Serve what we have; the next call tries again.
+                return
+            self._fetched += len(batch)
+            if not batch or len(batch) < self._page_size:
+                self._exhausted = True
+            self._page_size = max(self._page_size, len(batch))
+            for result in batch:
+                popularity = result.popularity_value
+                if result.id in self._ids or popularity is None:
+                    continue
+                self._ids.add(result.id)
+                # The row number keeps equal popularity in list order.
+                heapq.heappush(self._heap, (popularity, len(self._candidates)))
+                self._candidates.append(result)
+
+    def get(self, from_index: int = 0, limit: int = 15) -> List[AnimeResult]:
+        with self._lock:
+            if from_index == 0 and self._is_expired():
+                self._reset()
+
+            end = from_index + limit
+            self._fill(end + self.lookahead)
+            while len(self._served) < end and self._heap:
+                self._served.append(self._candidates[heapq.heappop(self._heap)[1]])
+                if not self._exhausted and len(self._heap) < self.lookahead:
+                    self._fill(self._fetched + self.lookahead)
+            return self._served[from_index:end]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'fetched': self._fetched,
+                'served': len(self._served),
+                'pending': len(self._heap),
+                'exhausted': self._exhausted,
+                'age': time.time() - self._built_at,
+            }
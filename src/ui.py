@@ -1,14 +1,8 @@
 import time
 import threading
-import importlib
 import os
-import sys
 import re
-import requests
-from io import BytesIO
-from functools import lru_cache
-import numpy as np
-from PIL import Image, ImageEnhance
+from collections import OrderedDict
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
@@ -21,28 +15,48 @@ from rich.theme import Theme
 from rich.box import HEAVY
 from rich.spinner import Spinner
 
-from .config import (
-    COLOR_BORDER, COLOR_PROMPT, COLOR_PRIMARY_TEXT, COLOR_TITLE,
-    COLOR_SECONDARY_TEXT, COLOR_HIGHLIGHT_FG, COLOR_HIGHLIGHT_BG,
-    COLOR_ERROR, COLOR_LOADING_SPINNER, COLOR_ASCII, HEADER_ART
-)
-from .utils import get_key, RawTerminal, restore_terminal_for_input, enter_raw_mode_after_input
-from . import config as config_module
+from .config import HEADER_ART, THEMES, get_theme_colors, theme_color
+from .utils import get_key, RawTerminal, restore_terminal_for_input, enter_raw_mode_after_input, format_position
+from .models import EpisodeIndex
+from .poster import get_poster_cache
+from .settings import get_settings
+from .async_api import get_runner
 
 class UIManager:
+    POSTER_TEXT_CACHE_SIZE = 50
+
     def __init__(self):
-        self.theme = Theme({
-            "panel.border": COLOR_BORDER,
-            "prompt.prompt": COLOR_PROMPT,
-            "prompt.default": COLOR_PRIMARY_TEXT,
-            "title": COLOR_TITLE,
-            "secondary": COLOR_SECONDARY_TEXT,
-            "highlight": f"{COLOR_HIGHLIGHT_FG} on {COLOR_HIGHLIGHT_BG}",
-            "error": COLOR_ERROR,
-            "info": COLOR_PRIMARY_TEXT,
-            "loading": COLOR_LOADING_SPINNER,
-        })
+        self.theme = self._build_theme(get_theme_colors())
         self.console = Console(theme=self.theme)
+        self.poster_cache = get_poster_cache()
+        self._poster_texts = OrderedDict()
+        self._poster_lock = threading.Lock()
+        self._theme_pushed = False
+        get_settings().subscribe('theme', self.apply_theme)
+
+    @staticmethod
+    def _build_theme(colors) -> Theme:
+        # Everything is drawn with these style names, never with the colors themselves.
+        return Theme({
+            "panel.border": colors["border"],
+            "prompt.prompt": colors["prompt"],
+            "prompt.default": colors["primary_text"],
+            "title": colors["title"],
+            "secondary": colors["secondary_text"],
+            "highlight": f"{colors['highlight_fg']} on {colors['highlight_bg']}",
+            "error": colors["error"],
+            "info": colors["primary_text"],
+            "loading": colors["loading_spinner"],
+            "ascii": colors["ascii"],
+        })
+
+    def apply_theme(self, theme_name):
+        """Switch the console to another theme in place; screens pick it up on their next render."""
+        self.theme = self._build_theme(get_theme_colors(theme_name))
+        if self._theme_pushed:
+            self.console.pop_theme()
+        self.console.push_theme(self.theme)
+        self._theme_pushed = True
 
     def clear(self):
         os.system('cls' if os.name == 'nt' else 'clear')
@@ -51,8 +65,13 @@ class UIManager:
     def print(self, *args, **kwargs):
         self.console.print(*args, **kwargs)
 
+    def _read_key(self):
+        """Next key press, after applying setting changes other threads queued meanwhile."""
+        get_settings().dispatch()
+        return get_key()
+
     def get_header_renderable(self) -> Text:
-        return Text(HEADER_ART, style=COLOR_ASCII)
+        return Text(HEADER_ART, style="ascii")
 
     def render_message(self, title: str, message: str, style_name: str):
         self.clear()
@@ -69,7 +88,7 @@ class UIManager:
             Align.center(message_text, vertical="middle"),
             title=Text(title, style="title"),
             box=HEAVY,
-            border_style="#FF6B6B" if style_name == "error" else COLOR_BORDER,
+            border_style="#FF6B6B" if style_name == "error" else "panel.border",
             padding=(2, 4),
             width=60
         )
@@ -81,7 +100,7 @@ class UIManager:
         self.clear()
 
         message_text = Text(message, style="info", justify="center")
-        border_style = "#FF6B6B" if style_name == "error" else COLOR_BORDER
+        border_style = "#FF6B6B" if style_name == "error" else "panel.border"
 
         panel = Panel(
             Align.center(message_text, vertical="middle"),
@@ -103,50 +122,34 @@ class UIManager:
     def run_with_loading(self, message: str, target_func, *args):
         self.clear()
         
-        result_container = {}
-        thread_done = threading.Event()
-
-        def worker():
-            try:
-                result = target_func(*args)
-                result_container['result'] = result
-            except Exception as e:
-                result_container['error'] = e
-            finally:
-                thread_done.set()
-
-        loading_thread = threading.Thread(target=worker, daemon=True)
-        loading_thread.start()
+        job = get_runner().submit_blocking(target_func, *args)
 
-        spinner = Spinner("dots", text=Text(f" {message}", style=COLOR_LOADING_SPINNER))
+        spinner = Spinner("dots", text=Text(f" {message}", style="loading"))
         loading_panel = Panel(
             Align.center(spinner, vertical="middle"),
             box=HEAVY,
-            border_style=COLOR_BORDER,
+            border_style="panel.border",
             padding=(2, 4),
             title=Text("LOADING", style="title")
         )
 
         try:
             with Live(Align.center(loading_panel, vertical="middle", height=self.console.height), console=self.console, refresh_per_second=12, screen=True):
-                while not thread_done.is_set():
+                while not job.done():
                     time.sleep(0.05)
         except KeyboardInterrupt:
-            thread_done.set()
+            job.cancel()
             raise
 
         self.clear()
+        return job.result()
 
-        if 'error' in result_container:
-            raise result_container['error']
-        
-        return result_container.get('result')
-
-    def anime_selection_menu(self, results, load_more_callback=None):
+    def anime_selection_menu(self, results, load_more_callback=None, results_stream=None, rerank=None):
         selected = 0
         scroll_offset = 0
-        is_loading_more = False
+        is_loading_more = results_stream is not None
         has_more = True
+        menu_active = True
         loading_dots = 0
         details_cache = {}
         results_lock = threading.Lock()  # Cache for anime details to avoid regeneration
@@ -195,17 +198,17 @@ class UIManager:
             
             # Show loading indicator in footer if loading more
             if is_loading_more:
-                theme_fade = [COLOR_PROMPT, COLOR_TITLE, COLOR_SECONDARY_TEXT]
+                theme_fade = ["prompt.prompt", "title", "secondary"]
                 base_text = " Loading more... "
                 animated = Text(justify="center")
                 for idx, ch in enumerate(base_text):
                     color_idx = (loading_dots + idx) % len(theme_fade)
                     animated.append(ch, style=theme_fade[color_idx])
                 loading_dots += 1
-                footer_render = Panel(animated, box=HEAVY, border_style=COLOR_BORDER)
+                footer_render = Panel(animated, box=HEAVY, border_style="panel.border")
             else:
                 footer_text = "↑↓ Navigate | ENTER Select | b Back | q Quit"
-                footer_render = Panel(Text(footer_text, justify="center", style="secondary"), box=HEAVY, border_style=COLOR_BORDER)
+                footer_render = Panel(Text(footer_text, justify="center", style="secondary"), box=HEAVY, border_style="panel.border")
             content_layout["footer"].update(footer_render)
             
             max_display = target_height - 11 - 3 - 3
@@ -227,7 +230,7 @@ class UIManager:
                 left_content,
                 title=Text(f"Search Results: {len(results)}", style="title"),
                 box=HEAVY,
-                border_style=COLOR_BORDER,
+                border_style="panel.border",
                 padding=(0, 1)
             ))
             
@@ -243,7 +246,7 @@ class UIManager:
                     container, 
                     title=Text("Details", style="title"),
                     box=HEAVY,
-                    border_style=COLOR_BORDER
+                    border_style="panel.border"
                 ))
                 return layout
             
@@ -323,7 +326,7 @@ class UIManager:
                 container, 
                 title=Text("Details", style="title"),
                 box=HEAVY,
-                border_style=COLOR_BORDER
+                border_style="panel.border"
             ))
             
             return layout
@@ -332,149 +335,129 @@ class UIManager:
         
         with RawTerminal():
             with Live(generate_renderable(), console=self.console, auto_refresh=False, screen=True, refresh_per_second=10) as live:
-                while True:
-                    key = get_key()
-                    max_display = target_height - 11 - 3 - 3
-                    needs_update = False
+                if results_stream is not None:
+                    # Remaining pages of the first load keep arriving while the menu is open.
+                    def consume_stream():
+                        nonlocal is_loading_more, selected, scroll_offset
+                        try:
+                            for batch in results_stream:
+                                with results_lock:
+                                    results.extend(batch)
+                                if menu_active:
+                                    live.update(generate_renderable(), refresh=True)
+                            if rerank is not None:
+                                # Batches arrive in completion order; settle the final
+                                # order and keep the cursor on the same anime.
+                                with results_lock:
+                                    if not menu_active:
+                                        return
+                                    current = results[selected] if results else None
+                                    results[:] = rerank(results)
+                                    if current is not None:
+                                        selected = next(i for i, res in enumerate(results) if res is current)
+                                        max_display = target_height - 11 - 3 - 3
+                                        if selected < scroll_offset:
+                                            scroll_offset = selected
+                                        elif selected >= scroll_offset + max_display:
+                                            scroll_offset = selected - max_display + 1
+                        except Exception:
+                            pass
+                        finally:
+                            is_loading_more = False
+                            if menu_active:
+                                live.update(generate_renderable(), refresh=True)
+
+                    get_runner().submit_blocking(consume_stream)
+
+                try:
+                    while True:
+                        key = self._read_key()
+                        max_display = target_height - 11 - 3 - 3
+                        needs_update = False
                     
-                    if key == 'UP' and selected > 0:
-                        selected -= 1
-                        if selected < scroll_offset:
-                            scroll_offset = selected
-                        needs_update = True
-                    elif key == 'DOWN' and selected < len(results) - 1:
-                        selected += 1
-                        if selected >= scroll_offset + max_display:
-                            scroll_offset = selected - max_display + 1
-                        needs_update = True
+                        if key == 'UP' and selected > 0:
+                            selected -= 1
+                            if selected < scroll_offset:
+                                scroll_offset = selected
+                            needs_update = True
+                        elif key == 'DOWN' and selected < len(results) - 1:
+                            selected += 1
+                            if selected >= scroll_offset + max_display:
+                                scroll_offset = selected - max_display + 1
+                            needs_update = True
                         
-                        # Predictive loading: when user is 5 items from the end, load more
-                        if load_more_callback and has_more and not is_loading_more:
-                            if selected >= len(results) - 5:
-                                is_loading_more = True
-                                live.update(generate_renderable(), refresh=True)
+                            # Predictive loading: when user is 5 items from the end, load more
+                            if load_more_callback and has_more and not is_loading_more:
+                                if selected >= len(results) - 5:
+                                    is_loading_more = True
+                                    live.update(generate_renderable(), refresh=True)
                                 
-                                def load_in_background():
-                                    nonlocal is_loading_more, has_more
-                                    try:
-                                        new_results = load_more_callback(len(results))
-                                        if new_results:
-                                            with results_lock:
-                                                results.extend(new_results)
-                                            live.update(generate_renderable(), refresh=True)
-                                        else:
+                                    def load_in_background():
+                                        nonlocal is_loading_more, has_more
+                                        try:
+                                            new_results = load_more_callback(len(results))
+                                            if new_results:
+                                                with results_lock:
+                                                    results.extend(new_results)
+                                                live.update(generate_renderable(), refresh=True)
+                                            else:
+                                                has_more = False
+                                        except Exception:
                                             has_more = False
-                                    except Exception:
-                                        has_more = False
-                                    finally:
-                                        is_loading_more = False
-                                        live.update(generate_renderable(), refresh=True)
+                                        finally:
+                                            is_loading_more = False
+                                            live.update(generate_renderable(), refresh=True)
                                 
-                                thread = threading.Thread(target=load_in_background, daemon=True)
-                                thread.start()
-                    elif key == 'ENTER':
-                        return selected
-                    elif key == 'b':
-                        return None
-                    elif key == 'q' or key == 'ESC':
-                        return -1
+                                    get_runner().submit_blocking(load_in_background)
+                        elif key == 'ENTER':
+                            with results_lock:
+                                # The index must not be re-ranked away before the caller reads it.
+                                menu_active = False
+                                return selected
+                        elif key == 'b':
+                            return None
+                        elif key == 'q' or key == 'ESC':
+                            return -1
                     
-                    if needs_update:
-                        live.update(generate_renderable(), refresh=True)
+                        if needs_update:
+                            live.update(generate_renderable(), refresh=True)
+                finally:
+                    menu_active = False
 
-    @lru_cache(maxsize=50)
     def _generate_poster_ansi(self, url, max_height):
-        """Generate ANSI art from poster URL with automatic LRU caching."""
+        """Generate ANSI art from poster URL, served from the poster cache when possible."""
         if not url:
             return Text("No poster available", style="secondary")
-        
-        try:
-            res = requests.get(url, timeout=5)
-            img = Image.open(BytesIO(res.content)).convert("RGB")
-            
-            enhancer = ImageEnhance.Sharpness(img)
-            img = enhancer.enhance(1.8)
-            enhancer = ImageEnhance.Contrast(img)
-            img = enhancer.enhance(1.15)
-            
-            target_pixel_height = max_height * 2
-            new_height = target_pixel_height
-            new_width = int((img.width / img.height) * new_height * 2.0)
-            
-            if new_width % 2 != 0:
-                new_width -= 1
-            if new_height % 2 != 0:
-                new_height -= 1
-            
-            # Use BILINEAR for speed (still good quality)
-            img = img.resize((new_width, new_height), Image.Resampling.BILINEAR)
-            arr = np.array(img, dtype=np.uint8)
-            
-            quadrants = [' ', '▘', '▝', '▀', '▖', '▌', '▞', '▛', '▗', '▚', '▐', '▜', '▄', '▙', '▟', '█']
-            output_lines = []
-            
-            # Process in batches for speed
-            for y in range(0, new_height, 2):
-                line_parts = []  # No padding to fit outline
-                for x in range(0, new_width, 2):
-                    # Get 2x2 block
-                    p0 = arr[y, x]
-                    p1 = arr[y, x+1] if x+1 < new_width else p0
-                    p2 = arr[y+1, x] if y+1 < new_height else p0
-                    p3 = arr[y+1, x+1] if (y+1 < new_height and x+1 < new_width) else p0
-                    
-                    def calculate_luminance(p):
-                        return 0.299*p[0] + 0.587*p[1] + 0.114*p[2]
-                    lums = [calculate_luminance(p0), calculate_luminance(p1), calculate_luminance(p2), calculate_luminance(p3)]
-                    avg_lum = sum(lums) / 4
-                    
-                    # Split by luminance threshold
-                    mask = [lum_val > avg_lum for lum_val in lums]
-                    
-                    # Calculate average colors for each group
-                    bright = [p for i, p in enumerate([p0, p1, p2, p3]) if mask[i]]
-                    dark = [p for i, p in enumerate([p0, p1, p2, p3]) if not mask[i]]
-                    
-                    if bright:
-                        fg = np.mean(bright, axis=0).astype(int)
-                    else:
-                        fg = np.mean([p0, p1, p2, p3], axis=0).astype(int)
-                    
-                    if dark:
-                        bg = np.mean(dark, axis=0).astype(int)
-                    else:
-                        bg = fg
-                    
-                    # Determine quadrant character
-                    if all(mask):
-                        char_idx = 15
-                    elif not any(mask):
-                        char_idx = 15
-                    else:
-                        q_val = 0
-                        if mask[0]:
-                            q_val += 1
-                        if mask[1]:
-                            q_val += 2
-                        if mask[2]:
-                            q_val += 4
-                        if mask[3]:
-                            q_val += 8
-                        char_idx = q_val
-                    
-                    char = quadrants[char_idx]
-                    line_parts.append(f"\033[38;2;{fg[0]};{fg[1]};{fg[2]}m\033[48;2;{bg[0]};{bg[1]};{bg[2]}m{char}")
-                
-                line_parts.append("\033[0m")
-                output_lines.append("".join(line_parts))
-            
-            result = Text.from_ansi("\n".join(output_lines))
-            
-            return result
-            
-        except Exception:
+
+        key = (url, max_height)
+        with self._poster_lock:
+            cached = self._poster_texts.get(key)
+            if cached is not None:
+                self._poster_texts.move_to_end(key)
+                return cached
+
+        ansi = self.poster_cache.render(url, max_height, self._poster_color_mode())
+        if ansi is None:
+            # Not remembered here; the poster cache only keeps failures briefly.
             return Text("Poster unavailable", style="dim")
 
+        result = Text.from_ansi(ansi)
+        with self._poster_lock:
+            self._poster_texts[key] = result
+            while len(self._poster_texts) > self.POSTER_TEXT_CACHE_SIZE:
+                self._poster_texts.popitem(last=False)
+        return result
+
+    def _poster_color_mode(self):
+        color_system = self.console.color_system
+        return color_system or "none"
+
+    def has_cached_poster(self, url, max_height):
+        with self._poster_lock:
+            if (url, max_height) in self._poster_texts:
+                return True
+        return self.poster_cache.has_rendered(url, max_height, self._poster_color_mode())
+
     def selection_menu(self, items, title="Select Item"):
         selected = 0
         scroll_offset = 0
@@ -502,7 +485,7 @@ class UIManager:
                 content,
                 title=Text(title, style="title"),
                 box=HEAVY,
-                border_style=COLOR_BORDER,
+                border_style="panel.border",
                 padding=(1, 2)
             )
             
@@ -513,7 +496,7 @@ class UIManager:
         with RawTerminal():
             with Live(generate_renderable(), console=self.console, auto_refresh=False, screen=True) as live:
                 while True:
-                    key = get_key()
+                    key = self._read_key()
                     max_display = target_height - 5
                     
                     if key == 'UP' and selected > 0:
@@ -538,6 +521,7 @@ class UIManager:
         rpc_manager=None,
         anime_poster=None,
         last_watched_ep=None,
+        watched_episodes=None,
         is_favorite=False,
         anime_details=None,
         default_download_quality="1080p",
@@ -545,6 +529,8 @@ class UIManager:
         download_path="downloads",
         initial_selected=0
     ):
+        if not isinstance(episodes, EpisodeIndex):
+            episodes = EpisodeIndex(episodes)
         selected = max(0, min(int(initial_selected or 0), len(episodes) - 1)) if episodes else 0
         scroll_offset = 0
         
@@ -613,12 +599,12 @@ class UIManager:
         content_layout = layout["content"] if vertical_pad > 0 else layout
 
         def generate_renderable():
-            content_layout["header"].update(Panel(Text(anime_title, justify="center", style="title"), box=HEAVY, border_style=COLOR_BORDER))
+            content_layout["header"].update(Panel(Text(anime_title, justify="center", style="title"), box=HEAVY, border_style="panel.border"))
 
             footer_text = Text(justify="center")
             footer_text.append("↑↓ Navigate | ENTER Select | D Quick Download | G Jump | F Fav | M Batch | B Back\n", style="secondary")
             footer_text.append(footer_hint, style="dim")
-            content_layout["footer"].update(Panel(footer_text, box=HEAVY, border_style=COLOR_BORDER))
+            content_layout["footer"].update(Panel(footer_text, box=HEAVY, border_style="panel.border"))
             
             max_display = target_height - 3 - 3 - 2
             left_content = Text()
@@ -645,6 +631,8 @@ class UIManager:
                 suffix = ""
                 if is_last_watched:
                     suffix = " 👁" # Eye icon to indicate watched
+                elif watched_episodes and str(ep.display_num) in watched_episodes:
+                    suffix = " ✓"
                 
                 if is_selected:
                     left_content.append(f"▶ {ep.display_num}{ep_type_str}{suffix}\n", style="highlight")
@@ -656,7 +644,7 @@ class UIManager:
                 left_content,
                 title=Text(f"Episodes: {len(episodes)}", style="title"),
                 box=HEAVY,
-                border_style=COLOR_BORDER,
+                border_style="panel.border",
                 padding=(0, 1)
             ))
             
@@ -666,7 +654,7 @@ class UIManager:
                     Align.center(poster_renderable, vertical="middle"),
                     title=Text("Poster", style="title"),
                     box=HEAVY,
-                    border_style=COLOR_BORDER,
+                    border_style="panel.border",
                     padding=(0, 0)
                 ))
             else:
@@ -674,7 +662,7 @@ class UIManager:
                     Align.center(Text("No Poster", style="dim"), vertical="middle"),
                     title=Text("Poster", style="title"),
                     box=HEAVY,
-                    border_style=COLOR_BORDER
+                    border_style="panel.border"
                 ))
 
             # Show anime details in right panel
@@ -734,7 +722,7 @@ class UIManager:
                     details_container,
                     title=Text(f"{fav_icon} Info", style="title"),
                     box=HEAVY,
-                    border_style=COLOR_BORDER,
+                    border_style="panel.border",
                     padding=(1, 4)
                 ))
             else:
@@ -757,7 +745,7 @@ class UIManager:
                     Align.center(right_content, vertical="middle"),
                     title=Text(f"{fav_icon} Info", style="title"),
                     box=HEAVY,
-                    border_style=COLOR_BORDER
+                    border_style="panel.border"
                 ))
             return layout
 
@@ -766,7 +754,7 @@ class UIManager:
         with RawTerminal():
             with Live(generate_renderable(), console=self.console, auto_refresh=False, screen=True, refresh_per_second=10) as live:
                 while True:
-                    key = get_key()
+                    key = self._read_key()
                     max_display = target_height - 3 - 3 - 2
                     
                     if key == 'UP' and selected > 0:
@@ -798,12 +786,12 @@ class UIManager:
                             prompt_panel = Panel(
                                 Text("Jump to episode number:", style="info", justify="center"), 
                                 box=HEAVY, 
-                                border_style=COLOR_BORDER,
+                                border_style="panel.border",
                             )
 
                             self.console.print(Align.center(prompt_panel, vertical="middle", height=7))
                             
-                            prompt_string = f" {Text('›', style=COLOR_PROMPT)} "
+                            prompt_string = f" {Text('›', style='prompt.prompt')} "
                             pad_width = (self.console.width - 30) // 2
                             padding = " " * max(0, pad_width)
 
@@ -811,13 +799,9 @@ class UIManager:
                             
                             try:
                                 ep_num_float = float(ep_input)
-                                target_idx = -1
-                                for idx, ep in enumerate(episodes):
-                                    if float(ep.display_num) == ep_num_float:
-                                        target_idx = idx
-                                        break
+                                target_idx = episodes.find_value(ep_num_float)
                                 
-                                if target_idx != -1:
+                                if target_idx is not None:
                                     selected = target_idx
                                     scroll_offset = max(0, selected - (max_display // 2))
                                 else:
@@ -843,16 +827,12 @@ class UIManager:
                         return -1
 
     def batch_selection_menu(self, episodes):
+        if not isinstance(episodes, EpisodeIndex):
+            episodes = EpisodeIndex(episodes)
         selected = 0
         scroll_offset = 0
         marked = set()
 
-        def _episode_value(ep, idx):
-            try:
-                return float(ep.display_num)
-            except (TypeError, ValueError):
-                return float(idx + 1)
-
         def _find_episode_index(ep_input):
             ep_input = (ep_input or "").strip()
             if not ep_input:
@@ -860,26 +840,20 @@ class UIManager:
 
             try:
                 target = float(ep_input)
-                for idx, ep in enumerate(episodes):
-                    if _episode_value(ep, idx) == target:
-                        return idx
-                return -1
             except ValueError:
-                if ep_input.isdigit():
-                    idx = int(ep_input) - 1
-                    if 0 <= idx < len(episodes):
-                        return idx
                 return -1
+            idx = episodes.find_value(target)
+            return -1 if idx is None else idx
 
         def _prompt_centered(title_text):
             prompt_panel = Panel(
                 Text(title_text, style="info", justify="center"),
                 box=HEAVY,
-                border_style=COLOR_BORDER,
+                border_style="panel.border",
             )
 
             self.console.print(Align.center(prompt_panel, vertical="middle", height=7))
-            prompt_string = f" {Text('›', style=COLOR_PROMPT)} "
+            prompt_string = f" {Text('›', style='prompt.prompt')} "
             pad_width = (self.console.width - 30) // 2
             padding = " " * max(0, pad_width)
             return Prompt.ask(f"{padding}{prompt_string}", console=self.console).strip()
@@ -895,12 +869,10 @@ class UIManager:
                 start_val, end_val = end_val, start_val
 
             added = 0
-            for idx, ep in enumerate(episodes):
-                ep_val = _episode_value(ep, idx)
-                if start_val <= ep_val <= end_val:
-                    if idx not in marked:
-                        added += 1
-                    marked.add(idx)
+            for idx in episodes.indices_between(start_val, end_val):
+                if idx not in marked:
+                    added += 1
+                marked.add(idx)
             return added
         
         def generate_renderable():
@@ -931,7 +903,7 @@ class UIManager:
                 Align.center(content, vertical="middle"),
                 title=Text(f"Batch Download ({len(marked)} selected)", style="title"),
                 box=HEAVY,
-                border_style=COLOR_BORDER,
+                border_style="panel.border",
                 subtitle=Text("SPACE Toggle | A All | N None | R Range | G Jump | ENTER Download | B Back", style="secondary")
             )
 
@@ -940,7 +912,7 @@ class UIManager:
         with RawTerminal():
             with Live(Align.center(generate_renderable(), vertical="middle", height=self.console.height), console=self.console, auto_refresh=False, screen=True, refresh_per_second=10) as live:
                 while True:
-                    key = get_key()
+                    key = self._read_key()
                     max_display = max(6, self.console.height - 12)
                     
                     if key == 'UP' and selected > 0:
@@ -1008,7 +980,7 @@ class UIManager:
         def generate_renderable():
             table = Table(box=None, show_header=False, padding=(0, 1), expand=True)
             table.add_column("Title", style="info")
-            table.add_column("Last Ep", style="secondary", justify="right", width=15)
+            table.add_column("Last Ep", style="secondary", justify="right", width=18)
             table.add_column("Date", style="secondary", justify="right", width=20)
             
             max_display = self.console.height - 10
@@ -1020,17 +992,20 @@ class UIManager:
                 
                 title = item['title'][:50] + "..." if len(item['title']) > 50 else item['title']
                 date_str = item.get('last_updated', '').split('T')[0]
+                ep_str = f"Ep {item.get('episode', '?')}"
+                if not item.get('completed', True) and item.get('position'):
+                    ep_str += f" @{format_position(item['position'])}"
                 
                 if is_selected:
                     table.add_row(
                         Text(f"▶ {title}", style="highlight"),
-                        Text(f"Ep {item.get('episode', '?')}", style="highlight"),
+                        Text(ep_str, style="highlight"),
                         Text(date_str, style="highlight")
                     )
                 else:
                     table.add_row(
                         f"  {title}",
-                        f"Ep {item.get('episode', '?')}",
+                        ep_str,
                         date_str
                     )
             
@@ -1038,7 +1013,7 @@ class UIManager:
                 table,
                 title=Text(f"Continue Watching ({len(history_items)})", style="title"),
                 box=HEAVY,
-                border_style=COLOR_BORDER,
+                border_style="panel.border",
                 subtitle=Text("ENTER Resume | B Back", style="secondary")
             )
 
@@ -1047,7 +1022,7 @@ class UIManager:
         with RawTerminal():
             with Live(Align.center(generate_renderable(), vertical="middle", height=self.console.height), console=self.console, auto_refresh=False, screen=True, refresh_per_second=10) as live:
                 while True:
-                    key = get_key()
+                    key = self._read_key()
                     max_display = self.console.height - 10
                     
                     if key == 'UP' and selected > 0:
@@ -1099,7 +1074,7 @@ class UIManager:
                 table,
                 title=Text(f"Favorites ({len(fav_items)})", style="title"),
                 box=HEAVY,
-                border_style=COLOR_BORDER,
+                border_style="panel.border",
                 subtitle=Text("ENTER Watch | R Remove | B Back", style="secondary")
             )
 
@@ -1108,7 +1083,7 @@ class UIManager:
         with RawTerminal():
             with Live(Align.center(generate_renderable(), vertical="middle", height=self.console.height), console=self.console, auto_refresh=False, screen=True, refresh_per_second=10) as live:
                 while True:
-                    key = get_key()
+                    key = self._read_key()
                     max_display = self.console.height - 10
                     
                     if key == 'UP' and selected > 0:
@@ -1139,11 +1114,9 @@ class UIManager:
             ("Discord Rich Presence", [True, False], "discord_rpc"),
             ("Show Donation Link", [True, False], "show_donation"),
             ("Analytics", [True, False], "analytics"),
-            ("Theme", ["blue", "red", "green", "purple", "cyan", "yellow", "pink", "orange", "teal", "magenta", "lime", "coral", "lavender", "gold", "mint", "rose", "sunset"], "theme")
+            ("Theme", list(THEMES), "theme")
         ]
         selected = 0
-        theme_changed = False  # Track if theme was changed
-        rpc_changed = False    # Track if Discord RPC was changed
         
         def generate_renderable():
             content = Text()
@@ -1169,7 +1142,7 @@ class UIManager:
                 title=Text("Settings", style="title"),
                 box=HEAVY,
                 padding=(2, 4),
-                border_style=config_module.COLOR_BORDER,
+                border_style="panel.border",
                 subtitle=Text(
                     f"ENTER Edit/Toggle | B Back | D Quick Download: {default_download_quality} via {download_mode} -> {download_path}",
                     style="secondary"
@@ -1181,7 +1154,7 @@ class UIManager:
         with RawTerminal():
             with Live(Align.center(generate_renderable(), vertical="middle", height=self.console.height), console=self.console, auto_refresh=False, screen=True, refresh_per_second=10) as live:
                 while True:
-                    key = get_key()
+                    key = self._read_key()
                     
                     if key == 'UP' and selected > 0:
                         selected -= 1
@@ -1201,11 +1174,11 @@ class UIManager:
                                 prompt_panel = Panel(
                                     Text("Set custom download path\n(absolute or relative)", style="info", justify="center"),
                                     box=HEAVY,
-                                    border_style=COLOR_BORDER,
+                                    border_style="panel.border",
                                 )
                                 self.console.print(Align.center(prompt_panel, vertical="middle", height=7))
 
-                                prompt_string = f" {Text('›', style=COLOR_PROMPT)} "
+                                prompt_string = f" {Text('›', style='prompt.prompt')} "
                                 pad_width = (self.console.width - 30) // 2
                                 padding = " " * max(0, pad_width)
                                 new_path = Prompt.ask(
@@ -1232,64 +1205,13 @@ class UIManager:
                         except ValueError:
                             new_val = choices[0]
                             
+                        # Subscribers apply the change (theme, Discord RPC, ...) right away.
                         settings_mgr.set(key_name, new_val)
                         
-                        # Track if Discord RPC was changed
-                        if key_name == "discord_rpc":
-                            rpc_changed = True
-                        
-                        # Reload colors if theme changed and apply immediately
-                        if key_name == "theme":
-                            theme_changed = True  # Mark that theme was changed
-                            importlib.reload(config_module)
-                            self.theme = Theme({
-                                "panel.border": config_module.COLOR_BORDER,
-                                "prompt.prompt": config_module.COLOR_PROMPT,
-                                "prompt.default": config_module.COLOR_PRIMARY_TEXT,
-                                "title": config_module.COLOR_TITLE,
-                                "secondary": config_module.COLOR_SECONDARY_TEXT,
-                                "highlight": f"{config_module.COLOR_HIGHLIGHT_FG} on {config_module.COLOR_HIGHLIGHT_BG}",
-                                "error": config_module.COLOR_ERROR,
-                                "info": config_module.COLOR_PRIMARY_TEXT,
-                                "loading": config_module.COLOR_LOADING_SPINNER,
-                            })
-                            self.console = Console(theme=self.theme)
-                        
                         live.update(Align.center(generate_renderable(), vertical="middle", height=self.console.height), refresh=True)
                     elif key == 'b' or key == 'B' or key == 'ESC':
-                        # Exit the Live context first
                         live.stop()
                         
-                        # If theme was changed, exit app to apply globally
-                        if theme_changed:
-                            self.console.clear()
-                            message = Text()
-                            message.append("Theme changed! Exiting application...\n\n", style=COLOR_TITLE)
-                            message.append("Please run the application again to apply the new theme.", style="secondary")
-                            panel = Panel(
-                                Align.center(message, vertical="middle"),
-                                box=HEAVY,
-                                border_style=COLOR_BORDER,
-                                padding=(2, 4)
-                            )
-                            self.console.print(Align.center(panel, vertical="middle", height=self.console.height))
-                            time.sleep(2)
-                            sys.exit(0)
-                        # If Discord RPC was changed, notify user
-                        if rpc_changed:
-                            self.console.clear()
-                            message = Text()
-                            message.append("Discord Rich Presence setting changed!\n\n", style=COLOR_TITLE)
-                            message.append("Please restart the application for changes to take effect.", style="secondary")
-                            panel = Panel(
-                                Align.center(message, vertical="middle"),
-                                box=HEAVY,
-                                border_style=COLOR_BORDER,
-                                padding=(2, 4)
-                            )
-                            self.console.print(Align.center(panel, vertical="middle", height=self.console.height))
-                            time.sleep(2)
-                        
                         # Clear the screen before returning
                         self.clear()
                         return
@@ -1316,7 +1238,7 @@ class UIManager:
                 title=Text(f"Episode {episode_num} - Select Quality", style="title"), 
                 box=HEAVY,
                 padding=(2, 4),
-                border_style=COLOR_BORDER,
+                border_style="panel.border",
                 subtitle=Text("ENTER Watch | D Download | b Back", style="secondary")
             )
 
@@ -1325,7 +1247,7 @@ class UIManager:
         with RawTerminal():
             with Live(Align.center(generate_renderable(), vertical="middle", height=self.console.height), console=self.console, auto_refresh=False, screen=True, refresh_per_second=10) as live:
                 while True:
-                    key = get_key()
+                    key = self._read_key()
                     
                     if key == 'UP' and selected > 0:
                         selected -= 1
@@ -1359,7 +1281,7 @@ class UIManager:
                 title=Text("Finished Watching", style="title"),
                 box=HEAVY,
                 padding=(1, 4),
-                border_style=COLOR_BORDER,
+                border_style="panel.border",
                 subtitle=Text("Select Next Action", style="secondary")
             )
 
@@ -1367,7 +1289,7 @@ class UIManager:
         with RawTerminal():
             with Live(Align.center(generate_renderable(), vertical="middle", height=self.console.height), console=self.console, auto_refresh=False, screen=True, refresh_per_second=10) as live:
                 while True:
-                    key = get_key()
+                    key = self._read_key()
                     if key == 'UP' and selected > 0:
                         selected -= 1
                         live.update(Align.center(generate_renderable(), vertical="middle", height=self.console.height), refresh=True)
@@ -1386,24 +1308,24 @@ class UIManager:
         def generate_renderable():
             content = Text()
             
-            content.append(f"ani-cli-arabic v{__version__}\n\n", style="bold " + COLOR_TITLE)
+            content.append(f"ani-cli-arabic v{__version__}\n\n", style="bold " + theme_color("title"))
             
             content.append("Abdollah", style="bold")
             content.append(" • ", style="dim")
-            content.append("github.com/np4abdou1\n", style=COLOR_PROMPT)
+            content.append("github.com/np4abdou1\n", style="prompt.prompt")
             
             content.append("Anas Tourari", style="bold")
             content.append(" • ", style="dim")
-            content.append("github.com/Anas-Tou\n\n", style=COLOR_PROMPT)
+            content.append("github.com/Anas-Tou\n\n", style="prompt.prompt")
             
             content.append("github.com/np4abdou1/ani-cli-arabic", style="dim")
             
             panel = Panel(
                 Align.center(content, vertical="middle"),
-                title=Text("CREDITS", style="bold " + COLOR_TITLE),
+                title=Text("CREDITS", style="bold " + theme_color("title")),
                 subtitle=Text("press any key to go back", style="dim"),
                 box=HEAVY,
-                border_style=COLOR_BORDER,
+                border_style="panel.border",
                 padding=(2, 4),
                 width=50
             )
@@ -1415,6 +1337,106 @@ class UIManager:
         with RawTerminal():
             with Live(Align.center(generate_renderable(), vertical="middle", height=self.console.height), console=self.console, auto_refresh=False, screen=True):
                 while True:
-                    key = get_key()
+                    key = self._read_key()
                     if key:
-                        break
\ No newline at end of file
+                        break
+
+    def diagnostics_menu(self, catalog_status=None):
+        """Live per-host network health: latency percentiles, failures and circuit state.
+
+        ``catalog_status`` is an optional callable returning the catalog sync's status dict.
+        """
+        from . import network
+        from .api import get_coalescing_stats
+        from .cache import get_response_cache
+
+        def fmt_ms(seconds):
+            if seconds is None:
+                return "-"
+            if seconds == float('inf'):
+                return "inf"
+            return f"{seconds * 1000:.0f}ms"
+
+        state_styles = {'closed': "info", 'half-open': "secondary", 'open': "error"}
+
+        def generate_renderable():
+            table = Table(box=None, padding=(0, 1), expand=True, header_style="title")
+            table.add_column("Host", style="info", no_wrap=True)
+            table.add_column("Circuit", justify="center", width=14)
+            table.add_column("Req", justify="right", width=6)
+            table.add_column("Fail", justify="right", width=5)
+            table.add_column("p50", justify="right", width=8)
+            table.add_column("p90", justify="right", width=8)
+            table.add_column("p99", justify="right", width=8)
+            table.add_column("Timeout", justify="right", width=8)
+            table.add_column("Last error", style="secondary", no_wrap=True)
+
+            rows = network.get_host_health()
+            connections = network.get_connection_stats()
+            for row in rows[:max(1, self.console.height - 16)]:
+                state = row['state']
+                if state == 'open':
+                    state = f"open {row['retry_in']:.0f}s"
+                conn = connections.get(row['host']) or connections.get(row['host'].rsplit(':', 1)[0], {})
+                reused = conn.get('reused', 0)
+                table.add_row(
+                    f"{row['host'][:40]} [dim]({reused} reused)[/dim]",
+                    Text(state, style=state_styles.get(row['state'], "info")),
+                    str(row['requests']),
+                    str(row['failures'] + row['rejected']),
+                    fmt_ms(row['p50']),
+                    fmt_ms(row['p90']),
+                    fmt_ms(row['p99']),
+                    fmt_ms(row['timeout']),
+                    row['last_error'][:30],
+                )
+            if not rows:
+                table.add_row(Text("No requests made yet", style="secondary"), "", "", "", "", "", "", "", "")
+
+            cache = get_response_cache().stats()
+            flights = get_coalescing_stats()
+            posters = self.poster_cache.stats()
+            summary = Text(justify="center")
+            summary.append(
+                f"\nResponse cache: {cache['hits']} hits, {cache['stale_hits']} stale, {cache['misses']} misses, "
+                f"{cache['entries']} entries ({cache['bytes'] // 1024} KiB)\n",
+                style="secondary",
+            )
+            summary.append(
+                f"Coalesced requests: {flights['collapsed']} of {flights['calls']} | "
+                f"Posters: {posters['ansi_hits']} rendered hits, {posters['downloads']} downloads",
+                style="secondary",
+            )
+
+            if catalog_status is not None:
+                catalog = catalog_status()
+                state = f"syncing {catalog['current']}" if catalog.get('current') else ("idle" if catalog.get('running') else "stopped")
+                summary.append(
+                    f"\nCatalog: {catalog['anime']} anime, {catalog['list_rows']} rows in {catalog['lists']} lists | "
+                    f"sync {state}, {catalog['pages']} pages, {catalog['errors']} errors",
+                    style="secondary",
+                )
+
+            table_group = Table.grid(expand=True)
+            table_group.add_row(table)
+            table_group.add_row(summary)
+            return Panel(
+                table_group,
+                title=Text("Network Diagnostics", style="title"),
+                box=HEAVY,
+                border_style="panel.border",
+                subtitle=Text("Percentiles are histogram bucket bounds | B Back", style="secondary")
+            )
+
+        self.clear()
+
+        with RawTerminal():
+            with Live(Align.center(generate_renderable(), vertical="middle", height=self.console.height), console=self.console, auto_refresh=False, screen=True) as live:
+                last_refresh = time.monotonic()
+                while True:
+                    key = self._read_key()
+                    if key in ('b', 'B', 'ESC', 'q', 'ENTER'):
+                        break
+                    if time.monotonic() - last_refresh >= 1.0:
+                        live.update(Align.center(generate_renderable(), vertical="middle", height=self.console.height), refresh=True)
+                        last_refresh = time.monotonic()
@@ -2,19 +2,22 @@ import sys
 import re
 import platform
 import subprocess
-import requests
 from pathlib import Path
 
 from .version import __version__, APP_VERSION, API_RELEASES_URL
-from .config import COLOR_PROMPT
+from .config import theme_color
 from .utils import is_bundled
+from . import network
 
 
 from rich.console import Console
+from rich.theme import Theme
 console = Console()
 
 def _print_header(title):
-    console.print(f"\n[bold magenta]{title}[/bold magenta]\n")
+    # Resolved when printed, so a theme picked after startup is used.
+    with console.use_theme(Theme({"prompt.prompt": theme_color("prompt")})):
+        console.print(f"\n[bold][prompt.prompt]{title}[/prompt.prompt][/bold]\n")
 
 def _print_info(text):
     console.print(f"  {text}")
@@ -45,7 +48,7 @@ def parse_version(ver_string):
 
 def get_latest_release():
     try:
-        resp = requests.get(API_RELEASES_URL, timeout=10)
+        resp = network.get(API_RELEASES_URL, timeout=10)
         if resp.status_code == 200:
             return resp.json()
     except Exception:
@@ -86,7 +89,7 @@ def get_installation_type():
 
 def get_pypi_latest_version():
     try:
-        resp = requests.get('https://pypi.org/pypi/ani-cli-arabic/json', timeout=10)
+        resp = network.get('https://pypi.org/pypi/ani-cli-arabic/json', timeout=10)
         if resp.status_code == 200:
             data = resp.json()
             return data['info']['version']
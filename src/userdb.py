@@ -0,0 +1,292 @@
+import json
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# User data store.
+# History, favorites, settings and the cached API credentials live in one
+# SQLite database (WAL mode) under ~/.ani-cli-arabic/database, so a change is
+# a row-level write instead of rewriting a whole JSON file, and the managers'
+# reads are indexed queries. The JSON files older versions wrote are imported
+# once, on first open, and left in place.
+#
+# history holds the latest episode per anime ("continue watching"); every
+# playback is also appended to watch_log, which is indexed per anime.
+
+DB_FILENAME = "user.db"
+SCHEMA_VERSION = 3
+
+# Every write is an upsert (INSERT ... ON CONFLICT DO UPDATE), which SQLite
+# gained in 3.24. Python builds bundle newer; a system library older than
+# this is refused up front instead of failing every write.
+MIN_SQLITE_VERSION = (3, 24, 0)
+
+# Columns added after a table was first released: table -> (column, definition).
+ADDED_COLUMNS = (
+    ("history", "position", "REAL"),
+    ("history", "duration", "REAL"),
+    ("history", "completed", "INTEGER NOT NULL DEFAULT 1"),
+    ("favorites", "removed_at", "TEXT"),
+)
+
+# JSON file -> table it is imported into.
+LEGACY_FILES = (
+    ("history.json", "history"),
+    ("favorites.json", "favorites"),
+    ("config.json", "settings"),
+    ("api_credentials.json", "credentials"),
+)
+
+
+def get_database_dir() -> Path:
+    return Path.home() / ".ani-cli-arabic" / "database"
+
+
+class UserDatabase:
+    """One SQLite connection shared by the user-data managers.
+
+    Writes go through ``transaction()`` (BEGIN IMMEDIATE), so concurrent
+    processes serialize on the database lock instead of losing updates. If
+    the database can't be opened the store falls back to memory for the
+    session rather than failing the app.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            raise RuntimeError(
+                f"SQLite {'.'.join(map(str, MIN_SQLITE_VERSION))} or newer is required,"
+                f" this Python uses {sqlite3.sqlite_version}"
+            )
+        self.db_path = db_path or get_database_dir() / DB_FILENAME
+        self._lock = threading.RLock()
+        self.persistent = True
+        self._conn: Optional[sqlite3.Connection] = None
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = self._connect(str(self.db_path))
+            self._init_schema()
+            self._migrate_legacy_files(self.db_path.parent)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: Failed to open user database, changes won't be saved: {e}", file=sys.stderr)
+            self.persistent = False
+            if self._conn is not None:
+                # Opened, then failed in the schema or migration: don't leave it holding the file.
+                self._conn.close()
+            self._conn = self._connect(":memory:")
+            self._init_schema()
+
+    @staticmethod
+    def _connect(target: str) -> sqlite3.Connection:
+        # Autocommit mode: transactions are opened explicitly by transaction().
+        conn = sqlite3.connect(target, check_same_thread=False, timeout=5, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    def _init_schema(self) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS history ("
+                " anime_id TEXT PRIMARY KEY, title TEXT NOT NULL DEFAULT '',"
+                " episode TEXT NOT NULL DEFAULT '', last_updated TEXT NOT NULL DEFAULT '')"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS history_last_updated ON history (last_updated)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS watch_log ("
+                " entry_id TEXT PRIMARY KEY, anime_id TEXT NOT NULL, title TEXT NOT NULL DEFAULT '',"
+                " episode TEXT NOT NULL DEFAULT '', watched_at TEXT NOT NULL DEFAULT '',"
+                " position REAL, duration REAL, completed INTEGER NOT NULL DEFAULT 1)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS watch_log_anime ON watch_log (anime_id, watched_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS favorites ("
+                " anime_id TEXT PRIMARY KEY, title TEXT NOT NULL DEFAULT '',"
+                " thumbnail TEXT NOT NULL DEFAULT '', added_at TEXT NOT NULL DEFAULT '')"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS favorites_added_at ON favorites (added_at)")
+            # Values are JSON so booleans and numbers round-trip.
+            conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS credentials ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY, migrated_at REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS maintenance (task TEXT PRIMARY KEY, last_run REAL NOT NULL)")
+            for table, column, definition in ADDED_COLUMNS:
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            conn.execute("PRAGMA user_version=%d" % SCHEMA_VERSION)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: tuple = ()) -> Optional[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def data_version(self) -> int:
+        """Changes whenever another connection (usually another process) commits."""
+        return self.query_one("PRAGMA data_version")[0]
+
+    def execute(self, sql: str, params: tuple = ()) -> None:
+        """Run one write statement in its own transaction."""
+        with self.transaction() as conn:
+            conn.execute(sql, params)
+
+    # Legacy JSON import
+
+    def _migrate_legacy_files(self, db_dir: Path) -> None:
+        for filename, table in LEGACY_FILES:
+            path = db_dir / filename
+            if not path.exists():
+                continue
+            with self.transaction() as conn:
+                if conn.execute("SELECT 1 FROM migrations WHERE name=?", (filename,)).fetchone():
+                    continue
+                data, mtime = self._read_legacy(path)
+                if isinstance(data, dict):
+                    getattr(self, f"_import_{table}")(conn, data, mtime)
+                # Recorded even when unreadable, so a broken file isn't retried on every start.
+                conn.execute("INSERT INTO migrations (name, migrated_at) VALUES (?, ?)", (filename, time.time()))
+
+    @staticmethod
+    def _read_legacy(path: Path) -> Tuple[Any, float]:
+        try:
+            with open(path, 'r', encoding='utf-8') as handle:
+                return json.load(handle), path.stat().st_mtime
+        except (OSError, ValueError):
+            return None, 0.0
+
+    @staticmethod
+    def _import_history(conn: sqlite3.Connection, data: dict, mtime: float) -> None:
+        conn.executemany(
+            "INSERT OR IGNORE INTO history (anime_id, title, episode, last_updated) VALUES (?, ?, ?, ?)",
+            [
+                (str(anime_id), str(entry.get('title', '')), str(entry.get('episode', '')), str(entry.get('last_updated', '')))
+                for anime_id, entry in data.items() if isinstance(entry, dict)
+            ],
+        )
+
+    @staticmethod
+    def _import_favorites(conn: sqlite3.Connection, data: dict, mtime: float) -> None:
+        conn.executemany(
+            "INSERT OR IGNORE INTO favorites (anime_id, title, thumbnail, added_at) VALUES (?, ?, ?, ?)",
+            [
+                (str(anime_id), str(entry.get('title', '')), str(entry.get('thumbnail', '') or ''), str(entry.get('added_at', '')))
+                for anime_id, entry in data.items() if isinstance(entry, dict)
+            ],
+        )
+
+    @staticmethod
+    def _import_settings(conn: sqlite3.Connection, data: dict, mtime: float) -> None:
+        conn.executemany(
+            "INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)",
+            [(str(key), json.dumps(value, ensure_ascii=False)) for key, value in data.items()],
+        )
+
+    @staticmethod
+    def _import_credentials(conn: sqlite3.Connection, data: dict, mtime: float) -> None:
+        # The file's mtime is when the keys were fetched; it keeps their age correct.
+        conn.executemany(
+            "INSERT OR IGNORE INTO credentials (key, value, updated_at) VALUES (?, ?, ?)",
+            [(str(key), str(value or ''), mtime) for key, value in data.items()],
+        )
+
+    # Settings
+
+    def get_settings(self) -> Dict[str, Any]:
+        settings = {}
+        for key, value in self.query("SELECT key, value FROM settings"):
+            try:
+                settings[key] = json.loads(value)
+            except ValueError:
+                continue
+        return settings
+
+    def get_setting(self, key: str, default: Any = None) -> Any:
+        row = self.query_one("SELECT value FROM settings WHERE key=?", (key,))
+        if row is None:
+            return default
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return default
+
+    def set_settings(self, values: Dict[str, Any]) -> None:
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO settings (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                [(key, json.dumps(value, ensure_ascii=False)) for key, value in values.items()],
+            )
+
+    # Credentials
+
+    def get_credentials(self) -> Tuple[Dict[str, str], Optional[float]]:
+        """Stored credential keys and when they were last written (None if there are none)."""
+        rows = self.query("SELECT key, value, updated_at FROM credentials")
+        if not rows:
+            return {}, None
+        return {key: value for key, value, _ in rows}, max(updated_at for _, _, updated_at in rows)
+
+    def set_credentials(self, keys: Dict[str, str]) -> None:
+        now = time.time()
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO credentials (key, value, updated_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET value=excluded.value, updated_at=excluded.updated_at",
+                [(key, value, now) for key, value in keys.items()],
+            )
+
+    # Maintenance
+
+    def last_run(self, task: str) -> Optional[float]:
+        row = self.query_one("SELECT last_run FROM maintenance WHERE task=?", (task,))
+        return row[0] if row else None
+
+    def mark_run(self, task: str) -> None:
+        self.execute(
+            "INSERT INTO maintenance (task, last_run) VALUES (?, ?)"
+            " ON CONFLICT(task) DO UPDATE SET last_run=excluded.last_run",
+            (task, time.time()),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+
+
+_user_db = None
+_user_db_lock = threading.Lock()
+
+
+def get_user_db() -> UserDatabase:
+    global _user_db
+    if _user_db is None:
+        with _user_db_lock:
+            if _user_db is None:
+                _user_db = UserDatabase()
+    return _user_db
@@ -6,7 +6,6 @@ import subprocess
 import threading
 import platform
 import re
-import requests
 from rich.progress import Progress, BarColumn, TextColumn, TransferSpeedColumn, TimeRemainingColumn, DownloadColumn
 from rich.live import Live
 from rich.align import Align
@@ -15,6 +14,8 @@ from rich.text import Text
 from rich.spinner import Spinner
 from rich.box import HEAVY
 
+from .downloader import DEFAULT_CONNECTIONS, SegmentedDownload
+
 if os.name == 'nt':
     import msvcrt
 else:
@@ -319,6 +320,15 @@ def flush_stdin():
             pass
 
 
+def format_position(seconds):
+    """Playback position as m:ss, or h:mm:ss past an hour."""
+    seconds = int(seconds or 0)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
 def get_idm_path():
     """Check for Internet Download Manager executable on Windows."""
     if platform.system() != 'Windows':
@@ -464,69 +474,76 @@ def _download_with_aria2(url, filename, download_dir, filepath, console):
     return True
 
 
-def _download_with_builtin(url, filename, filepath, console):
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-    last_error = None
+def resolve_mediafire_direct(source_url):
+    """Re-resolve an expired direct link from the MediaFire page it came from."""
+    from .api import AnimeAPI
+    return AnimeAPI().extract_mediafire_direct(source_url)
+
+
+def _download_with_builtin(url, filename, filepath, console, connections=None, source_url=None):
+    progress = Progress(
+        TextColumn("[bold blue]{task.fields[filename]}", justify="center"),
+        BarColumn(bar_width=36),
+        "[progress.percentage]{task.percentage:>3.1f}%",
+        "•",
+        DownloadColumn(binary_units=True),
+        "•",
+        TransferSpeedColumn(),
+        "•",
+        TimeRemainingColumn(),
+        console=console,
+        expand=False,
+    )
+    task_id = progress.add_task("download", filename=filename, total=None)
+
+    def on_start(total, completed):
+        progress.reset(task_id, total=total, completed=completed)
+
+    def on_advance(size):
+        progress.update(task_id, advance=size)
 
-    for _ in range(2):
+    download = SegmentedDownload(
+        url,
+        filepath,
+        connections=connections or DEFAULT_CONNECTIONS,
+        on_start=on_start,
+        on_advance=on_advance,
+        source_url=source_url,
+        resolve_source=resolve_mediafire_direct,
+    )
+
+    panel = Panel(
+        Align.center(progress, vertical="middle"),
+        title=Text("DOWNLOADING", style="title"),
+        subtitle=Text("Please wait...", style="secondary"),
+        box=HEAVY,
+        border_style="panel.border",
+        padding=(2, 2),
+        width=92,
+    )
+
+    with Live(
+        Align.center(panel, vertical="middle", height=console.height),
+        console=console,
+        refresh_per_second=16,
+        screen=True,
+    ):
+        progress.start()
         try:
-            with requests.get(url, stream=True, headers=headers, timeout=(10, 45)) as response:
-                response.raise_for_status()
-                total_size = int(response.headers.get('content-length', 0))
-
-                progress = Progress(
-                    TextColumn("[bold blue]{task.fields[filename]}", justify="center"),
-                    BarColumn(bar_width=36),
-                    "[progress.percentage]{task.percentage:>3.1f}%",
-                    "•",
-                    DownloadColumn(binary_units=True),
-                    "•",
-                    TransferSpeedColumn(),
-                    "•",
-                    TimeRemainingColumn(),
-                    console=console,
-                    expand=False,
-                )
+            download.run()
+        finally:
+            progress.stop()
 
-                panel = Panel(
-                    Align.center(progress, vertical="middle"),
-                    title=Text("DOWNLOADING", style="title"),
-                    subtitle=Text("Please wait...", style="secondary"),
-                    box=HEAVY,
-                    border_style="panel.border",
-                    padding=(2, 2),
-                    width=92,
-                )
+    _show_centered_download_message(console, "Download Complete", filepath, is_error=False, duration=1.0)
+    return True
 
-                with Live(
-                    Align.center(panel, vertical="middle", height=console.height),
-                    console=console,
-                    refresh_per_second=16,
-                    screen=True,
-                ):
-                    progress.start()
-                    try:
-                        task_id = progress.add_task("download", filename=filename, total=total_size if total_size > 0 else None)
-                        with open(filepath, 'wb') as file_handle:
-                            for chunk in response.iter_content(chunk_size=32768):
-                                if not chunk:
-                                    continue
-                                file_handle.write(chunk)
-                                progress.update(task_id, advance=len(chunk))
-                    finally:
-                        progress.stop()
-
-            _show_centered_download_message(console, "Download Complete", filepath, is_error=False, duration=1.0)
-            return True
-        except requests.RequestException as error:
-            last_error = error
-
-    if last_error:
-        raise last_error
-
-    raise RuntimeError("Download failed")
-
-def download_file(url, filename, console, mode="internal", download_dir=None):
+def download_file(url, filename, console, mode="internal", download_dir=None, connections=None, source_url=None):
+    """Download ``url`` into ``download_dir``.
+
+    The built-in engine keeps a ``.part`` file and sidecar when interrupted,
+    so calling this again for the same file resumes it. ``source_url`` is the
+    MediaFire page the direct link came from, used to refresh an expired link.
+    """
     filename = sanitize_download_filename(filename)
 
     # Use absolute path for compatibility with external tools (IDM/aria2)
@@ -583,21 +600,26 @@ def download_file(url, filename, console, mode="internal", download_dir=None):
             selected_mode = "internal"
 
         if selected_mode == "internal":
-            return _download_with_builtin(url, filename, filepath, console)
+            return _download_with_builtin(url, filename, filepath, console, connections=connections, source_url=source_url)
 
         return False
 
     except KeyboardInterrupt:
+        # The built-in engine never writes to `filepath` before it is complete;
+        # its .part file and sidecar stay behind so the next attempt resumes.
         try:
             if os.path.exists(filepath):
                 os.remove(filepath)
         except OSError:
             pass
 
+        message = "The download was cancelled by user."
+        if selected_mode == "internal":
+            message += "\nDownloading it again resumes where it stopped."
         _show_centered_download_message(
             console,
             "Download Cancelled",
-            "The download was cancelled by user.",
+            message,
             is_error=True,
             duration=1.0,
         )
@@ -0,0 +1,295 @@
+import atexit
+import json
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .storage import try_lock_file
+from .userdb import UserDatabase, get_user_db
+
+# Write-behind persistence for history, the watch log and favorites.
+# A mutation is applied to the manager's in-memory view and appended to a
+# journal file straight away; a background thread later writes everything
+# pending to the database in one transaction, so a binge session or a batch
+# download costs a handful of commits instead of one per episode. Repeated
+# writes to the same row between flushes collapse into the last one.
+#
+# Each process appends to its own journal (user.journal.<pid>) and holds a
+# lock on it while running. After a flush the journal is compacted down to
+# whatever is still pending. A journal nobody holds a lock on belongs to a
+# process that exited without flushing; it is replayed into the database
+# and removed on the next start.
+#
+# Several processes can write the same rows (one watching while another
+# downloads). A flush only replaces a stored row with one whose change is at
+# least as recent, so a process that flushes late can't undo a newer change
+# made elsewhere; favorites are removed by stamping removed_at rather than
+# deleting the row, so removals take part in the same comparison. Watch log
+# entries are never rewritten, only added.
+
+FLUSH_INTERVAL = 2.0
+JOURNAL_PREFIX = "user.journal."
+
+# Row layout of each table that goes through the journal; the first column is the key.
+TABLE_COLUMNS = {
+    'history': ('anime_id', 'title', 'episode', 'last_updated', 'position', 'duration', 'completed'),
+    'favorites': ('anime_id', 'title', 'thumbnail', 'added_at', 'removed_at'),
+    'watch_log': ('entry_id', 'anime_id', 'title', 'episode', 'watched_at', 'position', 'duration', 'completed'),
+}
+
+# Values for columns missing from rows journaled by older versions (others are NULL).
+COLUMN_DEFAULTS = {'completed': 1}
+
+# When a row may replace the stored one; tables without an entry are append-only.
+NEWER_THAN_STORED = {
+    'history': "excluded.last_updated >= history.last_updated",
+    'favorites': (
+        "MAX(excluded.added_at, COALESCE(excluded.removed_at, ''))"
+        " >= MAX(favorites.added_at, COALESCE(favorites.removed_at, ''))"
+    ),
+}
+
+Ops = Dict[Tuple[str, str], Optional[tuple]]
+
+
+def _upsert_sql(table: str) -> str:
+    columns = TABLE_COLUMNS[table]
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+    newer = NEWER_THAN_STORED.get(table)
+    if newer is None:
+        return sql + f" ON CONFLICT({columns[0]}) DO NOTHING"
+    updates = ', '.join(f"{column}=excluded.{column}" for column in columns[1:])
+    return sql + f" ON CONFLICT({columns[0]}) DO UPDATE SET {updates} WHERE {newer}"
+
+
+UPSERT_SQL = {table: _upsert_sql(table) for table in TABLE_COLUMNS}
+
+
+def _journal_line(table: str, key: str, row: Optional[tuple]) -> str:
+    return json.dumps([table, key, row], ensure_ascii=False) + "\n"
+
+
+class WriteBehind:
+    """Journaled, coalescing buffer of row puts/deletes in front of UserDatabase."""
+
+    def __init__(self, db: UserDatabase, journal_dir: Optional[Path] = None, interval: float = FLUSH_INTERVAL):
+        self.db = db
+        self.interval = interval
+        self.journal_dir = journal_dir or db.db_path.parent
+        self.journal_path = self.journal_dir / f"{JOURNAL_PREFIX}{os.getpid()}"
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Ops = {}
+        self._journal = None
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self.stats = {'writes': 0, 'flushes': 0, 'rows_flushed': 0, 'recovered': 0}
+        self.persistent = db.persistent
+        if self.persistent:
+            self._recover()
+            self._open_journal()
+
+    # Journal
+
+    def _open_journal(self) -> None:
+        try:
+            self.journal_dir.mkdir(parents=True, exist_ok=True)
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            try_lock_file(self._journal)
+        except OSError as e:
+            print(f"Warning: Failed to open write journal: {e}", file=sys.stderr)
+            self._journal = None
+
+    @staticmethod
+    def _read_journal(handle) -> Ops:
+        ops: Ops = {}
+        handle.seek(0)
+        for line in handle:
+            try:
+                table, key, row = json.loads(line)
+            except ValueError:
+                # A torn last line from a crash mid-write.
+                continue
+            if table not in TABLE_COLUMNS:
+                continue
+            if row is not None:
+                # Journals written before a table gained columns.
+                columns = TABLE_COLUMNS[table]
+                row = tuple(row) + tuple(COLUMN_DEFAULTS.get(column) for column in columns[len(row):])
+            ops[(table, key)] = row
+        return ops
+
+    def _recover(self) -> None:
+        """Apply journals left behind by processes that exited without flushing."""
+        try:
+            paths = sorted(self.journal_dir.glob(JOURNAL_PREFIX + "*"), key=lambda p: p.stat().st_mtime)
+        except OSError:
+            return
+        for path in paths:
+            try:
+                handle = open(path, 'a+', encoding='utf-8')
+            except OSError:
+                continue
+            try:
+                if not try_lock_file(handle):
+                    # Still in use by a running process.
+                    continue
+                ops = self._read_journal(handle)
+                if ops:
+                    self._apply(ops)
+                    self.stats['recovered'] += len(ops)
+            except (OSError, sqlite3.Error) as e:
+                print(f"Warning: Failed to recover pending writes: {e}", file=sys.stderr)
+                continue
+            finally:
+                handle.close()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _compact_journal(self) -> None:
+        """Rewrite the journal with only what is still pending. Called with ``_lock`` held."""
+        if self._journal is None:
+            return
+        try:
+            self._journal.seek(0)
+            self._journal.truncate()
+            for (table, key), row in self._pending.items():
+                self._journal.write(_journal_line(table, key, row))
+            self._journal.flush()
+        except OSError:
+            pass
+
+    # Writes
+
+    def put(self, table: str, row: tuple) -> None:
+        self._record(table, str(row[0]), tuple(row))
+
+    def delete(self, table: str, key: str) -> None:
+        self._record(table, str(key), None)
+
+    def _record(self, table: str, key: str, row: Optional[tuple]) -> None:
+        line = _journal_line(table, key, row)
+        with self._lock:
+            self._pending[(table, key)] = row
+            self.stats['writes'] += 1
+            if self._journal is None and self.persistent:
+                # Written after close(): journal it again until the next flush.
+                self._open_journal()
+            if self._journal is not None:
+                try:
+                    self._journal.write(line)
+                    self._journal.flush()
+                except OSError:
+                    pass
+        self._ensure_thread()
+
+    def request_flush(self) -> None:
+        """Ask the background thread to flush now instead of at the next interval."""
+        self._ensure_thread()
+        self._wake.set()
+
+    # Flushing
+
+    def _apply(self, ops: Ops) -> None:
+        with self.db.transaction() as conn:
+            for (table, key), row in ops.items():
+                if row is None:
+                    conn.execute(f"DELETE FROM {table} WHERE {TABLE_COLUMNS[table][0]}=?", (key,))
+                else:
+                    conn.execute(UPSERT_SQL[table], row)
+
+    def flush(self) -> int:
+        """Write everything pending to the database now; returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                ops = dict(self._pending)
+            try:
+                self._apply(ops)
+            except sqlite3.Error as e:
+                # Still pending and journaled; the next flush retries.
+                print(f"Warning: Failed to save history/favorites: {e}", file=sys.stderr)
+                return 0
+            with self._lock:
+                for op_key, row in ops.items():
+                    # Rows rewritten while the transaction ran stay pending.
+                    if op_key in self._pending and self._pending[op_key] is row:
+                        del self._pending[op_key]
+                self._compact_journal()
+                self.stats['flushes'] += 1
+                self.stats['rows_flushed'] += len(ops)
+            return len(ops)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None or self._stopped:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self) -> None:
+        """Stop the background thread and flush. Safe to call more than once."""
+        self._stopped = True
+        self._wake.set()
+        self.flush()
+        with self._lock:
+            if self._journal is not None and not self._pending:
+                self._journal.close()
+                self._journal = None
+                try:
+                    os.remove(self.journal_path)
+                except OSError:
+                    pass
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def pending_rows(self, table: str) -> List[Tuple[str, Optional[tuple]]]:
+        """Changes to ``table`` not written to the database yet, as (key, row or None)."""
+        with self._lock:
+            return [(key, row) for (op_table, key), row in self._pending.items() if op_table == table]
+
+
+_write_behind = None
+_write_behind_lock = threading.Lock()
+
+
+def get_write_behind() -> WriteBehind:
+    global _write_behind
+    if _write_behind is None:
+        with _write_behind_lock:
+            if _write_behind is None:
+                _write_behind = WriteBehind(get_user_db())
+                atexit.register(_write_behind.close)
+    return _write_behind
+
+
+def flush_pending() -> None:
+    """Flush and close the shared write-behind buffer, if one was started."""
+    if _write_behind is not None:
+        _write_behind.close()
+
+
+def load_rows(db: UserDatabase, table: str, where: str = "", params: tuple = (), order_by: str = "") -> Iterable[tuple]:
+    """Rows of a journaled table as stored, in ``TABLE_COLUMNS`` order."""
+    sql = f"SELECT {', '.join(TABLE_COLUMNS[table])} FROM {table}"
+    if where:
+        sql += f" WHERE {where}"
+    if order_by:
+        sql += f" ORDER BY {order_by}"
+    return db.query(sql, params)